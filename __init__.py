@@ -19,6 +19,11 @@ from .src import drivers
 from .src import constants
 from .src import utils
 from .src import setup_helpers
+from .src import registry
+from .src import object_tags
+from .src import history
+from .src import dispatch
+from .src import spatial_cache
 
 def register():
     # Register in dependency order: properties first, then UI components
@@ -26,11 +31,21 @@ def register():
     lists.register()
     operators.register()
     panels.register()
+    registry.register()
+    object_tags.register()
+    history.register()
+    dispatch.register()
+    spatial_cache.register()
     
     # json_helpers and drivers are utility modules, no registration needed
 
 def unregister():
     # Unregister in reverse order
+    spatial_cache.unregister()
+    dispatch.unregister()
+    history.unregister()
+    object_tags.unregister()
+    registry.unregister()
     panels.unregister()
     operators.unregister()
     lists.unregister()
@@ -0,0 +1,194 @@
+# Gear clipping detection for TBSE Body Kit addon
+# Finds body vertices poking through gear for every combination of master shapes, without switching
+# any shape: body and gear positions are evaluated as basis + shape delta arrays (the body's from the
+# spatial cache, the gear's read fresh), and each vertex of the body part the gear covers is tested against a BVH of the gear surface in that shape. Clipping can be pushed
+# out by moving the gear vertices of the clipped faces along the face normal in the gear's shape key.
+import bpy
+import itertools
+import numpy as np
+from mathutils.bvhtree import BVHTree
+from typing import Dict, List, Tuple
+from .constants import GEAR_SHAPE_MASTERS, CLIP_SOURCE_GROUPS
+from .object_tags import get_group_objects, get_object_tag
+from .spatial_cache import get_spatial_entry, read_coordinates, read_spatial_entry
+
+# How far from the gear surface body vertices are tested
+DEFAULT_MAX_DISTANCE = 0.02
+
+# Gap left between body and gear after pushing out
+DEFAULT_MARGIN = 0.001
+
+
+def master_shapes(master_name: str) -> List[str]:
+    """Get the shape names of a master, in key block order."""
+    master = bpy.data.shape_keys.get(master_name)
+    return [key.name for key in master.key_blocks] if master else []
+
+
+def find_clipping(tree: BVHTree, points: np.ndarray, max_distance: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the points that lie outside a surface, i.e. on the side its normals face.
+
+    Args:
+        tree: BVH of the gear surface
+        points: (n, 3) body positions, in the same space as the tree
+        max_distance: Points farther than this from the surface are skipped
+
+    Returns:
+        (gear face index, depth outside the surface, face normal (k, 3)) of every clipping point
+    """
+    faces, depths, normals = [], [], []
+    for point in points:
+        location, normal, face, _ = tree.find_nearest(point, max_distance)
+        if location is None:
+            continue
+        depth = (point[0] - location.x) * normal.x + (point[1] - location.y) * normal.y + (point[2] - location.z) * normal.z
+        if depth > 0.0:
+            faces.append(face)
+            depths.append(depth)
+            normals.append(normal[:])
+    return (np.array(faces, dtype=np.int64), np.array(depths, dtype=np.float32),
+            np.array(normals, dtype=np.float32).reshape(-1, 3))
+
+
+def _body_positions(body, names) -> np.ndarray:
+    # Body positions with one shape of each master applied, shape keys add up as in Blender
+    positions = body.basis
+    for name in names:
+        deltas = body.deltas.get(name)
+        if deltas is not None:
+            positions = positions + deltas
+    return positions
+
+
+def _within_bounds(points: np.ndarray, positions: np.ndarray, padding: float) -> np.ndarray:
+    # Only body vertices inside the padded gear bounding box can reach the gear
+    low = positions.min(axis=0) - padding
+    high = positions.max(axis=0) + padding
+    return points[np.all((points >= low) & (points <= high), axis=1)]
+
+
+def _push_out_vectors(triangles: np.ndarray, count: int, faces: np.ndarray, depths: np.ndarray,
+                      normals: np.ndarray, margin: float) -> np.ndarray:
+    # Per gear vertex, the largest push of any clipped face it belongs to, along that face's normal.
+    # Sorting by vertex then amount puts each vertex's deepest push last in its run
+    vertices = triangles[faces].ravel()
+    amounts = np.repeat(depths + margin, 3)
+    directions = np.repeat(normals, 3, axis=0)
+    order = np.lexsort((amounts, vertices))
+    sorted_vertices = vertices[order]
+    deepest = order[np.append(sorted_vertices[1:] != sorted_vertices[:-1], True)]
+    vectors = np.zeros((count, 3), dtype=np.float32)
+    vectors[vertices[deepest]] = directions[deepest] * amounts[deepest, None]
+    return vectors
+
+
+def check_object(obj, max_distance: float = DEFAULT_MAX_DISTANCE, margin: float = DEFAULT_MARGIN,
+                 push_out: bool = False) -> Dict[Tuple[str, ...], int]:
+    """
+    Count the body vertices clipping through a gear object for every master shape combination.
+
+    The tested body is the part the gear covers (its CLIP_SOURCE_GROUPS), so hand gear is tested
+    against the hands. The gear follows one master and the body is tested in the same shape; if the
+    body also has shape keys of another master, it is tested in each of its shapes too. Every chest x
+    leg shape pair gets a count either way.
+
+    Args:
+        obj: Registered gear mesh object
+        max_distance: Distance from the gear surface within which body vertices are tested
+        margin: Gap left between body and gear when pushing out
+        push_out: Write corrected positions into the gear shape keys
+
+    Returns:
+        (shape of each master in GEAR_SHAPE_MASTERS order) -> clipping body vertex count
+    """
+    tag = get_object_tag(obj)
+    gear_master = GEAR_SHAPE_MASTERS.get(tag[0]) if tag else None
+    if gear_master is None or obj.type != 'MESH':
+        print(f"Warning: '{obj.name}' isn't registered gear, skipping clipping check")
+        return {}
+
+    # Gear is read without caching, the body cache is for meshes many gear pieces share
+    gear = read_spatial_entry([obj])
+    if not len(gear.triangles):
+        return {}
+    masters = list(dict.fromkeys(GEAR_SHAPE_MASTERS.values()))
+    shapes = {master: master_shapes(master) for master in masters}
+    body = get_spatial_entry([body for group in CLIP_SOURCE_GROUPS.get(tag[0], ())
+                              for body in get_group_objects(group)])
+    # Other masters only matter if the tested body has their shape keys
+    followed = [master for master in masters
+                if master != gear_master and any(shape in body.deltas for shape in shapes[master])]
+
+    # (gear shape, shape of each followed master) -> count
+    counts = {}
+    pushes = {}
+    for gear_shape in shapes[gear_master]:
+        positions = gear.shape_positions(gear_shape)
+        tree = BVHTree.FromPolygons(positions.tolist(), gear.triangles.tolist())
+        clipped = []
+        for other_shapes in itertools.product(*(shapes[master] for master in followed)):
+            body_shapes = (gear_shape,) + other_shapes
+            points = _within_bounds(_body_positions(body, body_shapes), positions, max_distance)
+            faces, depths, normals = find_clipping(tree, points, max_distance)
+            counts[body_shapes] = len(faces)
+            if len(faces):
+                clipped.append((faces, depths, normals))
+        if push_out and clipped:
+            faces, depths, normals = (np.concatenate(parts) for parts in zip(*clipped))
+            pushes[gear_shape] = _push_out_vectors(gear.triangles, len(positions), faces, depths, normals, margin)
+
+    if pushes:
+        push_out_shapes(obj, pushes)
+
+    results = {}
+    for combo in itertools.product(*(shapes[master] for master in masters)):
+        chosen = dict(zip(masters, combo))
+        body_shapes = (chosen[gear_master],) + tuple(chosen[master] for master in followed)
+        if body_shapes in counts:
+            results[combo] = counts[body_shapes]
+    return results
+
+
+def push_out_shapes(obj, pushes: Dict[str, np.ndarray]) -> int:
+    """
+    Add world space push vectors to a gear object's shape keys.
+
+    The reference key is left alone, as moving it would shift every shape.
+
+    Args:
+        obj: Gear mesh object
+        pushes: Shape key name -> (vertices, 3) world space push per vertex
+
+    Returns:
+        Number of shape keys written
+    """
+    shape_keys = obj.data.shape_keys
+    if shape_keys is None:
+        return 0
+    count = len(obj.data.vertices)
+    to_local = np.linalg.inv(np.array(obj.matrix_world, dtype=np.float32)[:3, :3]).T
+    written = 0
+    for name, vectors in pushes.items():
+        key = shape_keys.key_blocks.get(name)
+        if key is None or key == shape_keys.reference_key:
+            continue
+        coords = read_coordinates(key.data, count) + vectors @ to_local
+        key.data.foreach_set('co', coords.astype(np.float32).ravel())
+        written += 1
+    if written:
+        obj.data.update()
+    return written
+
+
+def check_gear_clipping(objects, max_distance: float = DEFAULT_MAX_DISTANCE, margin: float = DEFAULT_MARGIN,
+                        push_out: bool = False) -> Dict[str, Dict[Tuple[str, ...], int]]:
+    """
+    Run the clipping check on several gear objects in one batch.
+
+    Body arrays come from the spatial cache, so they are read once for the whole batch.
+
+    Returns:
+        Object name -> {shape combination: clipping body vertex count}
+    """
+    return {obj.name: check_object(obj, max_distance, margin, push_out) for obj in objects if obj.type == 'MESH'}
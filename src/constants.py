@@ -24,6 +24,13 @@ MODEL_GROUPS = {
     'GENITALS_BPF': 'genitals_bpf',
 }
 
+# Registry sections that aren't model groups start with an underscore
+REGISTRY_META_PREFIX = '_'
+VISIBILITY_RULES_KEY = '_visibility_rules'
+PIERCING_MAP_KEY = '_piercing_map'
+# Registry section holding the highest numbered key each group ever had, so keys are never reused
+KEY_SEQUENCE_KEY = '_key_sequence'
+
 # Shape key master names
 SHAPE_KEY_MASTERS = {
     'CHEST': 'Chest Master',
@@ -46,6 +53,13 @@ LEG_SHAPE_CATEGORIES = {
     'XL': ['xl'],
 }
 
+# Active shape key index of hand gear for each chest shape; hand gear only has four shape categories
+HAND_GEAR_SHAPE_INDICES = {
+    'tbse': 0, 'slim': 1, 'w': 1, 'sbtl': 1, 'sbtlslimmer': 1,
+    'twink': 2, 'twunk': 2, 'hunk': 2, 'offtwunk': 2, 'offhunk': 2,
+    'chonk': 3, 'chonk1': 3, 'cub': 3, 'xl': 3
+}
+
 # Body part shapes that require specific model variants
 SHAPE_SPECIFIC_MODELS = {
     'w': MODEL_GROUPS['BODY_CHEST_W'],
@@ -62,6 +76,50 @@ GEAR_PROPERTIES = {
     'feet': 'show_feet_gear',
 }
 
+# Registry group holding the gear of each gear list
+GEAR_LIST_GROUPS = {
+    'chest': MODEL_GROUPS['GEAR_CHEST'],
+    'leg': MODEL_GROUPS['GEAR_LEGS'],
+    'hand': MODEL_GROUPS['GEAR_HANDS'],
+    'feet': MODEL_GROUPS['GEAR_FEET'],
+}
+
+# Shape key master each gear group follows; hand gear uses the chest master, feet gear the leg master
+GEAR_SHAPE_MASTERS = {
+    MODEL_GROUPS['GEAR_CHEST']: SHAPE_KEY_MASTERS['CHEST'],
+    MODEL_GROUPS['GEAR_HANDS']: SHAPE_KEY_MASTERS['CHEST'],
+    MODEL_GROUPS['GEAR_LEGS']: SHAPE_KEY_MASTERS['LEG'],
+    MODEL_GROUPS['GEAR_FEET']: SHAPE_KEY_MASTERS['LEG'],
+}
+
+# Body groups whose shape keys gear is fitted against, per gear group: the body part the gear covers
+FIT_SOURCE_GROUPS = {
+    MODEL_GROUPS['GEAR_CHEST']: [MODEL_GROUPS['BODY_CHEST']],
+    MODEL_GROUPS['GEAR_HANDS']: [MODEL_GROUPS['BODY_HANDS']],
+    MODEL_GROUPS['GEAR_LEGS']: [MODEL_GROUPS['BODY_LEGS']],
+    MODEL_GROUPS['GEAR_FEET']: [MODEL_GROUPS['BODY_FEET']],
+}
+
+# Body groups gear takes its bone weights from, per gear group; untagged gear uses all of them
+WEIGHT_SOURCE_GROUPS = {
+    MODEL_GROUPS['GEAR_CHEST']: [MODEL_GROUPS['BODY_NECK'], MODEL_GROUPS['BODY_CHEST']],
+    MODEL_GROUPS['GEAR_HANDS']: [MODEL_GROUPS['BODY_HANDS']],
+    MODEL_GROUPS['GEAR_LEGS']: [MODEL_GROUPS['BODY_LEGS']],
+    MODEL_GROUPS['GEAR_FEET']: [MODEL_GROUPS['BODY_FEET']],
+}
+
+# Body groups tested for clipping through gear, per gear group: the body part the gear covers,
+# plus the neck for chest gear since collars sit against it
+CLIP_SOURCE_GROUPS = {
+    MODEL_GROUPS['GEAR_CHEST']: [MODEL_GROUPS['BODY_NECK'], MODEL_GROUPS['BODY_CHEST']],
+    MODEL_GROUPS['GEAR_HANDS']: [MODEL_GROUPS['BODY_HANDS']],
+    MODEL_GROUPS['GEAR_LEGS']: [MODEL_GROUPS['BODY_LEGS']],
+    MODEL_GROUPS['GEAR_FEET']: [MODEL_GROUPS['BODY_FEET']],
+}
+
+# Bone influences FFXIV keeps per vertex
+MAX_BONE_INFLUENCES = 4
+
 # Bone layer groups for organized bone management
 BONE_LAYERS = {
     'BASE': ('show_base_bones', 0),
@@ -86,14 +144,8 @@ SKELETON_OBJECTS = {
     'ARMATURE': 'Skeleton'
 }
 
-# Special model indices for complex logic
-SPECIAL_INDICES = {
-    'CHONK_NSFW_INDEX': 3,  # Index for chonk NSFW model in body_legs_chonk
-    'AMAB_BUTT_INDEX': 0,   # Index for AMAB butt in body_genitals
-    'AFAB_BUTT_INDEX': 1,   # Index for AFAB butt in body_genitals
-    'BBWVR_INDEX': 0,       # Index for BBWVR AFAB model
-    'BIBO_INDEX': 1,        # Index for Bibo AFAB model
-}
+# Parent collection of the per-group collections used by collection visibility mode
+MODEL_COLLECTION_NAME = 'TBSE Models'
 
 # Error messages for consistent logging
 ERROR_MESSAGES = {
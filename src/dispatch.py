@@ -0,0 +1,192 @@
+# Update dispatch for TBSE Body Kit addon
+# Property update callbacks go through here. Every user change and every bulk change (reset to default,
+# presets, scripts) is one event: callbacks are queued, run at most once each in dependency order,
+# and the event ends with a single visibility resolve. In deferred mode user changes only queue,
+# and a timer runs one event once changes stop coming in
+import bpy
+import functools
+import time
+from contextlib import contextmanager
+from bpy.app.handlers import persistent
+from .visibility import resolve_visibility
+
+# Callback stages, run in this order: forced property values first, then shape keys, then visibility
+STAGE_PROPERTIES = 0
+STAGE_SHAPES = 1
+STAGE_VISIBILITY = 2
+
+# Queued callbacks run again if they queue more, this bounds cascades that never settle
+MAX_FLUSH_PASSES = 8
+
+# Event state: nesting depth, queued callbacks (callback -> (stage, owner, data path)), whether visibility
+# is dirty, whether a user edit started the event (only those are history steps) and, in deferred
+# mode, when the queued callbacks are due
+_dispatch = {
+    'depth': 0,
+    'pending': {},
+    'visibility': False,
+    'user_edit': False,
+    'due': 0.0,
+}
+
+
+def deferrable(func=None, *, stage: int = STAGE_VISIBILITY):
+    """
+    Decorator for property update callbacks.
+
+    A call outside an event starts one, so the callback and everything it
+    triggers (property writes that fire other callbacks, callbacks calling each
+    other) run through the queue instead of recursing. Inside an event the call
+    is only queued, once per callback no matter how often it is triggered.
+
+    Args:
+        func: The update callback
+        stage: When the callback runs relative to the others queued in the same event
+    """
+    if func is None:
+        return functools.partial(deferrable, stage=stage)
+
+    @functools.wraps(func)
+    def wrapper(self, context):
+        if _dispatch['depth']:
+            _dispatch['pending'].setdefault(func, (stage, self, None))
+            return None
+        # A callback outside an event is a property edited in the UI (or a script's single write)
+        _dispatch['user_edit'] = True
+        settings = context.scene.tbse_kit_settings
+        if settings.use_deferred_updates:
+            _dispatch['pending'].setdefault(func, (stage, *_owner_ref(self)))
+            _schedule_deferred(settings.deferred_update_delay)
+            return None
+        with bulk_update(context):
+            _dispatch['pending'].setdefault(func, (stage, self, None))
+        return None
+    return wrapper
+
+
+def _owner_ref(owner):
+    # Owners held across the timer delay are kept as (ID, data path), a gear list item
+    # can be removed before the flush and its Python object must not be touched then
+    try:
+        return owner.id_data, owner.path_from_id()
+    except (AttributeError, ValueError):
+        return owner, None
+
+
+def _resolve_owner(owner, path):
+    # Looks a deferred owner up again, None if its ID or the item itself is gone
+    if path is None:
+        return owner
+    try:
+        return owner.path_resolve(path) if path else owner
+    except (ReferenceError, ValueError):
+        return None
+
+
+def _schedule_deferred(delay: float) -> None:
+    # Every change pushes the deadline back, so scrubbing through values flushes once at the end
+    _dispatch['due'] = time.monotonic() + delay
+    if not bpy.app.timers.is_registered(_flush_deferred):
+        bpy.app.timers.register(_flush_deferred, first_interval=delay)
+
+
+def _flush_deferred():
+    remaining = _dispatch['due'] - time.monotonic()
+    if remaining > 0:
+        return remaining
+    if _dispatch['pending']:
+        with bulk_update(bpy.context):
+            pass
+    return None
+
+
+def request_visibility(context) -> int:
+    """
+    Resolve visibility now, or once when the active bulk update ends.
+
+    Returns:
+        Number of objects whose visibility changed (0 when deferred)
+    """
+    if _dispatch['depth']:
+        _dispatch['visibility'] = True
+        return 0
+    return resolve_visibility(context)
+
+
+def flush_updates(context) -> None:
+    """Run the queued callbacks once each in stage order, then resolve visibility once if anything asked for it."""
+    # Depth stays raised so property writes and visibility requests made by the callbacks queue too
+    _dispatch['depth'] += 1
+    try:
+        for _ in range(MAX_FLUSH_PASSES):
+            pending = _dispatch['pending']
+            if not pending:
+                break
+            _dispatch['pending'] = {}
+            # A callback queued again by a later stage runs in the next pass, after this one settles
+            for func, (stage, owner, path) in sorted(pending.items(), key=lambda item: item[1][0]):
+                owner = _resolve_owner(owner, path)
+                if owner is not None:
+                    func(owner, context)
+        else:
+            print(f"Warning: Update callbacks still pending after {MAX_FLUSH_PASSES} passes, dropping them.")
+            _dispatch['pending'] = {}
+    finally:
+        _dispatch['depth'] -= 1
+
+    if _dispatch['visibility']:
+        _dispatch['visibility'] = False
+        resolve_visibility(context)
+
+    # Every event ends in one state-history record, a step only if a user edit started it
+    from .history import record_state  # Import here to avoid circular imports
+    user_edit = _dispatch['user_edit']
+    _dispatch['user_edit'] = False
+    record_state(context.scene, push=user_edit)
+
+
+@contextmanager
+def bulk_update(context):
+    """
+    Run the block as one event, deferring property update callbacks until it exits.
+
+    Usage:
+        with bulk_update(context):
+            props.chest_shape = 'slim'
+            props.show_nsfw = True
+        # chest_driver and nsfwToggle ran once, followed by one visibility resolve
+
+    Nested blocks flush when the outermost one exits.
+    """
+    _dispatch['depth'] += 1
+    try:
+        yield
+    finally:
+        _dispatch['depth'] -= 1
+        if not _dispatch['depth']:
+            flush_updates(context)
+
+
+def cancel_deferred() -> None:
+    """Drop queued callbacks and the deferred flush timer."""
+    if bpy.app.timers.is_registered(_flush_deferred):
+        bpy.app.timers.unregister(_flush_deferred)
+    _dispatch['pending'] = {}
+    _dispatch['visibility'] = False
+    _dispatch['user_edit'] = False
+
+
+@persistent
+def _dispatch_load_pre(*args):
+    # Queued owners belong to the file being closed
+    cancel_deferred()
+
+
+def register():
+    bpy.app.handlers.load_pre.append(_dispatch_load_pre)
+
+
+def unregister():
+    if _dispatch_load_pre in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.remove(_dispatch_load_pre)
+    cancel_deferred()
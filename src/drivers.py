@@ -1,104 +1,122 @@
 # Driver functions for TBSE Body Kit addon.
 # This module contains driver logic for chest and leg shape keys, as well as genital shape changes.
-import bpy
-from .constants import SHAPE_KEY_MASTERS, CHEST_SHAPE_CATEGORIES, LEG_SHAPE_CATEGORIES, MODEL_GROUPS
-from .utils import (
-    reset_shape_keys, set_shape_key_value, 
-    set_active_shape_key_for_objects
-)
-from .json_helpers import getTextBlock, getModelsInList
+from .constants import SHAPE_KEY_MASTERS, MODEL_GROUPS, HAND_GEAR_SHAPE_INDICES
+from .utils import reset_shape_keys, apply_shape_plan, switch_shape_key
+from .registry import get_registry
+from .object_tags import get_group_objects, get_handle_tables
+from .gear_shapes import push_gear_shapes, push_mode_enabled
+from .dispatch import deferrable, STAGE_SHAPES
+
+# Shape plans: per shape, the (object, active shape key index) pairs a switch applies.
+# Valid for one registry version and one set of handle tables, rebuilt when either changes.
+_plans = {
+    'key': None,
+    'chest': {},
+    'leg': {},
+}
+
+# Enum identifier -> index per shape property, RNA enums don't change at runtime
+_enum_indices = {}
+
+
+def _enum_index(tbse_properties, prop: str) -> int:
+    indices = _enum_indices.get(prop)
+    if indices is None:
+        items = tbse_properties.bl_rna.properties[prop].enum_items
+        indices = _enum_indices[prop] = {item.identifier: i for i, item in enumerate(items)}
+    return indices.get(getattr(tbse_properties, prop), 0)
+
+
+def _get_plans(kind: str) -> dict:
+    # Drop every plan when the registry was mutated or reloaded, or the handle tables were rebuilt
+    registry = get_registry()
+    handles = get_handle_tables()
+    key = _plans['key']
+    if key is None or key[0] is not registry or key[1] != registry.version or key[2] is not handles:
+        _plans['key'] = (registry, registry.version, handles)
+        _plans['chest'] = {}
+        _plans['leg'] = {}
+    return _plans[kind]
+
+
+def _chest_plan(shape: str, index: int) -> tuple:
+    plans = _get_plans('chest')
+    plan = plans.get(shape)
+    if plan is None:
+        # Hand gear only has four shape categories
+        hand_index = HAND_GEAR_SHAPE_INDICES.get(shape, 0)
+        chest_models = get_group_objects(MODEL_GROUPS['BODY_CHEST']) + get_group_objects(MODEL_GROUPS['GEAR_CHEST'])
+        plan = plans[shape] = (
+            tuple((obj, index) for obj in chest_models)
+            + tuple((obj, hand_index) for obj in get_group_objects(MODEL_GROUPS['GEAR_HANDS']))
+        )
+    return plan
+
+
+def _leg_plan(shape: str, index: int) -> tuple:
+    plans = _get_plans('leg')
+    plan = plans.get(shape)
+    if plan is None:
+        leg_models = (
+            get_group_objects(MODEL_GROUPS['BODY_LEGS'])
+            + get_group_objects(MODEL_GROUPS['GEAR_LEGS'])
+            + get_group_objects(MODEL_GROUPS['GEAR_FEET'])
+        )
+        plan = plans[shape] = tuple((obj, index) for obj in leg_models)
+    return plan
+
 
 def chest_resetDrivers():
     # Reset all chest shape keys back to TBSE (Basis).
     return reset_shape_keys(SHAPE_KEY_MASTERS['CHEST'])
 
 
+@deferrable(stage=STAGE_SHAPES)
 def chest_driver(self, context):
     # Driver logic for chest shape keys.
     tbse_properties = context.scene.tbse_kit_properties
     
-    # Reset shape before changing to another shape
-    chest_resetDrivers()
-    index = 0
-    
-    if tbse_properties.chest_shape != 'tbse':
-        # Get index from enum items
-        chest_type = tbse_properties.bl_rna.properties.get('chest_shape')
-        index = chest_type.enum_items.find(tbse_properties.chest_shape)
-        
-        # Set the shape key value
-        if not set_shape_key_value(SHAPE_KEY_MASTERS['CHEST'], index):
-            return False
+    # Switch the master to the new shape, only the old and new key blocks change
+    index = _enum_index(tbse_properties, 'chest_shape')
+    if not switch_shape_key(SHAPE_KEY_MASTERS['CHEST'], index) and index:
+        return False
     
     # Trigger chest model visibility toggle
     from .toggles import chestToggle  # Import here to avoid circular imports
     chestToggle(self, context)
 
-    # Get model lists
-    model_dict = getTextBlock()
-    chest_models = getModelsInList(model_dict, MODEL_GROUPS['BODY_CHEST'])
-    gear_chest_models = getModelsInList(model_dict, MODEL_GROUPS['GEAR_CHEST'])
-    gear_hands_models = getModelsInList(model_dict, MODEL_GROUPS['GEAR_HANDS'])
-    
-    # Combine all model lists
-    all_models = chest_models + gear_chest_models + gear_hands_models
-    
     # Set active shape key for all objects with chest shape keys
-    chest_shape = tbse_properties.chest_shape
-    for obj_name in all_models:
-        if obj_name in bpy.data.objects:
-            shape_index = index
-            
-            # Special handling for hands gear - use simpler mapping
-            if obj_name in gear_hands_models:
-                shape_categories = {
-                    'tbse': 0, 'slim': 1, 'w': 1, 'sbtl': 1, 'sbtlslimmer': 1,
-                    'twink': 2, 'twunk': 2, 'hunk': 2, 'offtwunk': 2, 'offhunk': 2,
-                    'chonk': 3, 'chonk1': 3, 'cub': 3, 'xl': 3
-                }
-                shape_index = shape_categories.get(chest_shape, 0)
-            
-            set_active_shape_key_for_objects([obj_name], shape_index)
+    apply_shape_plan(_chest_plan(tbse_properties.chest_shape, index))
+
+    # Without drivers, gear takes the new master values directly
+    if push_mode_enabled(context.scene):
+        push_gear_shapes(SHAPE_KEY_MASTERS['CHEST'])
 
 def leg_resetDrivers():
     # Reset all leg shape keys back to TBSE (Basis).
     return reset_shape_keys(SHAPE_KEY_MASTERS['LEG'])
 
 
+@deferrable(stage=STAGE_SHAPES)
 def leg_driver(self, context):
     # Driver logic for leg shape keys.
     tbse_properties = context.scene.tbse_kit_properties
 
-    # Reset shape before changing to another shape
-    leg_resetDrivers()
-    index = 0
-    
-    if tbse_properties.leg_shape != 'tbse':
-        # Get index from enum items
-        leg_type = tbse_properties.bl_rna.properties.get('leg_shape')
-        index = leg_type.enum_items.find(tbse_properties.leg_shape)
-        
-        # Set the shape key value
-        if not set_shape_key_value(SHAPE_KEY_MASTERS['LEG'], index):
-            return False
+    # Switch the master to the new shape, only the old and new key blocks change
+    index = _enum_index(tbse_properties, 'leg_shape')
+    if not switch_shape_key(SHAPE_KEY_MASTERS['LEG'], index) and index:
+        return False
     
     # Trigger leg model visibility toggle
     from .toggles import legToggle  # Import here to avoid circular imports
     legToggle(self, context)
 
-    # Get model lists
-    model_dict = getTextBlock()
-    leg_models = getModelsInList(model_dict, MODEL_GROUPS['BODY_LEGS'])
-    gear_legs_models = getModelsInList(model_dict, MODEL_GROUPS['GEAR_LEGS'])
-    gear_feet_models = getModelsInList(model_dict, MODEL_GROUPS['GEAR_FEET'])
-    
-    # Combine all model lists
-    all_models = leg_models + gear_legs_models + gear_feet_models
-
     # Set active shape key for all objects with leg shape keys
-    for obj_name in all_models:
-        if obj_name in bpy.data.objects:
-            set_active_shape_key_for_objects([obj_name], index)
+    apply_shape_plan(_leg_plan(tbse_properties.leg_shape, index))
+
+    # Without drivers, gear takes the new master values directly
+    if push_mode_enabled(context.scene):
+        push_gear_shapes(SHAPE_KEY_MASTERS['LEG'])
 
 def afab_ResetDrivers():
     # Reset all AFAB shape keys back to Gen A (Basis).
@@ -108,17 +126,9 @@ def afab_ResetDrivers():
 def afab_driver(self, context):
     # Driver logic for AFAB genital shape changes.
     tbse_properties = context.scene.tbse_kit_properties
-    
-    # Reset shape before changing to another shape
-    afab_ResetDrivers()
-    
-    if tbse_properties.afab_type != 'a':
-        # Get index from enum items
-        afab_shape = tbse_properties.bl_rna.properties.get('afab_type')
-        index = afab_shape.enum_items.find(tbse_properties.afab_type)
-        return set_shape_key_value(SHAPE_KEY_MASTERS['AFAB'], index)
-    
-    return True
+
+    # Switch the master to the new type, only the old and new key blocks change
+    return switch_shape_key(SHAPE_KEY_MASTERS['AFAB'], _enum_index(tbse_properties, 'afab_type'))
 
 
 def amab_ResetDrivers():
@@ -131,13 +141,5 @@ def amab_driver(self, context):
     # Driver logic for AMAB genital shape changes.
     tbse_properties = context.scene.tbse_kit_properties
 
-    # Reset shape before changing to another shape
-    amab_ResetDrivers()
-
-    if tbse_properties.amab_type != 'a':
-        # Get index from enum items
-        amab_shape = tbse_properties.bl_rna.properties.get('amab_type')
-        index = amab_shape.enum_items.find(tbse_properties.amab_type)
-        return set_shape_key_value(SHAPE_KEY_MASTERS['AMAB'], index)
-    
-    return True
+    # Switch the master to the new type, only the old and new key blocks change
+    return switch_shape_key(SHAPE_KEY_MASTERS['AMAB'], _enum_index(tbse_properties, 'amab_type'))
@@ -0,0 +1,124 @@
+# Gear shape fitting for TBSE Body Kit addon
+# Fills gear shape keys from the body: every gear vertex takes the inverse-distance weighted
+# shape key deltas of its nearest body vertices (TBSE basis), faded out with distance from the body.
+# Vertex data moves through foreach_get/foreach_set and NumPy, the only per-vertex Python
+# work is the KD-tree query. Body arrays and trees come from the spatial cache.
+import bpy
+import numpy as np
+from mathutils.kdtree import KDTree
+from typing import Dict, List, Tuple
+from .constants import FIT_SOURCE_GROUPS
+from .object_tags import get_group_objects, get_object_tag
+from .spatial_cache import get_spatial_entry, read_coordinates, to_world
+
+# Body vertices blended per gear vertex
+DEFAULT_NEIGHBOURS = 4
+
+
+def nearest_neighbours(tree: KDTree, points: np.ndarray, count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Query the nearest tree points of every point.
+
+    Returns:
+        (indices (m, count), distances (m, count)); short results repeat the last hit
+    """
+    # One padded row of (index, distance) pairs per point, converted in a single assignment
+    rows = []
+    for point in points:
+        hits = [(index, distance) for _, index, distance in tree.find_n(point, count)]
+        rows.append(hits + hits[-1:] * (count - len(hits)))
+    pairs = np.array(rows, dtype=np.float64).reshape(len(points), count, 2)
+    return pairs[:, :, 0].astype(np.int64), pairs[:, :, 1].astype(np.float32)
+
+
+def blend_weights(distances: np.ndarray, falloff: float) -> np.ndarray:
+    """
+    Inverse-distance weights per neighbour, scaled down for vertices far from the body.
+
+    Args:
+        distances: (m, k) neighbour distances
+        falloff: Distance at which a gear vertex no longer follows the body; 0 disables the fade
+
+    Returns:
+        (m, k) weights, each row summing to the vertex's falloff factor
+    """
+    inverse = 1.0 / np.maximum(distances, 1e-6)
+    weights = inverse / inverse.sum(axis=1, keepdims=True)
+    if falloff > 0:
+        fade = np.clip(1.0 - distances[:, :1] / falloff, 0.0, 1.0)
+        weights *= fade
+    return weights
+
+
+def fit_object(obj, body_basis: np.ndarray, body_deltas: Dict[str, np.ndarray], tree: KDTree,
+               neighbours: int = DEFAULT_NEIGHBOURS, falloff: float = 0.0) -> int:
+    """
+    Write fitted shape keys into a gear object.
+
+    Every gear key block that has a body shape of the same name is overwritten with
+    the gear basis plus the blended body deltas.
+
+    Args:
+        obj: Gear mesh object with shape keys
+        body_basis: Body basis positions in world space
+        body_deltas: Body shape key name -> world space deltas
+        tree: KD-tree over body_basis
+        neighbours: Body vertices blended per gear vertex
+        falloff: Distance at which gear stops following the body, 0 to always follow
+
+    Returns:
+        Number of shape keys written
+    """
+    shape_keys = obj.data.shape_keys if obj.type == 'MESH' else None
+    if shape_keys is None or not len(body_basis):
+        return 0
+    names = [key.name for key in shape_keys.key_blocks if key != shape_keys.reference_key and key.name in body_deltas]
+    if not names:
+        return 0
+
+    count = len(obj.data.vertices)
+    basis = read_coordinates(shape_keys.reference_key.data, count)
+    indices, distances = nearest_neighbours(tree, to_world(obj.matrix_world, basis), min(neighbours, len(body_basis)))
+    weights = blend_weights(distances, falloff)[:, :, None]
+
+    # Deltas come back in gear local space
+    to_local = np.linalg.inv(np.array(obj.matrix_world, dtype=np.float32)[:3, :3]).T
+    for name in names:
+        world_deltas = (body_deltas[name][indices] * weights).sum(axis=1)
+        coords = basis + world_deltas @ to_local
+        shape_keys.key_blocks[name].data.foreach_set('co', coords.astype(np.float32).ravel())
+    obj.data.update()
+    return len(names)
+
+
+def fit_source_objects(obj) -> List[bpy.types.Object]:
+    """Get the body objects a gear object is fitted against, the body part its gear group covers."""
+    tag = get_object_tag(obj)
+    objects = []
+    for group in FIT_SOURCE_GROUPS.get(tag[0], ()) if tag else ():
+        objects.extend(get_group_objects(group))
+    return objects
+
+
+def fit_gear_objects(objects, neighbours: int = DEFAULT_NEIGHBOURS, falloff: float = 0.0) -> Dict[str, int]:
+    """
+    Fit the shape keys of several gear objects, sharing body data between pieces of the same kind.
+
+    Returns:
+        Object name -> number of shape keys written
+    """
+    sources = {}
+    results = {}
+    for obj in objects:
+        body_objects = fit_source_objects(obj)
+        if not body_objects:
+            print(f"Warning: No body meshes to fit '{obj.name}' against, is it registered gear?")
+            results[obj.name] = 0
+            continue
+        source_key = tuple(body.name for body in body_objects)
+        if source_key not in sources:
+            sources[source_key] = get_spatial_entry(body_objects)
+        entry = sources[source_key]
+        tree = entry.kdtree() if len(entry.basis) else None
+        results[obj.name] = fit_object(obj, entry.basis, entry.deltas, tree, neighbours, falloff) if tree else 0
+    return results
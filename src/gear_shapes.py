@@ -0,0 +1,250 @@
+# Gear shape propagation for TBSE Body Kit addon
+# Gear shape keys follow the Chest/Leg masters either through one driver per key ("DRIVERS" mode) or,
+# in "PUSH" mode, by the shape drivers writing the master values straight into each gear Key with
+# a single foreach_set, so no per-key drivers are evaluated on depsgraph updates.
+import bpy
+from .constants import GEAR_SHAPE_MASTERS
+from .object_tags import get_group_objects
+
+GEAR_SHAPE_MODES = [
+    ('DRIVERS', "Drivers", "Gear shape keys are driven from the master shape keys"),
+    ('PUSH',    "Push",    "Gear shape keys are written when the shape changes, without drivers"),
+]
+
+
+def read_master_values(master) -> dict:
+    """Read every key block value of a master with one foreach_get, as name -> value."""
+    values = [0.0] * len(master.key_blocks)
+    master.key_blocks.foreach_get('value', values)
+    return {key.name: value for key, value in zip(master.key_blocks, values)}
+
+
+def push_shapes_to_object(obj, master_values: dict) -> bool:
+    """
+    Write master shape key values into one gear object's Key in a single foreach_set.
+
+    Gear key blocks the master doesn't have keep their value.
+
+    Args:
+        obj: Gear object
+        master_values: Master key block name -> value
+
+    Returns:
+        True if any value was written
+    """
+    shape_keys = obj.data.shape_keys if obj.type == 'MESH' else None
+    if shape_keys is None:
+        return False
+    key_blocks = shape_keys.key_blocks
+    values = [0.0] * len(key_blocks)
+    key_blocks.foreach_get('value', values)
+    pushed = [master_values.get(key.name, value) for key, value in zip(key_blocks, values)]
+    if pushed == values:
+        return False
+    key_blocks.foreach_set('value', pushed)
+    # foreach_set bypasses the RNA update, tag the Key so the mesh re-evaluates
+    shape_keys.update_tag()
+    return True
+
+
+def push_gear_shapes(master_name: str) -> int:
+    """
+    Push a master's shape key values into every gear group that follows it.
+
+    Args:
+        master_name: Name of the shape key master
+
+    Returns:
+        Number of gear objects written
+    """
+    master = bpy.data.shape_keys.get(master_name)
+    if master is None:
+        return 0
+    master_values = read_master_values(master)
+    pushed = 0
+    for group, group_master in GEAR_SHAPE_MASTERS.items():
+        if group_master != master_name:
+            continue
+        for obj in get_group_objects(group):
+            try:
+                if push_shapes_to_object(obj, master_values):
+                    pushed += 1
+            except (ReferenceError, AttributeError) as e:
+                print(f"Warning: Could not push shape keys: {e}")
+    return pushed
+
+
+def push_mode_enabled(scene) -> bool:
+    """Check whether gear shape keys are pushed instead of driven."""
+    return scene.tbse_kit_settings.gear_shape_mode == 'PUSH'
+
+
+def remove_master_drivers(obj, master) -> int:
+    """
+    Remove the drivers of a gear object's shape keys that read from a master.
+
+    Args:
+        obj: Gear object
+        master: Master Key datablock
+
+    Returns:
+        Number of drivers removed
+    """
+    shape_keys = obj.data.shape_keys
+    if shape_keys is None or shape_keys.animation_data is None:
+        return 0
+    stale = []
+    for fcurve in shape_keys.animation_data.drivers:
+        if any(target.id == master for var in fcurve.driver.variables for target in var.targets):
+            stale.append(fcurve.data_path)
+    for data_path in stale:
+        shape_keys.driver_remove(data_path)
+    return len(stale)
+
+
+def convert_gear_shape_mode(scene, mode: str) -> int:
+    """
+    Migrate every registered gear object to a gear shape mode.
+
+    PUSH removes the master drivers and pushes the current master values once.
+    DRIVERS adds a driver per shape key again, as gear add does.
+
+    Args:
+        scene: Scene whose settings record the mode
+        mode: 'DRIVERS' or 'PUSH'
+
+    Returns:
+        Number of gear objects converted
+    """
+    from .operators import add_drivers  # Import here to avoid circular imports
+
+    converted = 0
+    master_values = {}
+    for group, master_name in GEAR_SHAPE_MASTERS.items():
+        master = bpy.data.shape_keys.get(master_name)
+        if master is None:
+            print(f"Warning: Master shape key '{master_name}' not found, skipping {group}")
+            continue
+        if mode == 'PUSH' and master_name not in master_values:
+            master_values[master_name] = read_master_values(master)
+        for obj in get_group_objects(group):
+            if obj.type != 'MESH' or obj.data.shape_keys is None:
+                continue
+            if mode == 'PUSH':
+                remove_master_drivers(obj, master)
+                push_shapes_to_object(obj, master_values[master_name])
+            else:
+                for key in master.key_blocks:
+                    if key.name != 'TBSE' and obj.data.shape_keys.key_blocks.get(key.name):
+                        add_drivers(obj, key, master)
+            converted += 1
+
+    scene.tbse_kit_settings.gear_shape_mode = mode
+    return converted
+
+
+def _driven_key_name(data_path: str):
+    # 'key_blocks["Slim"].value' -> 'Slim'
+    prefix, suffix = 'key_blocks["', '"].value'
+    if data_path.startswith(prefix) and data_path.endswith(suffix):
+        return data_path[len(prefix):-len(suffix)]
+    return None
+
+
+def _is_master_driver(driver) -> bool:
+    # Kit drivers read a master Key. One whose target ID is gone only counts if it still has the
+    # single 'value' variable add_drivers creates, any other driver is user-authored and left alone
+    masters = set(GEAR_SHAPE_MASTERS.values())
+    targets = [target for var in driver.variables for target in var.targets]
+    if any(target.id is not None and target.id_type == 'KEY' and target.id.name in masters for target in targets):
+        return True
+    return (len(driver.variables) == 1 and driver.variables[0].name == 'value'
+            and all(target.id is None and target.id_type == 'KEY' for target in targets))
+
+
+def audit_gear_drivers(scene) -> list:
+    """
+    Scan the shape key drivers of every registered gear object in one pass.
+
+    Only drivers reading a master (see _is_master_driver) are checked, other drivers on gear
+    keys, such as correctives, are never reported. Issues found:
+        broken: the driver is invalid, doesn't have exactly one variable, or reads a missing
+            ID or master key block
+        mistargeted: the driver reads another master or another key block than the one it drives
+        redundant: the driver drives the TBSE basis or a missing key block, or exists at all in push mode
+        missing: a gear key block the master has isn't driven (drivers mode only)
+
+    Args:
+        scene: Scene whose settings give the gear shape mode
+
+    Returns:
+        List of (object name, key block name, issue) tuples
+    """
+    push = push_mode_enabled(scene)
+    issues = []
+    for group, master_name in GEAR_SHAPE_MASTERS.items():
+        master = bpy.data.shape_keys.get(master_name)
+        for obj in get_group_objects(group):
+            shape_keys = obj.data.shape_keys if obj.type == 'MESH' else None
+            if shape_keys is None:
+                continue
+            driven = set()
+            drivers = shape_keys.animation_data.drivers if shape_keys.animation_data else ()
+            for fcurve in drivers:
+                key_name = _driven_key_name(fcurve.data_path)
+                if key_name is None:
+                    continue
+                driven.add(key_name)
+                driver = fcurve.driver
+                if not _is_master_driver(driver):
+                    continue
+                targets = [target for var in driver.variables for target in var.targets]
+                if push or key_name == 'TBSE' or not shape_keys.key_blocks.get(key_name):
+                    issue = 'redundant'
+                elif (not driver.is_valid or master is None or len(driver.variables) != 1
+                        or any(target.id is None for target in targets) or not master.key_blocks.get(key_name)):
+                    issue = 'broken'
+                elif any(target.id != master or _driven_key_name(target.data_path) != key_name for target in targets):
+                    issue = 'mistargeted'
+                else:
+                    continue
+                issues.append((obj.name, key_name, issue))
+
+            if not push and master is not None:
+                for key in master.key_blocks:
+                    if key.name != 'TBSE' and key.name not in driven and shape_keys.key_blocks.get(key.name):
+                        issues.append((obj.name, key.name, 'missing'))
+    return issues
+
+
+def rebuild_gear_drivers(scene, issues: list) -> int:
+    """
+    Fix the issues found by audit_gear_drivers.
+
+    Redundant drivers are removed; broken, mistargeted and missing ones are
+    recreated from the master (a driver whose master key block is gone is removed).
+
+    Returns:
+        Number of drivers fixed
+    """
+    from .operators import add_drivers  # Import here to avoid circular imports
+
+    masters = {group: bpy.data.shape_keys.get(master_name) for group, master_name in GEAR_SHAPE_MASTERS.items()}
+    objects = {}
+    for group in GEAR_SHAPE_MASTERS:
+        for obj in get_group_objects(group):
+            objects[obj.name] = (obj, masters[group])
+
+    fixed = 0
+    for obj_name, key_name, issue in issues:
+        obj, master = objects.get(obj_name, (None, None))
+        if obj is None:
+            continue
+        shape_keys = obj.data.shape_keys
+        if issue != 'missing':
+            shape_keys.driver_remove(f'key_blocks["{key_name}"].value')
+        master_key = master.key_blocks.get(key_name) if master else None
+        if issue != 'redundant' and master_key is not None:
+            add_drivers(obj, master_key, master)
+        fixed += 1
+    return fixed
@@ -0,0 +1,131 @@
+# State history for TBSE Body Kit addon
+# Keeps its own undo/redo stacks of small body kit state records (see looks.capture_state), so toggling
+# and shape switching can be stepped back without Blender's global undo snapshotting mesh data.
+# Only user edits of kit properties (immediate or deferred) push a step; bulk applies from looks,
+# loadouts and scripts only move the baseline and are undone with Ctrl+Z. Blender's global undo still
+# records property edits as usual, this is a separate kit-only step list, not a replacement for it.
+# Undo and redo re-apply records through the normal bulk update path.
+import bpy
+from bpy.app.handlers import persistent
+from typing import Optional
+from .looks import capture_state, apply_state
+
+# Records kept per stack, older ones are dropped
+MAX_HISTORY = 64
+
+# Undo/redo stacks of state records, the state the last event ended in, and whether a record is being applied
+_history = {
+    'undo': [],
+    'redo': [],
+    'current': None,
+    'restoring': False,
+}
+
+
+def record_state(scene, push: bool = True) -> bool:
+    """
+    Record the state of a scene if it differs from the last recorded one.
+
+    Called by the dispatcher at the end of every event.
+
+    Args:
+        scene: Scene to capture
+        push: Make the previous state an undo step; False only moves the baseline
+
+    Returns:
+        True if a new history step was pushed
+    """
+    if _history['restoring']:
+        return False
+    state = capture_state(scene)
+    current = _history['current']
+    if state == current:
+        return False
+    _history['current'] = state
+    if current is None or not push:
+        return False
+    _history['undo'].append(current)
+    del _history['undo'][:-MAX_HISTORY]
+    _history['redo'].clear()
+    return True
+
+
+def _step(context, source: str, target: str) -> Optional[int]:
+    if not _history[source]:
+        return None
+    state = _history[source].pop()
+    current = _history['current'] or capture_state(context.scene)
+    _history[target].append(current)
+    _history['restoring'] = True
+    try:
+        changed = apply_state(context, state)
+    finally:
+        _history['restoring'] = False
+    _history['current'] = capture_state(context.scene)
+    return changed
+
+
+def undo_state(context) -> Optional[int]:
+    """
+    Step back one body kit state.
+
+    Returns:
+        Number of values changed, or None if there is nothing to undo
+    """
+    return _step(context, 'undo', 'redo')
+
+
+def redo_state(context) -> Optional[int]:
+    """
+    Step forward one body kit state.
+
+    Returns:
+        Number of values changed, or None if there is nothing to redo
+    """
+    return _step(context, 'redo', 'undo')
+
+
+def clear_history() -> None:
+    """Drop all history records."""
+    _history['undo'].clear()
+    _history['redo'].clear()
+    _history['current'] = None
+
+
+def has_undo() -> bool:
+    """Check whether there is a state to undo."""
+    return bool(_history['undo'])
+
+
+def has_redo() -> bool:
+    """Check whether there is a state to redo."""
+    return bool(_history['redo'])
+
+
+def _record_baseline():
+    # The first change of a session needs the state before it to be undoable
+    scene = getattr(bpy.context, 'scene', None)
+    if scene is not None and hasattr(scene, 'tbse_kit_properties') and _history['current'] is None:
+        _history['current'] = capture_state(scene)
+    return None
+
+
+@persistent
+def _history_load_post(*args):
+    # Records belong to the file they were made in
+    clear_history()
+    _record_baseline()
+
+
+def register():
+    bpy.app.handlers.load_post.append(_history_load_post)
+    # The context is restricted while registering, take the baseline once the add-on is up
+    bpy.app.timers.register(_record_baseline, first_interval=0.1)
+
+
+def unregister():
+    if bpy.app.timers.is_registered(_record_baseline):
+        bpy.app.timers.unregister(_record_baseline)
+    if _history_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_history_load_post)
+    clear_history()
@@ -60,12 +60,24 @@ class TBSEKIT_UL_feetGear(UIList):
             layout.alignment = 'CENTER'
             layout.label(text="")
 
+class TBSEKIT_UL_gearLoadouts(UIList):
+    # UIList for saved gear loadouts.
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        if self.layout_type in {'DEFAULT','COMPACT'}:
+            row = layout.row()
+            row.prop(item, "name", text="", emboss=False)
+            row.operator("object.gear_loadout_apply", text="", icon='CHECKMARK').index = index
+        elif self.layout_type in {'GRID'}:
+            layout.alignment = 'CENTER'
+            layout.label(text="")
+
 # Registration
 classes = [
     TBSEKIT_UL_chestGear,
     TBSEKIT_UL_legGear,
     TBSEKIT_UL_handGear,
     TBSEKIT_UL_feetGear,
+    TBSEKIT_UL_gearLoadouts,
 ]
 
 def register():
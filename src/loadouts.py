@@ -0,0 +1,167 @@
+# Gear loadouts for TBSE Body Kit addon
+# A loadout stores the isEnabled flags of every gear list as a bitset, "<item count>:<hex bits>",
+# together with the gear keys of the items in capture order, so bit i belongs to the i-th saved key
+# and reordering or removing list items doesn't change what a loadout enables. Applying one writes
+# the flags as ID properties, which fires no update callbacks, and only changes the visibility of
+# the items whose flag actually changes.
+import bpy
+import json
+from typing import Dict, List, Optional
+from .constants import GEAR_PROPERTIES
+from .object_tags import get_object_tag
+from .utils import apply_visibility_diff
+
+
+def encode_bits(flags: List[bool]) -> str:
+    """
+    Encode a list of flags as "<count>:<hex>".
+
+    Args:
+        flags: One flag per gear list item
+
+    Returns:
+        The encoded bitset
+    """
+    value = 0
+    for index, flag in enumerate(flags):
+        if flag:
+            value |= 1 << index
+    return f"{len(flags)}:{value:x}"
+
+
+def decode_bits(bits: str) -> List[bool]:
+    """
+    Decode a "<count>:<hex>" bitset into a list of flags.
+
+    Returns:
+        One flag per item, empty for an empty or malformed bitset
+    """
+    count, _, value = bits.partition(':')
+    try:
+        count = int(count)
+        value = int(value or '0', 16)
+    except ValueError:
+        return []
+    return [bool(value >> index & 1) for index in range(count)]
+
+
+def _bits_prop(gear_type: str) -> str:
+    return f'{gear_type}_bits'
+
+
+def gear_item_key(item) -> Optional[str]:
+    """Get the stable identity of a gear list item: its registry key, or its object name if untagged."""
+    obj = item.obj_pointer
+    if obj is None:
+        return None
+    tag = get_object_tag(obj)
+    return tag[1] if tag else obj.name
+
+
+def capture_gear_keys(scene) -> Dict[str, List[Optional[str]]]:
+    """Get the gear keys of every gear list in list order, as gear type -> keys."""
+    return {
+        gear_type: [gear_item_key(item) for item in getattr(scene, f'{gear_type}_gear_list')]
+        for gear_type in GEAR_PROPERTIES
+    }
+
+
+def capture_loadout(scene, loadout) -> None:
+    """Store the current isEnabled flags of every gear list in a loadout."""
+    for gear_type, bits in capture_gear_bits(scene).items():
+        setattr(loadout, _bits_prop(gear_type), bits)
+    loadout.keys = json.dumps(capture_gear_keys(scene))
+
+
+def _loadout_keys(loadout) -> Optional[Dict[str, list]]:
+    # Loadouts saved before keys were stored map their bits by list position
+    try:
+        keys = json.loads(loadout.keys) if loadout.keys else None
+    except ValueError:
+        keys = None
+    return keys if isinstance(keys, dict) else None
+
+
+def apply_gear_bits(scene, bits_by_type: Dict[str, str],
+                    keys_by_type: Optional[Dict[str, list]] = None) -> Dict[bpy.types.Object, bool]:
+    """
+    Write gear isEnabled flags from bitsets without firing update callbacks.
+
+    Args:
+        scene: Scene holding the gear lists
+        bits_by_type: gear type -> "<count>:<hex>" bitset; missing types are left alone
+        keys_by_type: gear type -> gear keys the bits were captured for (see capture_gear_keys);
+            items whose key isn't among them keep their flag. Without keys, bits map by list position.
+
+    Returns:
+        Desired visibility of the objects whose flag changed
+    """
+    tbse_properties = scene.tbse_kit_properties
+    desired = {}
+    for gear_type, show_prop in GEAR_PROPERTIES.items():
+        bits = bits_by_type.get(gear_type)
+        if bits is None:
+            continue
+        gear_list = getattr(scene, f'{gear_type}_gear_list')
+        show_gear = getattr(tbse_properties, show_prop)
+        flags = decode_bits(bits)
+        keys = keys_by_type.get(gear_type) if keys_by_type else None
+        if keys is not None:
+            flag_by_key = {key: flag for key, flag in zip(keys, flags) if key is not None}
+            pairs = [(item, flag_by_key.get(gear_item_key(item))) for item in gear_list]
+        else:
+            pairs = zip(gear_list, flags)
+        for item, enabled in pairs:
+            if enabled is None or item.isEnabled == enabled:
+                continue
+            item['isEnabled'] = enabled
+            if item.obj_pointer:
+                desired[item.obj_pointer] = show_gear and enabled
+    return desired
+
+
+def capture_gear_bits(scene) -> Dict[str, str]:
+    """Get the isEnabled flags of every gear list as gear type -> bitset."""
+    return {
+        gear_type: encode_bits([item.isEnabled for item in getattr(scene, f'{gear_type}_gear_list')])
+        for gear_type in GEAR_PROPERTIES
+    }
+
+
+def apply_loadout(scene, loadout) -> int:
+    """
+    Apply a loadout to the gear lists in one pass.
+
+    Flags are written as ID properties so no per-item gearToggle runs. Items added
+    after the loadout was saved keep their state.
+
+    Args:
+        scene: Scene holding the gear lists
+        loadout: TBSEKIT_GearLoadout to apply
+
+    Returns:
+        Number of objects whose visibility changed
+    """
+    bits_by_type = {gear_type: getattr(loadout, _bits_prop(gear_type)) for gear_type in GEAR_PROPERTIES}
+    return apply_visibility_diff(apply_gear_bits(scene, bits_by_type, _loadout_keys(loadout)))
+
+
+def remove_loadout_bit(scene, gear_type: str, index: int) -> None:
+    """
+    Drop the bit of a removed gear list item from every position-mapped loadout, shifting later items down.
+
+    Loadouts that store gear keys need no update, the removed item's key simply no longer matches.
+
+    Args:
+        scene: Scene holding the loadouts
+        gear_type: Gear list the item was removed from
+        index: Position of the removed item
+    """
+    prop = _bits_prop(gear_type)
+    for loadout in scene.tbse_gear_loadouts:
+        if _loadout_keys(loadout) is not None:
+            continue
+        flags = decode_bits(getattr(loadout, prop))
+        if index < len(flags):
+            del flags[index]
+            setattr(loadout, prop, encode_bits(flags))
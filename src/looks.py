@@ -0,0 +1,172 @@
+# Look presets for TBSE Body Kit addon
+# A look is a snapshot of the whole body kit state: every kit property (shapes, toggles, genital types),
+# both piercing toggle groups and the gear isEnabled flags. Looks are stored as JSON in the .looks text
+# block so they travel with the .blend, and can be exported to / imported from a file.
+import bpy
+import json
+from typing import Dict, List, Optional
+from .dispatch import bulk_update, request_visibility
+from .loadouts import apply_gear_bits, capture_gear_bits, capture_gear_keys
+
+LOOKS_TEXT_NAME = ".looks"
+
+# Look section -> scene property group it snapshots
+STATE_GROUPS = {
+    'properties': 'tbse_kit_properties',
+    'chest_toggles': 'tbse_chest_toggles',
+    'amab_toggles': 'tbse_amab_toggles',
+}
+
+# Property types captured in a look, pointers and collections are left out
+_STATE_PROPERTY_TYPES = {'BOOLEAN', 'ENUM', 'INT', 'FLOAT', 'STRING'}
+
+
+def _capture_group(group) -> dict:
+    values = {}
+    for prop in group.bl_rna.properties:
+        if prop.identifier in ('rna_type', 'name') or prop.type not in _STATE_PROPERTY_TYPES:
+            continue
+        if getattr(prop, 'is_array', False) or prop.is_readonly:
+            continue
+        values[prop.identifier] = getattr(group, prop.identifier)
+    return values
+
+
+def capture_state(scene) -> dict:
+    """
+    Snapshot the body kit state of a scene.
+
+    Returns:
+        JSON-serializable state dictionary
+    """
+    state = {section: _capture_group(getattr(scene, attr)) for section, attr in STATE_GROUPS.items()}
+    state['gear'] = capture_gear_bits(scene)
+    state['gear_keys'] = capture_gear_keys(scene)
+    return state
+
+
+def apply_state(context, state: dict) -> int:
+    """
+    Restore a body kit state as one event.
+
+    Only values that differ from the current state are written, inside a bulk update,
+    so every affected update callback runs once and visibility resolves once. Gear
+    flags are written without callbacks. Switching between two looks therefore costs
+    time proportional to their difference.
+
+    Args:
+        context: Blender context
+        state: State dictionary from capture_state
+
+    Returns:
+        Number of values changed
+    """
+    scene = context.scene
+    changed = 0
+    with bulk_update(context):
+        for section, attr in STATE_GROUPS.items():
+            group = getattr(scene, attr)
+            for prop, value in state.get(section, {}).items():
+                if not hasattr(group, prop) or getattr(group, prop) == value:
+                    continue
+                try:
+                    setattr(group, prop, value)
+                    changed += 1
+                except (TypeError, ValueError) as e:
+                    print(f"Warning: Could not restore {attr}.{prop}: {e}")
+
+        gear_changes = apply_gear_bits(scene, state.get('gear', {}), state.get('gear_keys'))
+        if gear_changes:
+            request_visibility(context)
+            changed += len(gear_changes)
+    return changed
+
+
+def get_looks_text(create: bool = False) -> Optional[bpy.types.Text]:
+    """Get the .looks text block, optionally creating it."""
+    text = bpy.data.texts.get(LOOKS_TEXT_NAME)
+    if text is None and create:
+        text = bpy.data.texts.new(LOOKS_TEXT_NAME)
+    return text
+
+
+def load_looks() -> Dict[str, dict]:
+    """Get all stored looks as name -> state."""
+    text = get_looks_text()
+    if text is None:
+        return {}
+    try:
+        looks = json.loads(text.as_string() or '{}')
+    except ValueError as e:
+        print(f"Warning: Could not read looks: {e}")
+        return {}
+    return looks if isinstance(looks, dict) else {}
+
+
+def store_looks(looks: Dict[str, dict]) -> None:
+    """Write all looks back to the .looks text block."""
+    get_looks_text(create=True).from_string(json.dumps(looks, indent=4))
+
+
+def look_names() -> List[str]:
+    """Get the stored look names in order."""
+    return list(load_looks())
+
+
+def save_look(scene, name: str) -> None:
+    """Store the current state of a scene as a named look, replacing one with the same name."""
+    looks = load_looks()
+    looks[name] = capture_state(scene)
+    store_looks(looks)
+
+
+def apply_look(context, name: str) -> Optional[int]:
+    """
+    Apply a stored look.
+
+    Returns:
+        Number of values changed, or None if there is no such look
+    """
+    state = load_looks().get(name)
+    if state is None:
+        return None
+    return apply_state(context, state)
+
+
+def delete_look(name: str) -> bool:
+    """Delete a stored look, returning whether it existed."""
+    looks = load_looks()
+    if looks.pop(name, None) is None:
+        return False
+    store_looks(looks)
+    return True
+
+
+def export_looks(filepath: str) -> int:
+    """
+    Write every stored look to a JSON file.
+
+    Returns:
+        Number of looks written
+    """
+    looks = load_looks()
+    with open(filepath, 'w') as f:
+        json.dump(looks, f, indent=4)
+    return len(looks)
+
+
+def import_looks(filepath: str) -> int:
+    """
+    Merge the looks of a JSON file into the stored looks, replacing ones with the same name.
+
+    Returns:
+        Number of looks imported
+    """
+    with open(filepath, 'r') as f:
+        imported = json.load(f)
+    if not isinstance(imported, dict):
+        raise ValueError("looks file must contain a JSON object")
+    looks = load_looks()
+    looks.update({name: state for name, state in imported.items() if isinstance(state, dict)})
+    store_looks(looks)
+    return len(imported)
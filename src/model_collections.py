@@ -0,0 +1,110 @@
+# Collection-based visibility for TBSE Body Kit addon
+# In collection mode every registry group lives in its own child collection, so hiding a group is one
+# LayerCollection.exclude flip instead of one hide_set per object, and excluded groups drop out of
+# depsgraph evaluation entirely
+import bpy
+from typing import Dict, Optional, Set
+from .constants import MODEL_COLLECTION_NAME, GEAR_LIST_GROUPS
+from .registry import get_registry
+from .object_tags import TAG_GROUP, get_group_objects
+
+# Set on a group collection whose objects are in no other collection, so excluding it hides them
+TAG_EXCLUSIVE = "tbse_exclusive"
+
+
+def _get_root_collection(scene, create: bool = False) -> Optional[bpy.types.Collection]:
+    root = scene.collection.children.get(MODEL_COLLECTION_NAME)
+    if root is None and create:
+        root = bpy.data.collections.get(MODEL_COLLECTION_NAME) or bpy.data.collections.new(MODEL_COLLECTION_NAME)
+        scene.collection.children.link(root)
+    return root
+
+
+def setup_group_collections(scene, unlink: bool = False) -> int:
+    """
+    Link every body model group into its own child collection of the model collection.
+
+    Gear groups are left alone, gear visibility follows the gear lists per item.
+    Objects keep their other collections unless unlink is set. Excluding a group
+    collection only hides objects that are in no other collection, the others
+    keep being hidden per object.
+
+    Args:
+        scene: The scene to organize
+        unlink: Also unlink the objects from their other collections
+
+    Returns:
+        Number of objects linked
+    """
+    root = _get_root_collection(scene, create=True)
+    existing = {child.get(TAG_GROUP): child for child in root.children}
+    gear_groups = set(GEAR_LIST_GROUPS.values())
+    moved = 0
+
+    for group in get_registry().groups:
+        if group in gear_groups:
+            continue
+        objects = get_group_objects(group)
+        if not objects:
+            continue
+        collection = existing.get(group)
+        if collection is None:
+            collection = bpy.data.collections.new(group)
+            collection[TAG_GROUP] = group
+            root.children.link(collection)
+        for obj in objects:
+            if collection not in obj.users_collection:
+                collection.objects.link(obj)
+                moved += 1
+            if unlink:
+                for previous in tuple(obj.users_collection):
+                    if previous != collection:
+                        previous.objects.unlink(obj)
+        collection[TAG_EXCLUSIVE] = all(len(obj.users_collection) == 1 for obj in objects)
+    return moved
+
+
+def get_group_layer_collections(view_layer) -> Dict[str, bpy.types.LayerCollection]:
+    """
+    Get the group -> LayerCollection map of a view layer.
+
+    Returns:
+        The layer collections of the tagged group collections, empty when collection mode isn't set up
+    """
+    root = view_layer.layer_collection.children.get(MODEL_COLLECTION_NAME)
+    if root is None:
+        return {}
+    layers = {}
+    for layer in root.children:
+        group = layer.collection.get(TAG_GROUP)
+        if isinstance(group, str):
+            layers[group] = layer
+    return layers
+
+
+def apply_group_exclusion(view_layer, group_visible: Dict[str, bool]) -> Set[str]:
+    """
+    Exclude the collections of groups with nothing visible, include the rest.
+
+    Args:
+        view_layer: View layer to change
+        group_visible: group -> whether any of its members should be visible
+
+    Returns:
+        Excluded groups whose objects are in no other collection, i.e. hidden by the exclusion alone
+    """
+    excluded = set()
+    for group, layer in get_group_layer_collections(view_layer).items():
+        exclude = not group_visible.get(group, False)
+        if layer.exclude != exclude:
+            layer.exclude = exclude
+        if exclude and layer.collection.get(TAG_EXCLUSIVE, False):
+            excluded.add(group)
+    return excluded
+
+
+def include_all_groups(view_layer) -> None:
+    """Include every group collection again, used when leaving collection mode."""
+    for layer in get_group_layer_collections(view_layer).values():
+        if layer.exclude:
+            layer.exclude = False
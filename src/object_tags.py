@@ -0,0 +1,224 @@
+# Object tagging for TBSE Body Kit addon
+# Managed objects carry their registry group and key as ID custom properties, so they are
+# identified by handle instead of by name and survive renames made outside the addon.
+# The handle tables are built once and dropped on load/undo, object deletes/adds and relevant renames
+import bpy
+from bpy.app.handlers import persistent
+from typing import Dict, Optional, Tuple
+from .registry import get_registry
+
+# Custom property names stamped on every managed object
+TAG_GROUP = "tbse_group"
+TAG_KEY = "tbse_key"
+
+# group -> {key: bpy.types.Object}, rebuilt by rebuild_handle_tables().
+# object_count and object_ids (number and pointers of the objects at build time) and missing
+# (registry names without an object) are what the invalidation handlers compare against.
+_tables = {
+    'handles': None,
+    'registry': None,
+    'object_count': 0,
+    'object_ids': frozenset(),
+    'missing': (),
+}
+
+# Owner of the msgbus subscriptions, so they can be cleared together
+_msgbus_owner = object()
+
+
+def tag_object(obj, group: str, key: str) -> None:
+    """
+    Stamp an object with its registry group and key.
+
+    Args:
+        obj: The object to tag
+        group: Registry model group
+        key: Model key within the group
+    """
+    obj[TAG_GROUP] = group
+    obj[TAG_KEY] = key
+    handles = _tables['handles']
+    if handles is not None:
+        handles.setdefault(group, {})[key] = obj
+
+
+def untag_object(obj) -> None:
+    """Remove the registry tag from an object."""
+    tag = get_object_tag(obj)
+    for prop in (TAG_GROUP, TAG_KEY):
+        if prop in obj:
+            del obj[prop]
+    handles = _tables['handles']
+    if tag and handles is not None and handles.get(tag[0], {}).get(tag[1]) == obj:
+        del handles[tag[0]][tag[1]]
+
+
+def get_object_tag(obj) -> Optional[Tuple[str, str]]:
+    """
+    Get the registry (group, key) an object is tagged with.
+
+    Returns:
+        (group, key) tuple, or None if the object isn't tagged
+    """
+    group = obj.get(TAG_GROUP)
+    key = obj.get(TAG_KEY)
+    if isinstance(group, str) and isinstance(key, str):
+        return group, key
+    return None
+
+
+def _object_ids() -> frozenset:
+    # Identity of every object, so a delete and an add in the same update still differ
+    return frozenset(obj.as_pointer() for obj in bpy.data.objects)
+
+
+def rebuild_handle_tables() -> Dict[str, Dict[str, bpy.types.Object]]:
+    """
+    Rebuild the group -> {key: object} tables in one pass over bpy.data.objects.
+
+    Registry entries without a tagged object fall back to a name lookup and get tagged,
+    which migrates files set up before tagging existed. If several objects carry the
+    same tag (e.g. a duplicated gear piece) the one whose name matches the registry wins.
+
+    Returns:
+        The rebuilt handle tables
+    """
+    registry = get_registry()
+    handles = {}
+
+    for obj in bpy.data.objects:
+        tag = get_object_tag(obj)
+        if tag is None:
+            continue
+        group, key = tag
+        if registry.get(group, key) is None:
+            continue
+        entries = handles.setdefault(group, {})
+        if key not in entries or obj.name == registry.get(group, key):
+            entries[key] = obj
+
+    missing = []
+    for group in registry.groups.values():
+        entries = handles.setdefault(group.name, {})
+        for key, name in zip(group.keys, group.models):
+            if key in entries:
+                continue
+            obj = bpy.data.objects.get(name)
+            if obj is not None:
+                tag_object(obj, group.name, key)
+                entries[key] = obj
+            else:
+                missing.append(name)
+
+    _tables['handles'] = handles
+    _tables['registry'] = registry
+    _tables['object_count'] = len(bpy.data.objects)
+    _tables['object_ids'] = _object_ids()
+    _tables['missing'] = tuple(missing)
+    return handles
+
+
+def get_handle_tables() -> Dict[str, Dict[str, bpy.types.Object]]:
+    """Get the group -> {key: object} tables, rebuilding them if the registry was reloaded."""
+    if _tables['handles'] is None or _tables['registry'] is not get_registry():
+        return rebuild_handle_tables()
+    return _tables['handles']
+
+
+def get_group_objects(group: str) -> Tuple[bpy.types.Object, ...]:
+    """Get the objects of a registry group, in registry order."""
+    entries = get_handle_tables().get(group)
+    if not entries:
+        return ()
+    registry_group = get_registry().groups.get(group)
+    keys = registry_group.keys if registry_group else tuple(entries)
+    return tuple(entries[key] for key in keys if key in entries)
+
+
+def clear_handle_tables() -> None:
+    """Drop the handle tables so the next lookup rescans."""
+    _tables['handles'] = None
+    _tables['registry'] = None
+
+
+def _on_object_renamed():
+    # Tagged handles survive renames, a rename only matters if it can resolve a missing registry entry
+    if _tables['handles'] is not None and _tables['missing']:
+        clear_handle_tables()
+
+
+def subscribe_renames() -> None:
+    """Subscribe to object renames, dropping any previous subscription."""
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    bpy.msgbus.subscribe_rna(
+        key=(bpy.types.Object, "name"),
+        owner=_msgbus_owner,
+        args=(),
+        notify=_on_object_renamed,
+    )
+
+
+def _objects_replaced(depsgraph) -> bool:
+    # With an unchanged object count only a delete plus an add in the same update changes the set,
+    # and the added object is among the update's IDs; unknown pointers there mean the set changed
+    if depsgraph is None:
+        return _object_ids() != _tables['object_ids']
+    if not depsgraph.id_type_updated('OBJECT'):
+        return False
+    known = _tables['object_ids']
+    for update in depsgraph.updates:
+        obj = getattr(update.id, 'original', update.id)
+        if isinstance(obj, bpy.types.Object) and obj.as_pointer() not in known:
+            return True
+    return False
+
+
+@persistent
+def _tags_depsgraph_handler(scene, depsgraph=None):
+    # Runs on every depsgraph tick (transforms, edit mode, playback), so it only looks at the
+    # object count, the usually empty missing names and the IDs of this update, never every object.
+    # Deleting objects leaves dangling handles and adding them may bring in tagged models.
+    # Renames made from Python don't notify msgbus, so a missing registry name showing up is checked too.
+    if _tables['handles'] is None:
+        return
+    objects = bpy.data.objects
+    if (len(objects) != _tables['object_count']
+            or any(name in objects for name in _tables['missing'])
+            or _objects_replaced(depsgraph)):
+        clear_handle_tables()
+
+
+@persistent
+def _tags_reset_handler(*args):
+    # Loading a file or stepping through undo replaces the objects, held handles go stale
+    clear_handle_tables()
+
+
+@persistent
+def _tags_load_handler(*args):
+    # Loading a file drops msgbus subscriptions
+    subscribe_renames()
+
+
+def register():
+    bpy.app.handlers.load_post.append(_tags_reset_handler)
+    bpy.app.handlers.load_post.append(_tags_load_handler)
+    bpy.app.handlers.undo_post.append(_tags_reset_handler)
+    bpy.app.handlers.redo_post.append(_tags_reset_handler)
+    bpy.app.handlers.depsgraph_update_post.append(_tags_depsgraph_handler)
+    subscribe_renames()
+
+
+def unregister():
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    handler_lists = (
+        (bpy.app.handlers.depsgraph_update_post, _tags_depsgraph_handler),
+        (bpy.app.handlers.redo_post, _tags_reset_handler),
+        (bpy.app.handlers.undo_post, _tags_reset_handler),
+        (bpy.app.handlers.load_post, _tags_load_handler),
+        (bpy.app.handlers.load_post, _tags_reset_handler),
+    )
+    for handlers, handler in handler_lists:
+        if handler in handlers:
+            handlers.remove(handler)
+    clear_handle_tables()
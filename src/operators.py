@@ -4,19 +4,21 @@
 import bpy
 import os
 from bpy.types import Operator
-from bpy.props import BoolProperty, EnumProperty, IntProperty, StringProperty, PointerProperty, CollectionProperty
+from bpy.props import BoolProperty, EnumProperty, FloatProperty, IntProperty, StringProperty, CollectionProperty
 from bpy_extras.io_utils import ImportHelper, ExportHelper
+from .gear_shapes import GEAR_SHAPE_MODES
 
 
 # Gear management utilities (merged from gear_helpers.py)
 
-def add_shape_keys(obj, master_shape_key_data):
+def add_shape_keys(obj, master_shape_key_data, use_drivers=True):
     """
     Add shape keys to an object based on a master shape key collection.
     
     Args:
         obj: The object to add shape keys to
         master_shape_key_data: The master shape key data
+        use_drivers: Drive the shape keys from the master, False in push mode
     """
     if not obj or not obj.data:
         return False
@@ -37,9 +39,14 @@ def add_shape_keys(obj, master_shape_key_data):
                 obj.shape_key_add(name=key.name, from_mix=False)
             
             # Add driver for everything except TBSE
-            if key.name != 'TBSE':
+            if use_drivers and key.name != 'TBSE':
                 add_drivers(obj, key, master_shape_key_data)
         
+        # Push mode: take the current master values once instead
+        if not use_drivers:
+            from .gear_shapes import push_shapes_to_object, read_master_values
+            push_shapes_to_object(obj, read_master_values(master_shape_key_data))
+        
         return True
         
     except Exception as e:
@@ -61,20 +68,22 @@ def add_drivers(obj, key, master):
         new_driver = obj.data.shape_keys.key_blocks[key.name].driver_add('value').driver
         new_driver.type = 'AVERAGE'
         
-        # Create variable if none exist
-        if len(new_driver.variables) == 0:
-            var = new_driver.variables.new()
-            var.name = 'value'
-            var.type = 'SINGLE_PROP'
-            var.targets[0].id_type = 'KEY'
-            var.targets[0].id = master
-            var.targets[0].data_path = f'key_blocks["{key.name}"].value'
+        # driver_add returns an existing driver as is, drop its variables so stale targets don't survive
+        for var in list(new_driver.variables):
+            new_driver.variables.remove(var)
+        
+        var = new_driver.variables.new()
+        var.name = 'value'
+        var.type = 'SINGLE_PROP'
+        var.targets[0].id_type = 'KEY'
+        var.targets[0].id = master
+        var.targets[0].data_path = f'key_blocks["{key.name}"].value'
             
     except Exception as e:
         print(f"Error adding driver for {key.name}: {e}")
 
 
-def add_gear_to_list(obj, gear_list, master_name):
+def add_gear_to_list(obj, gear_list, master_name, use_drivers=True):
     """
     Add a gear object to a gear list with shape keys.
     
@@ -82,6 +91,7 @@ def add_gear_to_list(obj, gear_list, master_name):
         obj: The object to add
         gear_list: The collection property list to add to
         master_name: Name of the master shape key
+        use_drivers: Drive the shape keys from the master, False in push mode
     """
     try:
         # Get the master shape key data
@@ -97,7 +107,7 @@ def add_gear_to_list(obj, gear_list, master_name):
         new_item.obj_pointer = obj
         
         # Add shape keys to the object
-        if add_shape_keys(obj, master):
+        if add_shape_keys(obj, master, use_drivers):
             obj.use_shape_key_edit_mode = True
             return True
         else:
@@ -139,24 +149,16 @@ def add_gear_to_json(obj, prefix, model_group_key):
     """
     try:
         from .json_helpers import getTextBlock, setTextBlock
+        from .registry import add_model, next_model_key
+        from .object_tags import tag_object
         model_dict = getTextBlock()
         
-        # Ensure the group exists
-        if model_group_key not in model_dict:
-            model_dict[model_group_key] = {}
-        
-        # Find available key
-        length = len(model_dict[model_group_key])
-        model_key = f"{prefix}{length + 1}"
+        # Keys are never reused, loadouts and looks store them
+        model_key = next_model_key(model_dict, model_group_key, prefix)
         
-        # Handle duplicate keys
-        index = 0
-        while model_key in model_dict[model_group_key]:
-            index += 1
-            model_key = f"{prefix}{index}"
-        
-        # Add to dictionary
-        model_dict[model_group_key][model_key] = obj.name
+        # Add to dictionary (creates the group if needed) and stamp the object
+        add_model(model_dict, model_group_key, model_key, obj.name)
+        tag_object(obj, model_group_key, model_key)
         
         # Save updated data
         setTextBlock(model_dict)
@@ -177,20 +179,17 @@ def remove_gear_from_json(obj, model_group_key):
     """
     try:
         from .json_helpers import getTextBlock, setTextBlock
+        from .registry import find_model, remove_model
+        from .object_tags import get_object_tag, untag_object
         model_dict = getTextBlock()
         
-        if model_group_key in model_dict:
-            # Find the model key for this object
-            model_key = None
-            for key, value in model_dict[model_group_key].items():
-                if value == obj.name:
-                    model_key = key
-                    break
-            
-            if model_key:
-                model_dict[model_group_key].pop(model_key)
-                setTextBlock(model_dict)
-                return True
+        # Find the model key for this object, by tag first so renamed objects still match
+        entry = get_object_tag(obj) or find_model(model_dict, obj.name)
+        if entry and entry[0] == model_group_key:
+            remove_model(model_dict, model_group_key, entry[1])
+            untag_object(obj)
+            setTextBlock(model_dict)
+            return True
         
         return False
         
@@ -275,7 +274,7 @@ class TBSEKIT_OT_setToDefault(Operator):
     # Resets all shapekeys and toggles back to default
     bl_idname = "object.set_to_default"
     bl_label = "Set to Default"
-    bl_options = {"REGISTER","UNDO"}
+    bl_options = {"REGISTER"}
 
     @classmethod
     def poll(cls, context):
@@ -283,12 +282,14 @@ class TBSEKIT_OT_setToDefault(Operator):
 
     def execute(self, context):
         # Reset all toggles and shape keys to default values
+        from .dispatch import bulk_update
         props = context.scene.tbse_kit_properties
         
-        # Reset all properties to their defaults
-        for prop_name, prop in props.bl_rna.properties.items():
-            if hasattr(prop, 'default') and prop_name != 'name':
-                setattr(props, prop_name, prop.default)
+        # Reset all properties to their defaults, running each update callback once at the end
+        with bulk_update(context):
+            for prop_name, prop in props.bl_rna.properties.items():
+                if hasattr(prop, 'default') and prop_name != 'name':
+                    setattr(props, prop_name, prop.default)
         
         self.report({'INFO'}, "TBSE Body Kit: Reset to default settings.")
         return {'FINISHED'}
@@ -308,11 +309,14 @@ class TBSEKIT_OT_setupModels(Operator):
     def execute(self, context):
         try:
             from .setup_helpers import install_models_data, verify_models_data
+            from .object_tags import rebuild_handle_tables
             
             # Install the models data
             if install_models_data():
                 # Verify it was installed correctly
                 if verify_models_data():
+                    # Stamp every registered object with its group and key
+                    rebuild_handle_tables()
                     self.report({'INFO'}, "TBSE models data installed successfully!")
                 else:
                     self.report({'WARNING'}, "Models data installed but verification failed")
@@ -325,6 +329,33 @@ class TBSEKIT_OT_setupModels(Operator):
         return {'FINISHED'}
 
 
+class TBSEKIT_OT_setupCollections(Operator):
+    # Link every body model group into its own collection and switch to collection visibility
+    bl_idname = "object.setup_collections"
+    bl_label = "Organize Model Collections"
+    bl_description = "Put each model group in its own collection so groups are hidden by excluding the collection"
+    bl_options = {"REGISTER","UNDO"}
+
+    unlink_others: BoolProperty(default=False, name="Unlink From Other Collections", description="Remove the models from their current collections, so excluding a group collection hides them without per-object hiding.\nThis discards your own collection organization of the models")
+
+    @classmethod
+    def poll(cls, context):
+        return True
+
+    def execute(self, context):
+        from .model_collections import setup_group_collections
+        from .dispatch import request_visibility
+
+        moved = setup_group_collections(context.scene, self.unlink_others)
+        settings = context.scene.tbse_kit_settings
+        if settings.use_collection_visibility:
+            request_visibility(context)
+        else:
+            settings.use_collection_visibility = True
+        self.report({'INFO'}, f"TBSE Body Kit: Linked {moved} models into group collections.")
+        return {'FINISHED'}
+
+
 class TBSEKIT_OT_rename(Operator):
     bl_idname = "object.renaming"
     bl_label = "Rename"
@@ -352,6 +383,7 @@ class TBSEKIT_OT_importFBX(Operator, ImportHelper):
     fix_materials: BoolProperty(default=True, name="Fix Materials", description="Changes all materials to 'Alpha Hashed' and fixes metalics")
     delete_junk: BoolProperty(default=True, name="Delete Junk", description="Deletes all empty objects, importing only the mesh and armature")
     auto_assign_armature: BoolProperty(default=True, name="Auto Assign Armature", description="Deletes the armature that comes with the fbx and assigns all meshes to existing skeleton.\nRecommended to disable ONLY if fbx skeleton includes ex_ bones")
+    transfer_weights: BoolProperty(default=False, name="Transfer Body Weights", description="Replaces the bone weights of the imported meshes with those of the nearest body vertices.\nFor gear that comes without FFXIV vertex groups")
 
     def draw(self, context):
         layout = self.layout
@@ -359,6 +391,7 @@ class TBSEKIT_OT_importFBX(Operator, ImportHelper):
         layout.prop(self, "fix_materials")
         layout.prop(self, "delete_junk")
         layout.prop(self, "auto_assign_armature")
+        layout.prop(self, "transfer_weights")
 
     def execute(self, context):
         # Import FBX files with selected options
@@ -454,6 +487,11 @@ def cleanImport(self, imported):
         
         obj.select_set(False)  # deselect mesh objects
     
+    # OPTIONAL SETTING: transfer bone weights from the body
+    if getattr(self, 'transfer_weights', False) and meshes:
+        from .weight_transfer import transfer_gear_weights
+        transfer_gear_weights(meshes)
+    
     # OPTIONAL SETTING: delete junk
     if self.delete_junk:
         for obj in junk:
@@ -511,6 +549,7 @@ class TBSEKIT_OT_gearAdd(Operator):
     def execute(self, context):
         # Generic gear add operator
         from .constants import SHAPE_KEY_MASTERS
+        from .registry import registry_transaction
         
         selected_objects = context.selected_objects
         if not selected_objects:
@@ -551,15 +590,27 @@ class TBSEKIT_OT_gearAdd(Operator):
         
         config = gear_config[self.gear_type]
         gear_list = config['list']
+        use_drivers = context.scene.tbse_kit_settings.gear_shape_mode == 'DRIVERS'
         success_count = 0
         
-        for obj in selected_objects:
-            if obj.type == 'MESH':
-                if add_gear_to_list(obj, gear_list, config['master']):
-                    add_gear_to_json(obj, config['prefix'], config['json_key'])
-                    success_count += 1
-                else:
-                    self.report({'WARNING'}, f"Failed to add shape keys to {obj.name}")
+        # Serialize the registry once for the whole selection
+        with registry_transaction():
+            for obj in selected_objects:
+                if obj.type == 'MESH':
+                    if add_gear_to_list(obj, gear_list, config['master'], use_drivers):
+                        add_gear_to_json(obj, config['prefix'], config['json_key'])
+                        success_count += 1
+                    else:
+                        self.report({'WARNING'}, f"Failed to add shape keys to {obj.name}")
+        
+        # Fill the new shape keys from the body instead of leaving basis copies
+        if success_count > 0 and context.scene.tbse_kit_settings.auto_fit_gear:
+            from .fitting import fit_gear_objects
+            fit_gear_objects([obj for obj in selected_objects if obj.type == 'MESH' and obj.data.shape_keys])
+        
+        if success_count > 0 and context.scene.tbse_kit_settings.auto_transfer_weights:
+            from .weight_transfer import transfer_gear_weights
+            transfer_gear_weights([obj for obj in selected_objects if obj.type == 'MESH'])
         
         if success_count > 0:
             self.report({'INFO'}, f"TBSE Body Kit: Added {success_count} {self.gear_type} gear item(s).")
@@ -628,8 +679,10 @@ class TBSEKIT_OT_gearRemove(Operator):
             remove_shape_keys(obj)
             remove_gear_from_json(obj, config['json_key'])
         
-        # Remove from list
+        # Remove from list, and its bit from every loadout
         remove_gear_from_list(gear_list, index)
+        from .loadouts import remove_loadout_bit
+        remove_loadout_bit(context.scene, self.gear_type, index)
         
         # Adjust index if needed
         if index >= len(gear_list) and len(gear_list) > 0:
@@ -639,6 +692,353 @@ class TBSEKIT_OT_gearRemove(Operator):
         return {'FINISHED'}
 
 
+class TBSEKIT_OT_gearLoadoutSave(Operator):
+    # Save the enabled state of every gear list as a named loadout
+    bl_idname = "object.gear_loadout_save"
+    bl_label = "Save Gear Loadout"
+    bl_description = "Save which gear pieces are enabled as a new loadout"
+    bl_options = {'REGISTER','UNDO'}
+
+    name: StringProperty(name="Name", default="Loadout")
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        from .loadouts import capture_loadout
+        scene = context.scene
+        loadout = scene.tbse_gear_loadouts.add()
+        loadout.name = self.name
+        capture_loadout(scene, loadout)
+        scene.tbse_gear_loadout_index = len(scene.tbse_gear_loadouts) - 1
+        self.report({'INFO'}, f"TBSE Body Kit: Saved gear loadout '{self.name}'.")
+        return {'FINISHED'}
+
+
+class TBSEKIT_OT_gearLoadoutApply(Operator):
+    # Apply a saved gear loadout in one pass
+    bl_idname = "object.gear_loadout_apply"
+    bl_label = "Apply Gear Loadout"
+    bl_description = "Enable exactly the gear pieces saved in this loadout"
+    bl_options = {'REGISTER'}
+
+    index: IntProperty(default=-1)
+
+    def execute(self, context):
+        from .loadouts import apply_loadout
+        from .dispatch import bulk_update
+        scene = context.scene
+        index = self.index if self.index >= 0 else scene.tbse_gear_loadout_index
+        if index >= len(scene.tbse_gear_loadouts):
+            self.report({'WARNING'}, "No valid gear loadout selected")
+            return {'CANCELLED'}
+        with bulk_update(context):
+            changed = apply_loadout(scene, scene.tbse_gear_loadouts[index])
+        self.report({'INFO'}, f"TBSE Body Kit: Loadout applied, {changed} gear pieces changed.")
+        return {'FINISHED'}
+
+
+class TBSEKIT_OT_gearLoadoutRemove(Operator):
+    # Remove the selected gear loadout
+    bl_idname = "object.gear_loadout_remove"
+    bl_label = "Remove Gear Loadout"
+    bl_options = {'REGISTER','UNDO'}
+
+    def execute(self, context):
+        scene = context.scene
+        index = scene.tbse_gear_loadout_index
+        if index < 0 or index >= len(scene.tbse_gear_loadouts):
+            self.report({'WARNING'}, "No valid gear loadout selected")
+            return {'CANCELLED'}
+        scene.tbse_gear_loadouts.remove(index)
+        scene.tbse_gear_loadout_index = min(index, len(scene.tbse_gear_loadouts) - 1)
+        return {'FINISHED'}
+
+
+# Look presets
+
+# Enum items handed to Blender must stay referenced while the menu is open
+_look_items = []
+
+
+def _look_enum_items(self, context):
+    from .looks import look_names
+    _look_items[:] = [(name, name, "") for name in look_names()]
+    return _look_items
+
+
+class TBSEKIT_OT_lookSave(Operator):
+    # Save the full body kit state as a named look
+    bl_idname = "object.look_save"
+    bl_label = "Save Look"
+    bl_description = "Save shapes, toggles, piercings and gear flags as a look stored in this file"
+    bl_options = {'REGISTER'}
+
+    name: StringProperty(name="Name", default="Look")
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        from .looks import save_look
+        save_look(context.scene, self.name)
+        self.report({'INFO'}, f"TBSE Body Kit: Saved look '{self.name}'.")
+        return {'FINISHED'}
+
+
+class TBSEKIT_OT_lookApply(Operator):
+    # Restore a saved look in one pass
+    bl_idname = "object.look_apply"
+    bl_label = "Apply Look"
+    bl_description = "Restore a saved look"
+    bl_options = {'REGISTER'}
+    bl_property = "look"
+
+    look: EnumProperty(name="Look", items=_look_enum_items)
+
+    def invoke(self, context, event):
+        context.window_manager.invoke_search_popup(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        from .looks import apply_look
+        changed = apply_look(context, self.look)
+        if changed is None:
+            self.report({'WARNING'}, f"No look named '{self.look}'")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"TBSE Body Kit: Look '{self.look}' applied, {changed} values changed.")
+        return {'FINISHED'}
+
+
+class TBSEKIT_OT_lookDelete(Operator):
+    # Delete a saved look
+    bl_idname = "object.look_delete"
+    bl_label = "Delete Look"
+    bl_options = {'REGISTER'}
+    bl_property = "look"
+
+    look: EnumProperty(name="Look", items=_look_enum_items)
+
+    def invoke(self, context, event):
+        context.window_manager.invoke_search_popup(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        from .looks import delete_look
+        if not delete_look(self.look):
+            self.report({'WARNING'}, f"No look named '{self.look}'")
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+
+class TBSEKIT_OT_lookExport(Operator, ExportHelper):
+    bl_idname = "object.look_export"
+    bl_label = "Export Looks"
+    bl_description = "Write every saved look to a JSON file"
+
+    filename_ext = ".json"
+    filter_glob: StringProperty(default='*.json',options={'HIDDEN'})
+
+    def execute(self, context):
+        from .looks import export_looks
+        try:
+            count = export_looks(self.filepath)
+        except OSError as e:
+            self.report({'ERROR'}, f"Could not export looks: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"TBSE Body Kit: Exported {count} looks.")
+        return {'FINISHED'}
+
+
+class TBSEKIT_OT_lookImport(Operator, ImportHelper):
+    bl_idname = "object.look_import"
+    bl_label = "Import Looks"
+    bl_description = "Add the looks of a JSON file to this file, replacing looks with the same name"
+
+    filter_glob: StringProperty(default='*.json',options={'HIDDEN'})
+
+    def execute(self, context):
+        from .looks import import_looks
+        try:
+            count = import_looks(self.filepath)
+        except (OSError, ValueError) as e:
+            self.report({'ERROR'}, f"Could not import looks: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"TBSE Body Kit: Imported {count} looks.")
+        return {'FINISHED'}
+
+
+class TBSEKIT_OT_convertGearShapeMode(Operator):
+    # Migrate all gear between driven and pushed shape keys
+    bl_idname = "object.convert_gear_shape_mode"
+    bl_label = "Convert Gear Shape Mode"
+    bl_description = "Switch every gear piece between master drivers and pushed shape key values"
+    bl_options = {'REGISTER','UNDO'}
+
+    mode: EnumProperty(name="Mode", items=GEAR_SHAPE_MODES)
+
+    def execute(self, context):
+        from .gear_shapes import convert_gear_shape_mode
+        converted = convert_gear_shape_mode(context.scene, self.mode)
+        self.report({'INFO'}, f"TBSE Body Kit: Converted {converted} gear pieces to {self.mode.lower()} mode.")
+        return {'FINISHED'}
+
+
+class TBSEKIT_OT_fitGearShapes(Operator):
+    # Fill gear shape keys from the body shape keys
+    bl_idname = "object.fit_gear_shapes"
+    bl_label = "Fit Gear Shapes"
+    bl_description = "Overwrite the shape keys of the selected gear with the body shape deltas of the nearest body vertices"
+    bl_options = {'REGISTER','UNDO'}
+
+    neighbours: IntProperty(default=4, min=1, max=16, name="Neighbours", description="Body vertices blended per gear vertex")
+    falloff: FloatProperty(default=0.0, min=0.0, name="Falloff", subtype='DISTANCE', description="Distance from the body at which gear stops following it, 0 to always follow")
+
+    @classmethod
+    def poll(cls, context):
+        return any(obj.type == 'MESH' for obj in context.selected_objects)
+
+    def execute(self, context):
+        from .fitting import fit_gear_objects
+        gear = [obj for obj in context.selected_objects if obj.type == 'MESH' and obj.data.shape_keys]
+        results = fit_gear_objects(gear, self.neighbours, self.falloff)
+        fitted = sum(1 for count in results.values() if count)
+        self.report({'INFO'}, f"TBSE Body Kit: Fitted shape keys of {fitted} of {len(gear)} gear pieces.")
+        return {'FINISHED'}
+
+
+class TBSEKIT_OT_transferGearWeights(Operator):
+    # Copy body bone weights onto the selected gear
+    bl_idname = "object.transfer_gear_weights"
+    bl_label = "Transfer Body Weights"
+    bl_description = "Replace the bone weights of the selected gear with those of the nearest body vertices"
+    bl_options = {'REGISTER','UNDO'}
+
+    neighbours: IntProperty(default=4, min=1, max=16, name="Neighbours", description="Body vertices blended per gear vertex")
+    max_influences: IntProperty(default=4, min=1, max=8, name="Max Influences", description="Bones kept per vertex, FFXIV uses 4")
+
+    @classmethod
+    def poll(cls, context):
+        return any(obj.type == 'MESH' for obj in context.selected_objects)
+
+    def execute(self, context):
+        from .weight_transfer import transfer_gear_weights
+        gear = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        results = transfer_gear_weights(gear, self.neighbours, self.max_influences)
+        if not results:
+            self.report({'ERROR'}, "TBSE Body Kit: No Skeleton armature to transfer weights for.")
+            return {'CANCELLED'}
+        weighted = sum(1 for count in results.values() if count)
+        self.report({'INFO'}, f"TBSE Body Kit: Transferred weights to {weighted} of {len(gear)} gear pieces.")
+        return {'FINISHED'}
+
+
+class TBSEKIT_OT_checkGearClipping(Operator):
+    # Count body vertices clipping through the selected gear for every shape combination
+    bl_idname = "object.check_gear_clipping"
+    bl_label = "Check Gear Clipping"
+    bl_description = "Count body vertices poking through the selected gear in every chest and leg shape, without switching shapes"
+    bl_options = {'REGISTER','UNDO'}
+
+    max_distance: FloatProperty(default=0.02, min=0.0001, name="Max Distance", subtype='DISTANCE', description="Distance from the gear surface within which body vertices are tested")
+    push_out: BoolProperty(default=False, name="Push Out", description="Move clipped gear vertices outward in the affected gear shape keys")
+    margin: FloatProperty(default=0.001, min=0.0, name="Margin", subtype='DISTANCE', description="Gap left between body and gear when pushing out")
+
+    @classmethod
+    def poll(cls, context):
+        return any(obj.type == 'MESH' for obj in context.selected_objects)
+
+    def execute(self, context):
+        from .clipping import check_gear_clipping
+        results = check_gear_clipping(context.selected_objects, self.max_distance, self.margin, self.push_out)
+        clipping = 0
+        pieces = 0
+        worst = None
+        for obj_name, counts in results.items():
+            clipped = [(combo, count) for combo, count in counts.items() if count]
+            clipping += len(clipped)
+            pieces += bool(clipped)
+            for combo, count in clipped:
+                if worst is None or count > worst[2]:
+                    worst = (obj_name, combo, count)
+        if worst is None:
+            self.report({'INFO'}, f"TBSE Body Kit: No clipping found on {len(results)} gear pieces.")
+        else:
+            action = "Pushed out" if self.push_out else "Found"
+            self.report({'WARNING'}, f"TBSE Body Kit: {action} clipping on {pieces} of {len(results)} gear pieces "
+                                     f"in {clipping} shape combinations, worst {worst[0]} in "
+                                     f"{' / '.join(worst[1])} ({worst[2]} vertices).")
+        return {'FINISHED'}
+
+
+class TBSEKIT_OT_auditGearDrivers(Operator):
+    # Report, and optionally rebuild, broken, redundant and mistargeted gear shape key drivers
+    bl_idname = "object.audit_gear_drivers"
+    bl_label = "Audit Gear Drivers"
+    bl_description = "Check the shape key drivers of every gear piece, optionally rebuilding the bad ones"
+    bl_options = {'REGISTER','UNDO'}
+
+    rebuild: BoolProperty(default=False, name="Rebuild", description="Remove redundant drivers and recreate broken, mistargeted and missing ones")
+
+    def execute(self, context):
+        from .gear_shapes import audit_gear_drivers, rebuild_gear_drivers
+        issues = audit_gear_drivers(context.scene)
+        if not issues:
+            self.report({'INFO'}, "TBSE Body Kit: All gear drivers are fine.")
+            return {'FINISHED'}
+
+        counts = {}
+        for _, _, issue in issues:
+            counts[issue] = counts.get(issue, 0) + 1
+        pieces = len({obj_name for obj_name, _, _ in issues})
+        summary = ", ".join(f"{count} {issue}" for issue, count in sorted(counts.items()))
+
+        if self.rebuild:
+            fixed = rebuild_gear_drivers(context.scene, issues)
+            self.report({'INFO'}, f"TBSE Body Kit: Fixed {fixed} of {len(issues)} gear drivers on {pieces} gear pieces ({summary}).")
+        else:
+            self.report({'WARNING'}, f"TBSE Body Kit: {len(issues)} gear driver issues on {pieces} gear pieces ({summary}).")
+        return {'FINISHED'}
+
+
+# Body kit state history, kit-only steps of user edits next to Blender's global undo
+
+class TBSEKIT_OT_stateUndo(Operator):
+    # Step back one body kit state
+    bl_idname = "object.tbse_state_undo"
+    bl_label = "Undo Body Kit State"
+    bl_description = "Undo the last toggle, shape or gear change made in the kit, without stepping Blender's undo history.\nLooks and loadouts are undone with Ctrl+Z"
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        from .history import has_undo
+        return has_undo()
+
+    def execute(self, context):
+        from .history import undo_state
+        undo_state(context)
+        return {'FINISHED'}
+
+
+class TBSEKIT_OT_stateRedo(Operator):
+    # Step forward one body kit state
+    bl_idname = "object.tbse_state_redo"
+    bl_label = "Redo Body Kit State"
+    bl_description = "Redo the last undone toggle, shape or gear change"
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        from .history import has_redo
+        return has_redo()
+
+    def execute(self, context):
+        from .history import redo_state
+        redo_state(context)
+        return {'FINISHED'}
+
+
 # Specific gear operators that call the generic ones
 class TBSEKIT_OT_chestGearAdd(Operator):
     bl_idname = "object.chest_gear_add"
@@ -724,6 +1124,7 @@ class TBSEKIT_OT_feetGearRemove(Operator):
 classes = (
     TBSEKIT_OT_setToDefault,
     TBSEKIT_OT_setupModels,
+    TBSEKIT_OT_setupCollections,
     TBSEKIT_OT_rename,
     TBSEKIT_OT_importFBX,
     TBSEKIT_OT_exportFBX,
@@ -737,6 +1138,21 @@ classes = (
     TBSEKIT_OT_handGearRemove,
     TBSEKIT_OT_feetGearAdd,
     TBSEKIT_OT_feetGearRemove,
+    TBSEKIT_OT_gearLoadoutSave,
+    TBSEKIT_OT_gearLoadoutApply,
+    TBSEKIT_OT_gearLoadoutRemove,
+    TBSEKIT_OT_lookSave,
+    TBSEKIT_OT_lookApply,
+    TBSEKIT_OT_lookDelete,
+    TBSEKIT_OT_lookExport,
+    TBSEKIT_OT_lookImport,
+    TBSEKIT_OT_stateUndo,
+    TBSEKIT_OT_stateRedo,
+    TBSEKIT_OT_convertGearShapeMode,
+    TBSEKIT_OT_auditGearDrivers,
+    TBSEKIT_OT_fitGearShapes,
+    TBSEKIT_OT_transferGearWeights,
+    TBSEKIT_OT_checkGearClipping,
 )
 
 def register():
@@ -25,6 +25,20 @@ class TBSEKIT_PT_mainPanel(TBSEKIT_View3DPanel, Panel):
         # Add reset to default button
         row = layout.row()
         row.operator("object.set_to_default", text="Reset to Default", icon='RECOVER_LAST')
+        
+        # Body kit state history
+        row = layout.row(align=True)
+        row.operator("object.tbse_state_undo", text="Undo", icon='LOOP_BACK')
+        row.operator("object.tbse_state_redo", text="Redo", icon='LOOP_FORWARDS')
+        
+        # Look presets
+        row = layout.row(align=True)
+        row.operator("object.look_save", text="Save Look", icon='ADD')
+        row.operator("object.look_apply", text="Apply Look", icon='PRESET')
+        row.operator("object.look_delete", text="", icon='REMOVE')
+        row = layout.row(align=True)
+        row.operator("object.look_export", text="Export Looks", icon='EXPORT')
+        row.operator("object.look_import", text="Import Looks", icon='IMPORT')
 
 class TBSEKIT_PT_modelPanel(TBSEKIT_View3DPanel, Panel):
     # Panel for body part model toggles.
@@ -79,6 +93,36 @@ class TBSEKIT_PT_advancedPanel(TBSEKIT_View3DPanel, Panel):
     def draw(self, context):
         layout = self.layout
         layout.label(text="Advanced Features")
+        
+        settings = context.scene.tbse_kit_settings
+        layout.prop(settings, "use_registry_journal")
+        layout.operator("object.setup_collections")
+        layout.prop(settings, "use_collection_visibility")
+        row = layout.row()
+        row.prop(settings, "use_deferred_updates")
+        sub = row.row()
+        sub.enabled = settings.use_deferred_updates
+        sub.prop(settings, "deferred_update_delay")
+        
+        # Gear shape mode, switched through the converter so existing gear is migrated
+        row = layout.row(align=True)
+        row.label(text=f"Gear Shapes: {settings.gear_shape_mode.title()}")
+        row.operator("object.convert_gear_shape_mode", text="Drivers").mode = 'DRIVERS'
+        row.operator("object.convert_gear_shape_mode", text="Push").mode = 'PUSH'
+        row = layout.row(align=True)
+        row.operator("object.audit_gear_drivers", text="Audit Gear Drivers").rebuild = False
+        row.operator("object.audit_gear_drivers", text="Rebuild").rebuild = True
+        
+        # Gear shape fitting
+        row = layout.row(align=True)
+        row.prop(settings, "auto_fit_gear")
+        row.operator("object.fit_gear_shapes")
+        row = layout.row(align=True)
+        row.prop(settings, "auto_transfer_weights")
+        row.operator("object.transfer_gear_weights")
+        row = layout.row(align=True)
+        row.operator("object.check_gear_clipping")
+        row.operator("object.check_gear_clipping", text="Push Out").push_out = True
 
 class TBSEKIT_PT_renamePanel(TBSEKIT_View3DPanel, Panel):
     # Panel for bulk renaming models.
@@ -98,6 +142,13 @@ class TBSEKIT_PT_gearToggle(TBSEKIT_View3DPanel, Panel):
         layout = self.layout
         layout.label(text="Gear Model Toggles")
 
+        scene = context.scene
+        row = layout.row()
+        row.template_list("TBSEKIT_UL_gearLoadouts", "", scene, "tbse_gear_loadouts", scene, "tbse_gear_loadout_index", rows=3)
+        col = row.column(align=True)
+        col.operator("object.gear_loadout_save", text="", icon='ADD')
+        col.operator("object.gear_loadout_remove", text="", icon='REMOVE')
+
 class TBSEKIT_PT_chestGearList(TBSEKIT_View3DPanel, Panel):
     # Panel for chest gear list.
     bl_idname = "TBSEKIT_PT_chestGearList"
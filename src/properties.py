@@ -6,17 +6,18 @@
 # Property definitions for TBSE Body Kit Blender Addon
 # This file contains all the properties used in the addon, including enums and options for body part visibility, shape selection, gear, bone groups, and renaming.
 import bpy
-from bpy.props import (BoolProperty, EnumProperty, IntProperty, StringProperty, PointerProperty, CollectionProperty)
+from bpy.props import (BoolProperty, EnumProperty, FloatProperty, IntProperty, StringProperty, PointerProperty, CollectionProperty)
 from bpy.types import PropertyGroup
 from bpy.types import UIList
 from .json_helpers import getTextBlock, getModelsInList, setTextBlock
 from .drivers import chest_resetDrivers, leg_resetDrivers, afab_driver, amab_driver
+from .gear_shapes import GEAR_SHAPE_MODES
 from .toggles import (
     chestToggle, legToggle, nsfwToggle, handToggle, feetToggle, 
     genitalToggle, bpfToggle, genitalSet, boneToggles,
     chestPiercingToggle, amabPiercingToggle, 
     chestGearToggle, legGearToggle, handGearToggle, feetGearToggle, 
-    gearToggle, modelNameChange
+    gearToggle, modelNameChange, collectionModeToggle
 )
 from .drivers import chest_driver, leg_driver
 from .operators import select_chest_gear, select_leg_gear, select_hand_gear, select_feet_gear
@@ -130,6 +131,30 @@ class TBSEKIT_TBSEProperties(PropertyGroup):
     show_ivcs_bones:        BoolProperty(default=False, update=boneToggles)
     show_ivcs2_bones:       BoolProperty(default=False, update=boneToggles)
 
+class TBSEKIT_KitSettings(PropertyGroup):
+    # Addon behaviour settings.
+    # Kept apart from TBSEKIT_TBSEProperties so "Reset to Default" doesn't touch them.
+    use_registry_journal:   BoolProperty(name="Journal Registry Changes",
+                                         description="Append gear adds and renames to a small journal instead of rewriting the whole .models block. The journal is folded back in on save",
+                                         default=True)
+    use_collection_visibility: BoolProperty(name="Collection Visibility",
+                                         description="Hide whole model groups by excluding their collections. Run Organize Model Collections first",
+                                         default=False, update=collectionModeToggle)
+    use_deferred_updates:   BoolProperty(name="Deferred Updates",
+                                         description="Apply toggle and shape changes once, shortly after the last change, instead of on every change",
+                                         default=False)
+    deferred_update_delay:  FloatProperty(name="Delay",
+                                          description="Seconds without changes before deferred updates are applied",
+                                          default=0.15, min=0.0, max=2.0, subtype='TIME', unit='TIME')
+    # Changed through the Convert Gear Shape Mode operator, which migrates existing gear
+    gear_shape_mode:        EnumProperty(name="Gear Shape Mode", items=GEAR_SHAPE_MODES, default='DRIVERS')
+    auto_fit_gear:          BoolProperty(name="Auto-fit Gear Shapes",
+                                         description="Fill the shape keys of newly added gear from the body shape keys",
+                                         default=False)
+    auto_transfer_weights:  BoolProperty(name="Auto-transfer Weights",
+                                         description="Copy the body bone weights onto newly added gear",
+                                         default=False)
+
 class TBSEKIT_chestPiercingToggles(PropertyGroup):
     nipple_ring:        BoolProperty(name="Nipple Ring",    default=True, update=chestPiercingToggle)
     nipple_bar:         BoolProperty(name="Nipple Bar",     default=True, update=chestPiercingToggle)
@@ -168,6 +193,16 @@ class FeetListItem(PropertyGroup):
     obj_pointer:        PointerProperty(type=bpy.types.Object)
     isEnabled:          BoolProperty(default=True, update=gearToggle)
 
+class TBSEKIT_GearLoadout(PropertyGroup):
+    # Named gear enable state, one "<count>:<hex>" bitset per gear list plus the gear keys
+    # the bits belong to, as JSON (see loadouts.py)
+    name:               StringProperty(name="Loadout", default="Loadout")
+    keys:               StringProperty(default="")
+    chest_bits:         StringProperty(default="0:0")
+    leg_bits:           StringProperty(default="0:0")
+    hand_bits:          StringProperty(default="0:0")
+    feet_bits:          StringProperty(default="0:0")
+
 class TBSEKIT_BulkExport(PropertyGroup):
     file_name:              StringProperty(default="Untitled")
     iteration_ver:          IntProperty(default=1)
@@ -212,15 +247,18 @@ class TBSEKIT_BulkExport(PropertyGroup):
 # Registration
 def register():
     bpy.utils.register_class(TBSEKIT_TBSEProperties)
+    bpy.utils.register_class(TBSEKIT_KitSettings)
     bpy.utils.register_class(TBSEKIT_chestPiercingToggles)
     bpy.utils.register_class(TBSEKIT_AMABPiercingToggles)
     bpy.utils.register_class(ChestListItem)
     bpy.utils.register_class(LegListItem)
     bpy.utils.register_class(HandListItem)
     bpy.utils.register_class(FeetListItem)
+    bpy.utils.register_class(TBSEKIT_GearLoadout)
     bpy.utils.register_class(TBSEKIT_BulkExport)
     
     bpy.types.Scene.tbse_kit_properties = PointerProperty(type=TBSEKIT_TBSEProperties)
+    bpy.types.Scene.tbse_kit_settings = PointerProperty(type=TBSEKIT_KitSettings)
     bpy.types.Scene.tbse_chest_toggles = PointerProperty(type=TBSEKIT_chestPiercingToggles)
     bpy.types.Scene.tbse_amab_toggles = PointerProperty(type=TBSEKIT_AMABPiercingToggles)
     
@@ -234,10 +272,16 @@ def register():
     bpy.types.Scene.feet_gear_list = CollectionProperty(type=FeetListItem)
     bpy.types.Scene.feet_gear_index = IntProperty(default=0, update=select_feet_gear)
     
+    # Gear loadouts
+    bpy.types.Scene.tbse_gear_loadouts = CollectionProperty(type=TBSEKIT_GearLoadout)
+    bpy.types.Scene.tbse_gear_loadout_index = IntProperty(default=0)
+    
     bpy.types.Scene.tbse_bulk_export = PointerProperty(type=TBSEKIT_BulkExport)
 
 def unregister():
     del bpy.types.Scene.tbse_bulk_export
+    del bpy.types.Scene.tbse_gear_loadout_index
+    del bpy.types.Scene.tbse_gear_loadouts
     del bpy.types.Scene.feet_gear_index
     del bpy.types.Scene.feet_gear_list
     del bpy.types.Scene.hand_gear_index
@@ -248,13 +292,16 @@ def unregister():
     del bpy.types.Scene.chest_gear_list
     del bpy.types.Scene.tbse_amab_toggles
     del bpy.types.Scene.tbse_chest_toggles
+    del bpy.types.Scene.tbse_kit_settings
     del bpy.types.Scene.tbse_kit_properties
     
     bpy.utils.unregister_class(TBSEKIT_BulkExport)
+    bpy.utils.unregister_class(TBSEKIT_GearLoadout)
     bpy.utils.unregister_class(FeetListItem)
     bpy.utils.unregister_class(HandListItem)
     bpy.utils.unregister_class(LegListItem)
     bpy.utils.unregister_class(ChestListItem)
     bpy.utils.unregister_class(TBSEKIT_AMABPiercingToggles)
     bpy.utils.unregister_class(TBSEKIT_chestPiercingToggles)
+    bpy.utils.unregister_class(TBSEKIT_KitSettings)
     bpy.utils.unregister_class(TBSEKIT_TBSEProperties)
@@ -0,0 +1,756 @@
+# Model registry for TBSE Body Kit addon
+# This module keeps the parsed ".models" text block in memory as a validated ModelRegistry,
+# so toggles and drivers don't re-parse or re-scan it on every update
+import bpy
+import hashlib
+import json
+import re
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+from bpy.app.handlers import persistent
+from .constants import ERROR_MESSAGES, REGISTRY_META_PREFIX, KEY_SEQUENCE_KEY
+
+REGISTRY_TEXT_NAME = ".models"
+JOURNAL_TEXT_NAME = ".models_journal"
+
+# Journal records that trigger folding the journal back into the snapshot
+JOURNAL_COMPACT_THRESHOLD = 256
+
+# Trailing number of a model key, e.g. 'chest_gear_12' -> '12'
+_KEY_NUMBER = re.compile(r'(\d+)$')
+
+
+class ModelGroup:
+    """
+    One model group of the registry (e.g. body_chest) with precomputed immutable views.
+
+    Attributes:
+        name: Group identifier
+        keys: Tuple of model keys in registry order
+        models: Tuple of object names in registry order
+    """
+    __slots__ = ('name', 'keys', 'models', '_entries')
+
+    def __init__(self, name: str, entries: Dict[str, str]):
+        self.name = name
+        self._entries = entries
+        self.refresh()
+
+    def refresh(self) -> None:
+        # Rebuild the tuples after the underlying entries changed
+        self.keys = tuple(self._entries)
+        self.models = tuple(self._entries.values())
+
+    def get(self, key: str) -> Optional[str]:
+        """Get the object name stored under a model key."""
+        return self._entries.get(key)
+
+    def matches(self, entries) -> bool:
+        """Check that the tuples still describe entries, i.e. nothing edited them directly."""
+        return (entries is self._entries and tuple(entries) == self.keys
+                and tuple(entries.values()) == self.models)
+
+    def __len__(self) -> int:
+        return len(self.models)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.models)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.models
+
+
+class ModelRegistry:
+    """
+    Validated, indexed view of the ".models" dictionary.
+
+    The registry owns its plain dictionary (``data``), which is what gets serialized.
+    Mutate it through add/remove/rename so the group tuples and the reverse
+    name index stay in sync. Top-level sections starting with an underscore
+    (e.g. "_visibility_rules") aren't model groups and are exposed as ``meta``.
+    ``version`` counts mutations, so caches derived from the registry can tell
+    when to rebuild.
+    """
+    __slots__ = ('data', 'groups', 'meta', 'version', '_index', '_edited')
+
+    def __init__(self, data: Optional[dict] = None):
+        self.data = self._validate(data if data is not None else {})
+        self.groups = {name: ModelGroup(name, entries) for name, entries in self.data.items()
+                       if not name.startswith(REGISTRY_META_PREFIX)}
+        self.meta = {name: value for name, value in self.data.items()
+                     if name.startswith(REGISTRY_META_PREFIX)}
+        self.version = 0
+        self._index = None
+        self._edited = False
+
+    @staticmethod
+    def _validate(data) -> dict:
+        # Schema check, run once at load: {group: {key: object_name}} with string keys and names
+        if not isinstance(data, dict):
+            print(ERROR_MESSAGES['MODEL_DICT_ERROR'].format(error="registry root is not a JSON object"))
+            return {}
+        for group in list(data):
+            entries = data[group]
+            if isinstance(group, str) and group.startswith(REGISTRY_META_PREFIX):
+                continue
+            if not isinstance(group, str) or not isinstance(entries, dict):
+                print(ERROR_MESSAGES['MODEL_DICT_ERROR'].format(error=f"dropping malformed group '{group}'"))
+                del data[group]
+                continue
+            for key in list(entries):
+                if not isinstance(key, str) or not isinstance(entries[key], str):
+                    print(ERROR_MESSAGES['MODEL_DICT_ERROR'].format(error=f"dropping malformed entry '{group}.{key}'"))
+                    del entries[key]
+        return data
+
+    def _get_index(self) -> dict:
+        # One pass over every group; the first occurrence of a name wins, like the old linear scans
+        if self._index is None:
+            index = {}
+            for group in self.groups.values():
+                for key, name in zip(group.keys, group.models):
+                    index.setdefault(name, (group.name, key))
+            self._index = index
+        return self._index
+
+    def models(self, group: str) -> Tuple[str, ...]:
+        """Get the object names of a group, an empty tuple if the group is missing."""
+        entry = self.groups.get(group)
+        return entry.models if entry else ()
+
+    def get(self, group: str, key: str) -> Optional[str]:
+        """Get the object name stored under group/key."""
+        entry = self.groups.get(group)
+        return entry.get(key) if entry else None
+
+    def find(self, name: str) -> Optional[Tuple[str, str]]:
+        """Get the (group, key) holding an object name, or None."""
+        return self._get_index().get(name)
+
+    def next_key(self, group: str, prefix: str) -> str:
+        """
+        Get a numbered key for a new entry that no entry of the group ever had.
+
+        Numbers only go up: the highest number ever added is kept in the key sequence
+        section, so a removed key isn't handed out again and anything stored under it
+        (loadouts, looks) can't end up pointing at a different model.
+
+        Args:
+            group: Model group the entry goes into
+            prefix: Key prefix, e.g. 'chest_gear_'
+
+        Returns:
+            The key, e.g. 'chest_gear_7'
+        """
+        sequence = self.meta.get(KEY_SEQUENCE_KEY)
+        highest = sequence.get(group, 0) if isinstance(sequence, dict) else 0
+        entry = self.groups.get(group)
+        for key in (entry.keys if entry else ()):
+            if key.startswith(prefix) and key[len(prefix):].isdigit():
+                highest = max(highest, int(key[len(prefix):]))
+        number = highest + 1
+        while f"{prefix}{number}" in (entry.keys if entry else ()):
+            number += 1
+        return f"{prefix}{number}"
+
+    def _note_key_number(self, group: str, key: str) -> None:
+        # Keep the highest key number of the group; adds replay from the journal, so this needs no record
+        match = _KEY_NUMBER.search(key)
+        if match is None:
+            return
+        sequence = self.data.get(KEY_SEQUENCE_KEY)
+        if not isinstance(sequence, dict):
+            sequence = self.data[KEY_SEQUENCE_KEY] = {}
+            self.meta[KEY_SEQUENCE_KEY] = sequence
+        number = int(match.group(1))
+        if not isinstance(sequence.get(group), int) or sequence[group] < number:
+            sequence[group] = number
+
+    def _note_direct_edits(self, group: str) -> None:
+        # Refreshing a group would hide direct edits of its entries, remember them first
+        entry = self.groups.get(group)
+        if entry is not None and not entry.matches(self.data.get(group)):
+            self._edited = True
+
+    def add(self, group: str, key: str, name: str) -> None:
+        """Add or replace an entry, creating the group if needed."""
+        if group.startswith(REGISTRY_META_PREFIX):
+            raise ValueError(f"'{group}' is a reserved registry section, not a model group")
+        self._note_direct_edits(group)
+        entries = self.data.setdefault(group, {})
+        if group not in self.groups:
+            self.groups[group] = ModelGroup(group, entries)
+        index = self._index
+        if index is not None and key in entries and index.get(entries[key]) == (group, key):
+            index.pop(entries[key])
+        entries[key] = name
+        self.groups[group].refresh()
+        self._note_key_number(group, key)
+        self.version += 1
+        if index is not None:
+            index.setdefault(name, (group, key))
+
+    def remove(self, group: str, key: str) -> Optional[str]:
+        """Remove an entry, returning the removed object name or None."""
+        self._note_direct_edits(group)
+        entries = self.data.get(group)
+        if not entries or key not in entries:
+            return None
+        name = entries.pop(key)
+        self.groups[group].refresh()
+        self.version += 1
+        if self._index is not None and self._index.get(name) == (group, key):
+            self._index.pop(name)
+        return name
+
+    def in_sync(self) -> bool:
+        """Check that ``data`` was only changed through add/remove/rename since the groups were built."""
+        if self._edited:
+            return False
+        names = {name for name in self.data if not name.startswith(REGISTRY_META_PREFIX)}
+        if names != set(self.groups) or len(self.data) != len(names) + len(self.meta):
+            return False
+        if any(self.data.get(name) is not value for name, value in self.meta.items()):
+            return False
+        return all(group.matches(self.data[name]) for name, group in self.groups.items())
+
+    def resync(self) -> None:
+        """Rebuild the groups, meta sections and index after ``data`` was edited directly."""
+        self._validate(self.data)
+        self.groups = {name: ModelGroup(name, entries) for name, entries in self.data.items()
+                       if not name.startswith(REGISTRY_META_PREFIX)}
+        self.meta = {name: value for name, value in self.data.items()
+                     if name.startswith(REGISTRY_META_PREFIX)}
+        self.version += 1
+        self._index = None
+        self._edited = False
+
+    def rename(self, old: str, new: str) -> Optional[Tuple[str, str]]:
+        """Rename a registered object, returning its (group, key) or None."""
+        index = self._get_index()
+        entry = index.get(old)
+        if entry is None:
+            return None
+        group, key = entry
+        self._note_direct_edits(group)
+        self.data[group][key] = new
+        self.groups[group].refresh()
+        self.version += 1
+        index.pop(old)
+        index.setdefault(new, entry)
+        return entry
+
+
+# Parsed registry plus the text it was parsed from.
+# Reads compare only the cheap stamp of both text blocks (see _text_stamp), which the registry's
+# own writes refresh and counts in 'writes'. Only when the stamp moved, and before every write,
+# is the full content of both blocks hashed and compared with 'content', a running hash of the
+# snapshot and journal the registry was built from, which journal appends extend in place.
+_cache = {
+    'stamp': None,
+    'writes': 0,
+    'content': None,
+    'registry': None,
+}
+
+# Open registry transaction state. While depth > 0 writes are only recorded, the last
+# stored registry is persisted once when the outermost transaction commits.
+_transaction = {
+    'depth': 0,
+    'pending': None,
+    'pretty': False,
+}
+
+# Mutations of the cached registry made through add_model/remove_model/rename_model since
+# the last persist. In journal mode these are appended to the journal instead of rewriting
+# the snapshot; a store without recorded mutations always falls back to a full snapshot.
+_journal = {
+    'records': [],
+}
+
+
+def invalidate() -> None:
+    """
+    Drop the cached registry so the next read re-parses the text block.
+
+    Writes queued by an open transaction are kept, they are still to be persisted.
+    """
+    _cache['stamp'] = None
+    _cache['content'] = None
+    _cache['registry'] = None
+    _journal['records'] = []
+    if _transaction['depth'] == 0:
+        _transaction['pending'] = None
+
+
+def get_registry_text(create: bool = False):
+    """
+    Get the text block backing the registry.
+
+    Args:
+        create: Create the text block if it doesn't exist
+
+    Returns:
+        The bpy.types.Text block, or None if missing and create is False
+    """
+    text = bpy.data.texts.get(REGISTRY_TEXT_NAME)
+    if text is None and create:
+        text = bpy.data.texts.new(REGISTRY_TEXT_NAME)
+    return text
+
+
+def get_journal_text(create: bool = False):
+    """
+    Get the text block holding journaled registry changes.
+
+    Args:
+        create: Create the text block if it doesn't exist
+
+    Returns:
+        The bpy.types.Text block, or None if missing and create is False
+    """
+    text = bpy.data.texts.get(JOURNAL_TEXT_NAME)
+    if text is None and create:
+        text = bpy.data.texts.new(JOURNAL_TEXT_NAME)
+    return text
+
+
+def _journal_enabled() -> bool:
+    # Journal mode is a per-scene setting, snapshot writes if it can't be read
+    scene = getattr(bpy.context, 'scene', None)
+    settings = getattr(scene, 'tbse_kit_settings', None)
+    return bool(settings and settings.use_registry_journal)
+
+
+def _text_stamp(text, journal) -> tuple:
+    # O(1) identity of both blocks: the registry's own write count, the datablocks, their edit
+    # flags and cursors. Typing or pasting in the Text Editor moves the cursor and sets is_dirty,
+    # and Blender moves it to the end of what from_string/write insert
+    stamp = (_cache['writes'], text.as_pointer(), text.is_dirty, text.is_modified,
+             text.current_line_index, text.current_character)
+    if journal is None:
+        return stamp + (None,)
+    return stamp + (journal.as_pointer(), journal.is_dirty, journal.current_line_index, journal.current_character)
+
+
+def _content_hash(source: str, journal_source: str):
+    # Running hash of the snapshot and the journal; appended records are fed in with update()
+    content = hashlib.blake2b(source.encode(), digest_size=16)
+    content.update(b"\0")
+    content.update(journal_source.encode())
+    return content
+
+
+def _edited_externally() -> bool:
+    # Full content check of both blocks against what the cached registry was built from
+    text = get_registry_text()
+    if text is None or _cache['content'] is None:
+        return False
+    journal = get_journal_text()
+    content = _content_hash(text.as_string(), journal.as_string() if journal else "")
+    return content.digest() != _cache['content'].digest()
+
+
+def _replay_journal(registry: ModelRegistry, source: str) -> None:
+    # Apply journal records on top of the snapshot, one JSON object per line
+    for line_number, line in enumerate(source.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            op = record['op']
+            if op == 'add':
+                registry.add(record['g'], record['k'], record['n'])
+            elif op == 'remove':
+                if registry.remove(record['g'], record['k']) is None:
+                    print(f"Warning: .models journal line {line_number} removes missing entry '{record['g']}.{record['k']}'")
+            elif op == 'rename':
+                if registry.rename(record['o'], record['n']) is None:
+                    print(f"Warning: .models journal line {line_number} renames unregistered object '{record['o']}'")
+            else:
+                raise ValueError(f"unknown op '{op}'")
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            print(f"Warning: Skipping invalid .models journal record on line {line_number}: {e}")
+
+
+def get_registry() -> ModelRegistry:
+    """
+    Get the model registry, re-parsing only if the text block content changed.
+
+    The registry is the ".models" snapshot with the journal replayed on top. While the
+    text blocks' stamp is unchanged the cached registry is returned without reading them.
+
+    Returns:
+        The cached ModelRegistry, empty if the text block is missing or invalid
+    """
+    # Inside a transaction the queued registry is newer than the text block, which may not exist yet
+    pending = _transaction['pending']
+    if pending is not None:
+        _cache['registry'] = pending
+        return pending
+
+    text = get_registry_text()
+    if text is None:
+        print("Warning: .models text block not found. Creating empty model dictionary.")
+        invalidate()
+        return ModelRegistry()
+
+    journal = get_journal_text()
+    stamp = _text_stamp(text, journal)
+    if _cache['registry'] is not None and _cache['stamp'] == stamp:
+        return _cache['registry']
+
+    source = text.as_string()
+    journal_source = journal.as_string() if journal else ""
+    content = _content_hash(source, journal_source)
+    if _cache['registry'] is not None and _cache['content'] is not None and _cache['content'].digest() == content.digest():
+        _cache['stamp'] = stamp
+        return _cache['registry']
+
+    try:
+        data = json.loads(source)
+    except (json.JSONDecodeError, TypeError) as e:
+        print(ERROR_MESSAGES['JSON_PARSE_ERROR'].format(error=e))
+        invalidate()
+        return ModelRegistry()
+
+    registry = ModelRegistry(data)
+    if journal_source.strip():
+        _replay_journal(registry, journal_source)
+
+    _cache['stamp'] = stamp
+    _cache['content'] = content
+    _cache['registry'] = registry
+    _journal['records'] = []
+    return registry
+
+
+def load_registry() -> dict:
+    """
+    Get the registry's plain dictionary.
+
+    The returned dictionary is shared between callers. Code that mutates it must
+    write it back with store_registry() so the text block stays in sync.
+
+    Returns:
+        Dictionary of model groups, empty if the text block is missing or invalid
+    """
+    return get_registry().data
+
+
+def registry_for(model_dict: dict) -> ModelRegistry:
+    """Get the cached registry when model_dict is its data, a fresh validated one otherwise."""
+    registry = _cache['registry']
+    if registry is not None and registry.data is model_dict:
+        return registry
+    return ModelRegistry(model_dict)
+
+
+def _write_text(registry: ModelRegistry, pretty: bool) -> bool:
+    # Serialize the whole registry into the snapshot and empty the journal,
+    # compact unless pretty is requested
+    try:
+        text = get_registry_text(create=True)
+        if pretty:
+            source = json.dumps(registry.data, indent=4)
+        else:
+            source = json.dumps(registry.data, separators=(',', ':'))
+        text.from_string(source)
+
+        journal = get_journal_text()
+        if journal and journal.as_string():
+            journal.clear()
+
+        # Our own write is known content, no need to parse it back
+        _cache['writes'] += 1
+        _cache['stamp'] = _text_stamp(text, journal)
+        _cache['content'] = _content_hash(source, "")
+        _cache['registry'] = registry
+        _journal['records'] = []
+        return True
+    except Exception as e:
+        print(f"Warning: Could not save model dictionary to text block: {e}")
+        invalidate()
+        return False
+
+
+def _append_text(text, payload: str) -> None:
+    # Text.write inserts at the cursor, so move it past the last character first.
+    # The *_line_index cursor properties are missing in some Blender versions bl_info allows,
+    # there the block is rewritten, which also leaves the cursor at the end
+    if not all(hasattr(text, prop) for prop in ('current_line_index', 'select_end_line_index')):
+        text.from_string(text.as_string() + payload)
+        return
+    last = len(text.lines) - 1
+    end = len(text.lines[last].body)
+    text.current_line_index = last
+    text.current_character = end
+    text.select_end_line_index = last
+    text.select_end_character = end
+    text.write(payload)
+
+
+def _append_journal(registry: ModelRegistry, records: list) -> bool:
+    # Append records to the end of the journal text block without rewriting the
+    # records already there
+    try:
+        journal = get_journal_text(create=True)
+        payload = "".join(json.dumps(record, separators=(',', ':')) + "\n" for record in records)
+        _append_text(journal, payload)
+
+        _cache['writes'] += 1
+        text = get_registry_text()
+        _cache['stamp'] = _text_stamp(text, journal) if text is not None else None
+        if _cache['content'] is not None:
+            _cache['content'].update(payload.encode())
+        _cache['registry'] = registry
+        return True
+    except Exception as e:
+        print(f"Warning: Could not append to .models journal: {e}")
+        return False
+
+
+def _persist(registry: ModelRegistry, pretty: bool) -> bool:
+    # Journal the recorded mutations if possible, otherwise write a full snapshot.
+    # Edits made to the dictionary directly aren't in the journal records, so a
+    # registry that is out of sync with its data is always written as a snapshot.
+    records = _journal['records']
+    _journal['records'] = []
+    if not registry.in_sync():
+        registry.resync()
+        return _write_text(registry, pretty)
+    if registry is _cache['registry'] and _edited_externally():
+        # The blocks changed behind the cache (e.g. in the Text Editor), so the registry is stale.
+        # Redo this write's recorded mutations on their current content instead of overwriting it
+        print("Warning: .models was edited outside the kit, re-applying the latest changes on top of it")
+        invalidate()
+        registry = get_registry()
+        _replay_journal(registry, "".join(json.dumps(record) + "\n" for record in records))
+        _journal['records'] = records
+        return _persist(registry, pretty)
+    if records and not pretty and registry is _cache['registry'] and _journal_enabled():
+        if _append_journal(registry, records):
+            journal = get_journal_text()
+            if len(journal.lines) > JOURNAL_COMPACT_THRESHOLD:
+                return _write_text(registry, pretty)
+            return True
+    return _write_text(registry, pretty)
+
+
+def store_registry(model_dict: dict, pretty: bool = False) -> bool:
+    """
+    Write the model registry to the text block and keep it as the cached copy.
+
+    In journal mode, changes made through add_model/remove_model/rename_model are
+    appended to the journal instead of rewriting the snapshot. Inside
+    registry_transaction() the write is deferred until the transaction commits.
+
+    Args:
+        model_dict: Dictionary of model groups to store
+        pretty: Indent the JSON for readability instead of writing it compact
+
+    Returns:
+        True if successful (or queued), False otherwise
+    """
+    registry = registry_for(model_dict)
+    if registry is not _cache['registry']:
+        # A foreign dictionary replaces the registry, journaled mutations no longer apply
+        _journal['records'] = []
+    if _transaction['depth'] > 0:
+        # Readers inside the transaction get the pending registry; the text block is
+        # untouched so the cached fingerprint still matches it.
+        _cache['registry'] = registry
+        _transaction['pending'] = registry
+        _transaction['pretty'] = _transaction['pretty'] or pretty
+        return True
+    return _persist(registry, pretty)
+
+
+def save_registry(pretty: bool = False) -> bool:
+    """Write the cached registry after mutating it through its methods."""
+    return store_registry(get_registry().data, pretty)
+
+
+def flush_registry() -> bool:
+    """
+    Write any registry changes queued by an open transaction.
+
+    Returns:
+        True if nothing was pending or the write succeeded, False otherwise
+    """
+    pending = _transaction['pending']
+    if pending is None:
+        return True
+    _transaction['pending'] = None
+    pretty = _transaction['pretty']
+    _transaction['pretty'] = False
+    return _persist(pending, pretty)
+
+
+def compact_registry() -> bool:
+    """
+    Fold the journal into the ".models" snapshot.
+
+    Returns:
+        True if there was nothing to compact or the snapshot write succeeded
+    """
+    flush_registry()
+    journal = get_journal_text()
+    if not journal or not journal.as_string() or get_registry_text() is None:
+        return True
+    return _write_text(get_registry(), False)
+
+
+def begin_transaction() -> None:
+    """Start collecting registry writes; transactions nest."""
+    _transaction['depth'] += 1
+
+
+def commit_transaction() -> bool:
+    """
+    Close a transaction, writing the registry once when the outermost one closes.
+
+    Returns:
+        True if successful, False if the final write failed
+    """
+    if _transaction['depth'] == 0:
+        print("Warning: commit_transaction called without an open registry transaction.")
+        return False
+    _transaction['depth'] -= 1
+    if _transaction['depth'] == 0:
+        return flush_registry()
+    return True
+
+
+@contextmanager
+def registry_transaction():
+    """
+    Context manager that batches registry writes into a single serialization.
+
+    Example:
+        with registry_transaction():
+            for obj in objects:
+                add_gear_to_json(obj, prefix, group)
+    """
+    begin_transaction()
+    try:
+        yield
+    finally:
+        commit_transaction()
+
+
+# Dictionary-level helpers, kept for callers that work with the plain model dictionary
+
+def _record(registry: ModelRegistry, record: dict) -> None:
+    # Only mutations of the cached registry can be journaled
+    if registry is _cache['registry']:
+        _journal['records'].append(record)
+
+
+def find_model(model_dict: dict, name: str) -> Optional[Tuple[str, str]]:
+    """
+    Look up the registry entry holding an object name.
+
+    Args:
+        model_dict: Dictionary of model groups
+        name: Object name to look up
+
+    Returns:
+        (group, key) tuple, or None if the name isn't registered
+    """
+    return registry_for(model_dict).find(name)
+
+
+def next_model_key(model_dict: dict, group: str, prefix: str) -> str:
+    """
+    Get a numbered key for a new entry of a group, never one the group had before.
+
+    Args:
+        model_dict: Dictionary of model groups
+        group: Model group the entry goes into
+        prefix: Key prefix, e.g. 'chest_gear_'
+
+    Returns:
+        The key
+    """
+    return registry_for(model_dict).next_key(group, prefix)
+
+
+def add_model(model_dict: dict, group: str, key: str, name: str) -> None:
+    """
+    Add or replace a registry entry, keeping the reverse index in sync.
+
+    Args:
+        model_dict: Dictionary of model groups
+        group: Model group to add to (created if missing)
+        key: Model key within the group
+        name: Object name to store
+    """
+    registry = registry_for(model_dict)
+    registry.add(group, key, name)
+    _record(registry, {'op': 'add', 'g': group, 'k': key, 'n': name})
+
+
+def remove_model(model_dict: dict, group: str, key: str) -> Optional[str]:
+    """
+    Remove a registry entry, keeping the reverse index in sync.
+
+    Args:
+        model_dict: Dictionary of model groups
+        group: Model group to remove from
+        key: Model key within the group
+
+    Returns:
+        The removed object name, or None if the entry didn't exist
+    """
+    registry = registry_for(model_dict)
+    name = registry.remove(group, key)
+    if name is not None:
+        _record(registry, {'op': 'remove', 'g': group, 'k': key})
+    return name
+
+
+def rename_model(model_dict: dict, old: str, new: str) -> Optional[Tuple[str, str]]:
+    """
+    Rename a registered object, keeping the reverse index in sync.
+
+    Args:
+        model_dict: Dictionary of model groups
+        old: Current object name
+        new: New object name
+
+    Returns:
+        (group, key) of the renamed entry, or None if old isn't registered
+    """
+    registry = registry_for(model_dict)
+    entry = registry.rename(old, new)
+    if entry is not None:
+        _record(registry, {'op': 'rename', 'o': old, 'n': new})
+    return entry
+
+
+@persistent
+def _registry_load_post(*args):
+    # A freshly loaded file has its own .models block
+    _transaction['depth'] = 0
+    invalidate()
+
+
+@persistent
+def _registry_save_pre(*args):
+    # Never save a .blend with registry changes still queued, and save a compact snapshot
+    compact_registry()
+
+
+def register():
+    bpy.app.handlers.load_post.append(_registry_load_post)
+    bpy.app.handlers.save_pre.append(_registry_save_pre)
+
+
+def unregister():
+    if _registry_save_pre in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.remove(_registry_save_pre)
+    if _registry_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_registry_load_post)
+    compact_registry()
+    invalidate()
@@ -5,14 +5,14 @@ import bpy
 import json
 import os
 from .json_helpers import setTextBlock
+from .visibility_rules import get_models_file_path
+from .constants import REGISTRY_META_PREFIX
 
 def install_models_data():
     # Install the models data from the tbse models file into Blender's .models text block.
     # This function should be called when setting up the addon for the first time.
     try:
-        # Get the addon directory
-        addon_dir = os.path.dirname(os.path.abspath(__file__))
-        models_file_path = os.path.join(addon_dir, "data", "tbse_models.json")
+        models_file_path = get_models_file_path()
 
         # Read the models file
         if os.path.exists(models_file_path):
@@ -70,6 +70,8 @@ def list_available_objects():
         found_objects = 0
         
         for group_name, group_data in models_data.items():
+            if group_name.startswith(REGISTRY_META_PREFIX):
+                continue
             print(f"\n{group_name}:")
             for model_key, object_name in group_data.items():
                 total_objects += 1
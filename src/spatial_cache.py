@@ -0,0 +1,299 @@
+# Spatial cache for TBSE Body Kit addon
+# Keeps the NumPy vertex/delta arrays and KD-tree/BVH of body meshes between operator runs, keyed by a
+# hash of their vertex buffers so an edited body is re-read, and evicts the least recently used entries
+# once the cache grows past a memory budget. Bone weights are cached per entry too; they aren't part
+# of the hash, so a geometry update of a source mesh (weight painting included) drops them.
+import bpy
+import hashlib
+import numpy as np
+from bpy.app.handlers import persistent
+from collections import OrderedDict
+from mathutils.bvhtree import BVHTree
+from mathutils.kdtree import KDTree
+from typing import Callable, Dict, Hashable, Tuple
+
+# Memory the cached arrays and trees may take before old entries are evicted
+CACHE_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Rough per-item size of the mathutils trees, which don't report their own
+_KDTREE_BYTES_PER_POINT = 48
+_BVHTREE_BYTES_PER_TRIANGLE = 96
+
+# Hash of a body object set -> SpatialEntry, least recently used first, and the bytes they hold
+_cache = OrderedDict()
+_cache_state = {
+    'bytes': 0,
+}
+
+
+def read_coordinates(collection, count: int) -> np.ndarray:
+    """
+    Read the 'co' of a vertex or shape key point collection with one foreach_get.
+
+    Returns:
+        (count, 3) float array
+    """
+    coords = np.empty(count * 3, dtype=np.float32)
+    collection.foreach_get('co', coords)
+    return coords.reshape(count, 3)
+
+
+def to_world(matrix, coords: np.ndarray) -> np.ndarray:
+    """Transform (n, 3) positions by an object's world matrix."""
+    m = np.array(matrix, dtype=np.float32)
+    return coords @ m[:3, :3].T + m[:3, 3]
+
+
+def deltas_to_world(matrix, deltas: np.ndarray) -> np.ndarray:
+    """Transform (n, 3) offsets by an object's world matrix, ignoring translation."""
+    m = np.array(matrix, dtype=np.float32)
+    return deltas @ m[:3, :3].T
+
+
+class SpatialEntry:
+    """
+    Cached spatial data of a set of body meshes, merged into one vertex range.
+
+    The trees are built on first use, since not every caller needs both.
+    """
+    __slots__ = ('basis', 'deltas', 'triangles', 'sources', '_kdtree', '_bvhtree', '_weights')
+
+    def __init__(self, basis: np.ndarray, deltas: Dict[str, np.ndarray], triangles: np.ndarray):
+        self.basis = basis
+        self.deltas = deltas
+        self.triangles = triangles
+        self.sources = frozenset()
+        self._kdtree = None
+        self._bvhtree = None
+        self._weights = {}
+
+    @property
+    def nbytes(self) -> int:
+        size = self.basis.nbytes + self.triangles.nbytes + sum(d.nbytes for d in self.deltas.values())
+        size += sum(weights.nbytes for _, weights in self._weights.values())
+        if self._kdtree is not None:
+            size += len(self.basis) * _KDTREE_BYTES_PER_POINT
+        if self._bvhtree is not None:
+            size += len(self.triangles) * _BVHTREE_BYTES_PER_TRIANGLE
+        return size
+
+    def kdtree(self) -> KDTree:
+        """Get a balanced KD-tree over the basis positions."""
+        if self._kdtree is None:
+            tree = KDTree(len(self.basis))
+            for index, point in enumerate(self.basis):
+                tree.insert(point, index)
+            tree.balance()
+            self._kdtree = tree
+            _account()
+        return self._kdtree
+
+    def bvhtree(self) -> BVHTree:
+        """Get a BVH tree over the basis surface."""
+        if self._bvhtree is None:
+            self._bvhtree = BVHTree.FromPolygons(self.basis.tolist(), self.triangles.tolist())
+            _account()
+        return self._bvhtree
+
+    def bone_weights(self, key: Hashable, read: Callable[[], tuple]) -> tuple:
+        """
+        Get the bone weights of the entry's meshes, calling read on the first use of a key.
+
+        Args:
+            key: What the weights were read for, e.g. the bone and vertex group names
+            read: Returns (bone names, (vertices, bones) weights)
+
+        Returns:
+            The cached (bone names, weights)
+        """
+        weights = self._weights.get(key)
+        if weights is None:
+            weights = self._weights[key] = read()
+            _account()
+        return weights
+
+    def drop_weights(self) -> None:
+        """Forget the cached bone weights."""
+        self._weights.clear()
+
+    def shape_positions(self, name: str) -> np.ndarray:
+        """Get the world positions of a shape key, the basis where no body mesh has it."""
+        deltas = self.deltas.get(name)
+        return self.basis if deltas is None else self.basis + deltas
+
+
+def _read_object(obj, digest) -> tuple:
+    # Reads one mesh's raw buffers, feeding each into the digest as it goes. Nothing derived
+    # (triangles, world space arrays) is built here, so a cache hit costs only these reads
+    mesh = obj.data
+    count = len(mesh.vertices)
+    matrix = np.array(obj.matrix_world, dtype=np.float32)
+    digest.update(matrix.tobytes())
+
+    loops = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loops)
+    digest.update(np.array([count, len(mesh.polygons)], dtype=np.int64).tobytes())
+    digest.update(loops.tobytes())
+
+    shape_keys = mesh.shape_keys
+    local = read_coordinates(shape_keys.reference_key.data if shape_keys else mesh.vertices, count)
+    digest.update(local.tobytes())
+
+    keys = []
+    for key in (shape_keys.key_blocks if shape_keys else ()):
+        if key == shape_keys.reference_key:
+            continue
+        coords = read_coordinates(key.data, count)
+        digest.update(key.name.encode())
+        digest.update(coords.tobytes())
+        keys.append((key.name, coords))
+    return obj, matrix, local, keys
+
+
+def _build_object(raw) -> Tuple[np.ndarray, Dict[str, np.ndarray], np.ndarray]:
+    # Builds one mesh's world space basis, deltas and triangles from its raw buffers
+    obj, matrix, local, keys = raw
+    mesh = obj.data
+    mesh.calc_loop_triangles()
+    triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('vertices', triangles)
+    deltas = {name: deltas_to_world(matrix, coords - local) for name, coords in keys}
+    return to_world(matrix, local), deltas, triangles.reshape(-1, 3)
+
+
+def _merge(parts) -> SpatialEntry:
+    # Concatenates per-object data; a shape some meshes lack gets zero deltas there
+    if not parts:
+        return SpatialEntry(np.zeros((0, 3), dtype=np.float32), {}, np.zeros((0, 3), dtype=np.int32))
+    names = []
+    for _, deltas, _ in parts:
+        names.extend(name for name in deltas if name not in names)
+
+    offsets = np.cumsum([0] + [len(basis) for basis, _, _ in parts])
+    basis = np.concatenate([basis for basis, _, _ in parts])
+    triangles = np.concatenate([tris + offset for (_, _, tris), offset in zip(parts, offsets)])
+    merged = {}
+    for name in names:
+        merged[name] = np.concatenate([
+            deltas.get(name, np.zeros_like(part_basis)) for part_basis, deltas, _ in parts
+        ])
+    return SpatialEntry(basis, merged, triangles)
+
+
+def _read_objects(objects) -> Tuple[bytes, list]:
+    # Raw buffers of the mesh objects and the hash of all of them
+    digest = hashlib.blake2b(digest_size=16)
+    raws = []
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        digest.update(obj.name.encode())
+        raws.append(_read_object(obj, digest))
+    return digest.digest(), raws
+
+
+def _build_entry(raws) -> SpatialEntry:
+    entry = _merge([_build_object(raw) for raw in raws])
+    entry.sources = frozenset(raw[0].name for raw in raws)
+    return entry
+
+
+def read_spatial_entry(objects) -> SpatialEntry:
+    """
+    Build the spatial data of a set of meshes without caching it.
+
+    For meshes that are only used once, such as the gear being checked, which would
+    otherwise push shared body entries out of the cache.
+
+    Args:
+        objects: Mesh objects, merged in the given order
+
+    Returns:
+        A new SpatialEntry
+    """
+    return _build_entry(_read_objects(objects)[1])
+
+
+def get_spatial_entry(objects) -> SpatialEntry:
+    """
+    Get the cached spatial data of a set of body meshes, reading them if they changed.
+
+    The world matrix, loop, vertex and shape key buffers are read with foreach_get and
+    hashed on every call; a matching hash returns the cached arrays and trees, and only
+    a miss triangulates the meshes and builds the world space arrays.
+
+    Args:
+        objects: Body mesh objects, merged in the given order
+
+    Returns:
+        The SpatialEntry for the objects' current data
+    """
+    key, raws = _read_objects(objects)
+    entry = _cache.get(key)
+    if entry is not None:
+        _cache.move_to_end(key)
+        return entry
+
+    entry = _build_entry(raws)
+    _cache[key] = entry
+    _account()
+    return entry
+
+
+def _account() -> None:
+    # Re-totals the cache and drops least recently used entries over budget, keeping the newest
+    _cache_state['bytes'] = sum(entry.nbytes for entry in _cache.values())
+    while _cache_state['bytes'] > CACHE_MEMORY_BUDGET and len(_cache) > 1:
+        _, evicted = _cache.popitem(last=False)
+        _cache_state['bytes'] -= evicted.nbytes
+
+
+def cache_size() -> Tuple[int, int]:
+    """Get the number of cached entries and the bytes they hold."""
+    return len(_cache), _cache_state['bytes']
+
+
+def clear_cache() -> None:
+    """Drop every cached entry."""
+    _cache.clear()
+    _cache_state['bytes'] = 0
+
+
+@persistent
+def _spatial_cache_load_pre(*args):
+    # Entries hold arrays of the old file's meshes
+    clear_cache()
+
+
+@persistent
+def _spatial_cache_depsgraph_handler(scene, depsgraph=None):
+    # Vertex weights have no cheap hash, so cached weights go whenever a source mesh's geometry updates.
+    # Only the IDs of this update are looked at, and nothing at all while no weights are cached
+    if depsgraph is None or not any(entry._weights for entry in _cache.values()):
+        return
+    updated = set()
+    for update in depsgraph.updates:
+        if update.is_updated_geometry:
+            updated.add(getattr(update.id, 'original', update.id).name)
+    if not updated:
+        return
+    for entry in _cache.values():
+        if entry._weights and not entry.sources.isdisjoint(updated):
+            entry.drop_weights()
+    _account()
+
+
+def register():
+    bpy.app.handlers.load_pre.append(_spatial_cache_load_pre)
+    bpy.app.handlers.depsgraph_update_post.append(_spatial_cache_depsgraph_handler)
+
+
+def unregister():
+    handler_lists = (
+        (bpy.app.handlers.depsgraph_update_post, _spatial_cache_depsgraph_handler),
+        (bpy.app.handlers.load_pre, _spatial_cache_load_pre),
+    )
+    for handlers, handler in handler_lists:
+        if handler in handlers:
+            handlers.remove(handler)
+    clear_cache()
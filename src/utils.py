@@ -32,6 +32,29 @@ def safe_hide_objects(obj_names: List[str], hide: bool = True) -> int:
     return processed_count
 
 
+def apply_visibility_diff(desired: Dict[Any, bool]) -> int:
+    """
+    Apply desired visibility, calling hide_set only where the state differs.
+    
+    Args:
+        desired: Dictionary of object -> should be visible
+        
+    Returns:
+        Number of objects whose visibility changed
+    """
+    changed_count = 0
+    
+    for obj, visible in desired.items():
+        try:
+            if obj.hide_get() == visible:
+                obj.hide_set(not visible)
+                changed_count += 1
+        except (ReferenceError, RuntimeError) as e:
+            print(f"Warning: Could not {'show' if visible else 'hide'} object: {e}")
+    
+    return changed_count
+
+
 def set_shape_key_value(master_name: str, index: int, value: float = 1.0) -> bool:
     """
     Safely set shape key value with error handling.
@@ -86,8 +109,12 @@ def reset_shape_keys(master_name: str) -> bool:
             ))
             return False
             
-        for key in bpy.data.shape_keys[master_name].key_blocks:
-            key.value = 0
+        shape_keys = bpy.data.shape_keys[master_name]
+        key_blocks = shape_keys.key_blocks
+        key_blocks.foreach_set('value', [0.0] * len(key_blocks))
+        # foreach_set skips the RNA update, tag the Key so its drivers and users re-evaluate
+        shape_keys.update_tag()
+        _active_shape_keys[master_name] = 0
         return True
         
     except Exception as e:
@@ -95,6 +122,73 @@ def reset_shape_keys(master_name: str) -> bool:
         return False
 
 
+# Master name -> index of the key block switch_shape_key last set to 1 (0 = basis, nothing set)
+_active_shape_keys = {}
+
+
+def switch_shape_key(master_name: str, index: int) -> bool:
+    """
+    Exclusively switch a shape key master to one key block.
+    
+    Only the previously active and the new key block are written, so gear driven
+    from the master only re-evaluates the two affected driver channels. The first
+    switch of a master, or one whose values no longer match the tracked key (changed
+    elsewhere, undo, a loaded file), does a full reset through foreach_set instead.
+    
+    Args:
+        master_name: Name of the shape key master
+        index: Key block to set to 1, 0 (the basis) for none
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        if master_name not in bpy.data.shape_keys:
+            print(ERROR_MESSAGES['SHAPE_KEY_NOT_FOUND'].format(
+                master=master_name,
+                type=master_name.replace(' Master', '')
+            ))
+            return False
+            
+        shape_keys = bpy.data.shape_keys[master_name]
+        key_blocks = shape_keys.key_blocks
+        if not 0 <= index < len(key_blocks):
+            print(ERROR_MESSAGES['SHAPE_KEY_INDEX_ERROR'].format(
+                type=master_name.replace(' Master', ''),
+                index=index
+            ))
+            return False
+        
+        previous = _active_shape_keys.get(master_name)
+        if previous is not None and previous < len(key_blocks):
+            # The tracked key only holds if it is the sole key block at 1, check with one read
+            current = [0.0] * len(key_blocks)
+            key_blocks.foreach_get('value', current)
+            expected = [0.0] * len(key_blocks)
+            if previous:
+                expected[previous] = 1.0
+            if current != expected:
+                previous = None
+        if previous is None or previous >= len(key_blocks):
+            values = [0.0] * len(key_blocks)
+            if index:
+                values[index] = 1.0
+            key_blocks.foreach_set('value', values)
+            shape_keys.update_tag()
+        elif previous != index:
+            if previous:
+                key_blocks[previous].value = 0.0
+            if index:
+                key_blocks[index].value = 1.0
+        
+        _active_shape_keys[master_name] = index
+        return True
+        
+    except Exception as e:
+        print(f"Warning: Error switching shape keys for {master_name} to {index}: {e}")
+        return False
+
+
 def set_active_shape_key_for_objects(obj_names: List[str], index: int) -> int:
     """
     Set active shape key index for multiple objects.
@@ -123,6 +217,29 @@ def set_active_shape_key_for_objects(obj_names: List[str], index: int) -> int:
     return processed_count
 
 
+def apply_shape_plan(plan) -> int:
+    """
+    Execute a shape plan, setting the active shape key only where it differs.
+    
+    Args:
+        plan: Iterable of (bpy.types.Object, active shape key index) pairs
+        
+    Returns:
+        Number of objects changed
+    """
+    changed_count = 0
+    
+    for obj, index in plan:
+        try:
+            if obj.active_shape_key_index != index:
+                obj.active_shape_key_index = index
+                changed_count += 1
+        except (ReferenceError, AttributeError) as e:
+            print(f"Warning: Could not set active shape key: {e}")
+    
+    return changed_count
+
+
 def batch_toggle_visibility(model_groups: Dict[str, List[str]], show_groups: List[str]) -> None:
     """
     Toggle visibility for multiple model groups.
@@ -0,0 +1,109 @@
+# Visibility engine for TBSE Body Kit addon
+# Computes which managed objects should be visible from the compiled visibility rules in one pure pass,
+# then only calls hide_set on objects whose state actually differs
+import bpy
+from typing import Dict, Set, Tuple
+from .constants import GEAR_LIST_GROUPS, GEAR_PROPERTIES
+from .registry import get_registry, ModelRegistry
+from .visibility_rules import get_compiled_rules
+from .object_tags import get_handle_tables
+from .utils import apply_visibility_diff
+from .model_collections import apply_group_exclusion
+
+Entry = Tuple[str, str]
+
+
+def effective_genital_type(tbse_properties) -> str:
+    """Genital type actually shown, after the rule overrides (chonk and xl legs force AMAB)."""
+    rules = get_compiled_rules(get_registry(), tbse_properties.bl_rna.properties)
+    return rules.forced_values(tbse_properties).get('genital_toggle', tbse_properties.genital_toggle)
+
+
+def compute_visible_entries(registry: ModelRegistry, tbse_properties, scene=None) -> Set[Entry]:
+    """
+    Compute the registry entries (group, key) that should be visible.
+
+    Pure function of the kit properties: one lookup per part in the compiled
+    visibility rules, touching no objects. Gear groups are not covered, gear
+    follows the gear lists.
+
+    Args:
+        registry: The model registry
+        tbse_properties: TBSEKIT_TBSEProperties instance
+        scene: Scene holding the piercing toggle groups named by the rules
+
+    Returns:
+        Set of visible (group, key) entries
+    """
+    rules = get_compiled_rules(registry, tbse_properties.bl_rna.properties)
+    visible, filters = rules.lookup(tbse_properties)
+    # Piercing toggles map straight to their models through the compiled piercing tables
+    for group, toggles_prop in filters:
+        toggles = getattr(scene, toggles_prop, None) if scene is not None else None
+        visible |= rules.piercing_entries(toggles_prop, toggles)
+    return visible
+
+
+def compute_desired_visibility(context, entries=None, skip_groups=frozenset()) -> Dict[bpy.types.Object, bool]:
+    """
+    Compute the desired visibility of every managed object.
+
+    Args:
+        context: Blender context
+        entries: Visible registry entries if already computed
+        skip_groups: Groups to leave out, e.g. ones whose collection is excluded
+
+    Returns:
+        Dictionary of object -> should be visible
+    """
+    scene = context.scene
+    tbse_properties = scene.tbse_kit_properties
+    if entries is None:
+        entries = compute_visible_entries(get_registry(), tbse_properties, scene)
+
+    desired = {}
+    gear_groups = set(GEAR_LIST_GROUPS.values())
+    for group, handles in get_handle_tables().items():
+        if group in gear_groups or group in skip_groups:
+            continue
+        for key, obj in handles.items():
+            desired[obj] = (group, key) in entries
+
+    # Gear follows the gear lists: the list toggle and each item's isEnabled flag
+    for gear_type, show_prop in GEAR_PROPERTIES.items():
+        show_gear = getattr(tbse_properties, show_prop)
+        for item in getattr(scene, f'{gear_type}_gear_list'):
+            if item.obj_pointer:
+                desired[item.obj_pointer] = show_gear and item.isEnabled
+
+    return desired
+
+
+def resolve_collection_visibility(context) -> int:
+    """
+    Collection mode: exclude the collections of groups with nothing visible,
+    then diff every object the exclusion doesn't already hide.
+
+    Returns:
+        Number of objects whose visibility changed
+    """
+    scene = context.scene
+    entries = compute_visible_entries(get_registry(), scene.tbse_kit_properties, scene)
+    group_visible = {group: True for group, key in entries}
+    excluded = apply_group_exclusion(context.view_layer, group_visible)
+    return apply_visibility_diff(compute_desired_visibility(context, entries, excluded))
+
+
+def resolve_visibility(context) -> int:
+    """
+    Bring every managed object's visibility in line with the kit properties.
+
+    Args:
+        context: Blender context
+
+    Returns:
+        Number of objects whose visibility changed
+    """
+    if context.scene.tbse_kit_settings.use_collection_visibility:
+        return resolve_collection_visibility(context)
+    return apply_visibility_diff(compute_desired_visibility(context))
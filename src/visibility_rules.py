@@ -0,0 +1,272 @@
+# Visibility rule compiler for TBSE Body Kit addon
+# The body variant rules live declaratively in the "_visibility_rules" section of tbse_models.json,
+# and the piercing toggle -> model mapping in "_piercing_map". Both are compiled once per registry
+# into lookup tables keyed by the property values they depend on, so resolving visibility is one
+# table lookup per part, plus a union of the precomputed model sets of the enabled piercing toggles.
+import json
+import os
+from itertools import product
+from typing import Dict, List, Set, Tuple
+from .constants import VISIBILITY_RULES_KEY, PIERCING_MAP_KEY
+from .registry import ModelRegistry
+
+Entry = Tuple[str, str]
+
+# Metadata sections shipped with the addon, used when the .models block predates them
+_defaults = {
+    'meta': None,
+}
+
+# Last compiled rules and what they were compiled from
+_compiled = {
+    'registry': None,
+    'version': None,
+    'rules': None,
+    'piercings': None,
+    'result': None,
+}
+
+
+def get_models_file_path() -> str:
+    """Get the path of the tbse_models.json file shipped with the addon."""
+    addon_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(addon_dir, "data", "tbse_models.json")
+
+
+def _load_default_meta(section: str) -> dict:
+    if _defaults['meta'] is None:
+        try:
+            with open(get_models_file_path(), 'r') as f:
+                _defaults['meta'] = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load default visibility rules: {e}")
+            _defaults['meta'] = {}
+    section_data = _defaults['meta'].get(section)
+    return section_data if isinstance(section_data, dict) else {}
+
+
+def get_rules(registry: ModelRegistry) -> dict:
+    """Get the visibility rules of the registry, falling back to the ones shipped with the addon."""
+    rules = registry.meta.get(VISIBILITY_RULES_KEY)
+    if isinstance(rules, dict) and rules.get('parts'):
+        return rules
+    return _load_default_meta(VISIBILITY_RULES_KEY)
+
+
+def get_piercing_map(registry: ModelRegistry) -> dict:
+    """Get the piercing toggle mapping of the registry, falling back to the one shipped with the addon."""
+    piercing_map = registry.meta.get(PIERCING_MAP_KEY)
+    if isinstance(piercing_map, dict) and piercing_map:
+        return piercing_map
+    return _load_default_meta(PIERCING_MAP_KEY)
+
+
+def _matches(when: dict, state: dict) -> bool:
+    # A condition value is either a single value or a list of accepted values
+    for prop, accepted in when.items():
+        value = state.get(prop)
+        if isinstance(accepted, list):
+            if value not in accepted:
+                return False
+        elif value != accepted:
+            return False
+    return True
+
+
+def _apply_overrides(overrides: list, state: dict) -> dict:
+    # Forced values, e.g. chonk legs force AMAB; later overrides see earlier ones
+    for override in overrides:
+        if _matches(override.get('when', {}), state):
+            state.update(override.get('set', {}))
+    return state
+
+
+def _property_domain(rna_properties, prop: str) -> tuple:
+    rna_prop = rna_properties[prop]
+    if rna_prop.type == 'BOOLEAN':
+        return (False, True)
+    if rna_prop.type == 'ENUM':
+        return tuple(item.identifier for item in rna_prop.enum_items)
+    raise ValueError(f"visibility rule key '{prop}' must be a boolean or enum property")
+
+
+class CompiledPart:
+    """
+    One rule part compiled to a lookup table.
+
+    Attributes:
+        name: Part name from the rules file
+        keys: Property names the table is keyed by
+        table: Property value tuple -> (visible entries, toggle filters);
+            for piercing toggle groups, toggle property -> its entries
+    """
+    __slots__ = ('name', 'keys', 'table')
+
+    def __init__(self, name: str, keys: Tuple[str, ...], table: dict):
+        self.name = name
+        self.keys = keys
+        self.table = table
+
+
+class CompiledRules:
+    """Visibility rules and piercing toggle mapping compiled against one registry."""
+    __slots__ = ('overrides', 'parts', 'piercings')
+
+    def __init__(self, overrides: list, parts: List[CompiledPart], piercings: Dict[str, CompiledPart]):
+        self.overrides = overrides
+        self.parts = parts
+        self.piercings = piercings
+
+    def forced_values(self, tbse_properties) -> Dict[str, object]:
+        """Get property values forced by the overrides for the current properties."""
+        props = set()
+        for override in self.overrides:
+            props.update(override.get('when', {}))
+            props.update(override.get('set', {}))
+        state = {prop: getattr(tbse_properties, prop) for prop in props}
+        forced = _apply_overrides(self.overrides, dict(state))
+        return {prop: value for prop, value in forced.items() if state[prop] != value}
+
+    def lookup(self, tbse_properties) -> Tuple[Set[Entry], List[Tuple[str, str]]]:
+        """
+        Resolve visibility with one table lookup per part.
+
+        Returns:
+            (visible entries, [(group, toggles property)]) where each toggle filter
+            means "show the members of group enabled in that piercing toggle group"
+        """
+        entries = set()
+        filters = []
+        for part in self.parts:
+            key = tuple(getattr(tbse_properties, prop) for prop in part.keys)
+            part_entries, part_filters = part.table.get(key, (frozenset(), ()))
+            entries |= part_entries
+            filters.extend(part_filters)
+        return entries, filters
+
+    def piercing_entries(self, toggles_prop: str, toggles) -> frozenset:
+        """
+        Get the piercing entries enabled in a toggle group, as the union of the enabled toggles' entries.
+
+        Args:
+            toggles_prop: Scene property name of the toggle group, e.g. "tbse_chest_toggles"
+            toggles: The toggle group instance
+
+        Returns:
+            Frozenset of enabled (group, key) entries
+        """
+        part = self.piercings.get(toggles_prop)
+        if part is None or toggles is None:
+            return frozenset()
+        enabled = [part.table[prop] for prop in part.keys if getattr(toggles, prop)]
+        return frozenset().union(*enabled)
+
+
+def _expand(registry: ModelRegistry, item: str) -> Set[Entry]:
+    # "group" is every member of the group, "group.key" a single member
+    group, _, key = item.partition('.')
+    if key:
+        return {(group, key)}
+    entry = registry.groups.get(group)
+    return {(group, model_key) for model_key in entry.keys} if entry else set()
+
+
+def compile_rules(rules: dict, registry: ModelRegistry, rna_properties) -> CompiledRules:
+    """
+    Compile declarative visibility rules into per-part lookup tables.
+
+    Every combination of a part's key properties is evaluated once: overrides are
+    applied, then the part's rules are matched ("first" stops at the first matching
+    rule, "all" unions every match). A rule shows its "show" items minus its "except"
+    items, so a group can be shown without some of its members.
+
+    Args:
+        rules: The "_visibility_rules" dictionary
+        registry: Registry used to expand group names into entries
+        rna_properties: bl_rna.properties of TBSEKIT_TBSEProperties, for the key domains
+
+    Returns:
+        The compiled rules
+    """
+    overrides = rules.get('overrides', [])
+    parts = []
+    for name, part in rules.get('parts', {}).items():
+        keys = tuple(part.get('keys', ()))
+        first_only = part.get('match', 'all') == 'first'
+
+        # Overrides only apply to parts that see all of the properties they read and write
+        part_overrides = []
+        for override in overrides:
+            touched = set(override.get('when', {})) | set(override.get('set', {}))
+            if touched <= set(keys):
+                part_overrides.append(override)
+            elif set(override.get('set', {})) & set(keys):
+                print(f"Warning: Visibility rule part '{name}' is missing keys {sorted(touched - set(keys))} needed by an override.")
+
+        table = {}
+        domains = [_property_domain(rna_properties, prop) for prop in keys]
+        for values in product(*domains):
+            state = _apply_overrides(part_overrides, dict(zip(keys, values)))
+            entries = set()
+            filters = []
+            for rule in part.get('rules', []):
+                if not _matches(rule.get('when', {}), state):
+                    continue
+                toggles = rule.get('toggles')
+                shown = set()
+                for item in rule.get('show', []):
+                    if toggles:
+                        filters.append((item, toggles))
+                    else:
+                        shown |= _expand(registry, item)
+                for item in rule.get('except', []):
+                    shown -= _expand(registry, item)
+                entries |= shown
+                if first_only:
+                    break
+            table[values] = (frozenset(entries), tuple(filters))
+        parts.append(CompiledPart(name, keys, table))
+    return CompiledRules(overrides, parts, {})
+
+
+def compile_piercing_map(piercing_map: dict, registry: ModelRegistry) -> Dict[str, CompiledPart]:
+    """
+    Compile the piercing toggle -> models mapping into one entry set per toggle.
+
+    The table grows linearly with the number of toggles; the entries of a toggle
+    group are the union of its enabled toggles' sets, taken at lookup time.
+
+    Args:
+        piercing_map: The "_piercing_map" dictionary, toggle group -> {toggle: [group or "group.key"]}
+        registry: Registry used to expand group names into entries
+
+    Returns:
+        Toggle group property name -> compiled part whose table maps each toggle to its entries
+    """
+    piercings = {}
+    for toggles_prop, toggle_models in piercing_map.items():
+        keys = tuple(toggle_models)
+        table = {prop: frozenset().union(*(_expand(registry, item) for item in toggle_models[prop])) for prop in keys}
+        piercings[toggles_prop] = CompiledPart(toggles_prop, keys, table)
+    return piercings
+
+
+def get_compiled_rules(registry: ModelRegistry, rna_properties) -> CompiledRules:
+    """
+    Get the compiled rules for a registry.
+
+    Rules are recompiled when the registry, its version (group expansions depend on
+    the members), the rules or the piercing map changed.
+    """
+    rules = get_rules(registry)
+    piercing_map = get_piercing_map(registry)
+    if (_compiled['registry'] is not registry or _compiled['version'] != registry.version
+            or _compiled['rules'] is not rules or _compiled['piercings'] is not piercing_map):
+        compiled = compile_rules(rules, registry, rna_properties)
+        compiled.piercings = compile_piercing_map(piercing_map, registry)
+        _compiled['result'] = compiled
+        _compiled['registry'] = registry
+        _compiled['version'] = registry.version
+        _compiled['rules'] = rules
+        _compiled['piercings'] = piercing_map
+    return _compiled['result']
@@ -0,0 +1,209 @@
+# Bone weight transfer for TBSE Body Kit addon
+# Copies vertex group weights from the body to gear: every gear vertex blends the weights of its nearest
+# body vertices, keeps its strongest influences and is normalized, all as NumPy arrays. Only groups
+# named after bones of the Skeleton armature are transferred. Body weights are read once and kept
+# with the body's spatial cache entry.
+import bpy
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from .constants import SKELETON_OBJECTS, WEIGHT_SOURCE_GROUPS, MAX_BONE_INFLUENCES
+from .fitting import nearest_neighbours, blend_weights
+from .object_tags import get_group_objects, get_object_tag
+from .spatial_cache import get_spatial_entry, read_coordinates, to_world
+from .utils import assign_skeleton_armature
+
+# Body vertices blended per gear vertex
+DEFAULT_NEIGHBOURS = 4
+
+# FFXIV stores weights as bytes, transferred weights are snapped to the same steps
+WEIGHT_STEPS = 255
+
+
+def get_skeleton_bones() -> Optional[set]:
+    """Get the bone names of the Skeleton armature, or None if there is no Skeleton."""
+    skeleton = bpy.data.objects.get(SKELETON_OBJECTS['ARMATURE'])
+    if skeleton is None or skeleton.type != 'ARMATURE':
+        return None
+    return {bone.name for bone in skeleton.data.bones}
+
+
+def read_body_weights(objects, bones: set) -> Tuple[List[str], np.ndarray]:
+    """
+    Read the bone weights of body meshes into one dense array.
+
+    Rows follow the vertex order of the spatial cache entry for the same objects.
+
+    Args:
+        objects: Body mesh objects
+        bones: Bone names to read, other vertex groups are ignored
+
+    Returns:
+        (bone names, (vertices, bones) weights)
+    """
+    names = []
+    columns = {}
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        for group in obj.vertex_groups:
+            if group.name in bones and group.name not in columns:
+                columns[group.name] = len(names)
+                names.append(group.name)
+
+    total = sum(len(obj.data.vertices) for obj in objects if obj.type == 'MESH')
+    weights = np.zeros((total, len(names)), dtype=np.float32)
+    offset = 0
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        # Vertex group weights have no foreach access, map the object's group indices once
+        lookup = {group.index: columns.get(group.name) for group in obj.vertex_groups}
+        for vertex in obj.data.vertices:
+            row = offset + vertex.index
+            for element in vertex.groups:
+                column = lookup.get(element.group)
+                if column is not None:
+                    weights[row, column] = element.weight
+        offset += len(obj.data.vertices)
+    return names, weights
+
+
+def limit_influences(weights: np.ndarray, max_influences: int = MAX_BONE_INFLUENCES) -> np.ndarray:
+    """
+    Keep the strongest influences of every vertex and normalize them to byte steps summing to one.
+
+    Args:
+        weights: (vertices, bones) weights
+        max_influences: Influences kept per vertex
+
+    Returns:
+        (vertices, bones) weights; vertices without any weight stay all zero
+    """
+    if weights.shape[1] > max_influences:
+        weakest = np.argpartition(weights, -max_influences, axis=1)[:, :-max_influences]
+        weights = weights.copy()
+        np.put_along_axis(weights, weakest, 0.0, axis=1)
+
+    totals = weights.sum(axis=1, keepdims=True)
+    weighted = totals[:, 0] > 0
+    steps = np.zeros(weights.shape, dtype=np.int32)
+    steps[weighted] = np.rint(weights[weighted] / totals[weighted] * WEIGHT_STEPS)
+    # Rounding can miss the total by a step or two, the strongest influence absorbs it
+    strongest = steps.argmax(axis=1)
+    rows = np.nonzero(weighted)[0]
+    steps[rows, strongest[rows]] += WEIGHT_STEPS - steps[rows].sum(axis=1)
+    return steps.astype(np.float32) / WEIGHT_STEPS
+
+
+def get_body_weights(entry, objects, bones: set) -> Tuple[List[str], np.ndarray]:
+    """
+    Get the bone weights of body meshes, read once per spatial cache entry.
+
+    Args:
+        entry: Spatial cache entry of the same objects
+        objects: Body mesh objects
+        bones: Bone names to read
+
+    Returns:
+        (bone names, (vertices, bones) weights), see read_body_weights
+    """
+    groups = tuple(tuple(group.name for group in obj.vertex_groups) for obj in objects if obj.type == 'MESH')
+    return entry.bone_weights((frozenset(bones), groups), lambda: read_body_weights(objects, bones))
+
+
+def write_weights(obj, names: List[str], weights: np.ndarray, bones: set) -> int:
+    """
+    Replace an object's bone vertex groups with transferred weights.
+
+    Every group named after a bone is removed first, also bones the body doesn't weight,
+    so no stale influence survives; other groups, such as masks, are kept.
+    Vertices are added to a group in batches of equal weight, which the byte steps keep
+    to at most WEIGHT_STEPS calls per bone.
+
+    Args:
+        obj: Gear mesh object
+        names: Bone names of the weight columns
+        weights: (vertices, bones) weights
+        bones: Bone names of the Skeleton
+
+    Returns:
+        Number of bone groups written
+    """
+    for group in list(obj.vertex_groups):
+        if group.name in bones or group.name in names:
+            obj.vertex_groups.remove(group)
+
+    written = 0
+    for column, name in enumerate(names):
+        values = weights[:, column]
+        indices = np.nonzero(values)[0]
+        if not len(indices):
+            continue
+        group = obj.vertex_groups.new(name=name)
+        for value in np.unique(values[indices]):
+            group.add(indices[values[indices] == value].tolist(), float(value), 'REPLACE')
+        written += 1
+    return written
+
+
+def weight_source_objects(obj) -> List[bpy.types.Object]:
+    """Get the body objects a gear object takes its weights from, every body group if it isn't registered gear."""
+    tag = get_object_tag(obj)
+    groups = WEIGHT_SOURCE_GROUPS.get(tag[0]) if tag else None
+    if groups is None:
+        groups = list(dict.fromkeys(group for sources in WEIGHT_SOURCE_GROUPS.values() for group in sources))
+    objects = []
+    for group in groups:
+        objects.extend(get_group_objects(group))
+    return objects
+
+
+def transfer_gear_weights(objects, neighbours: int = DEFAULT_NEIGHBOURS,
+                          max_influences: int = MAX_BONE_INFLUENCES) -> Dict[str, int]:
+    """
+    Transfer body bone weights to several gear objects, sharing body data between pieces of the same kind.
+
+    Gear without an Armature modifier gets one pointing at the Skeleton.
+
+    Args:
+        objects: Gear mesh objects
+        neighbours: Body vertices blended per gear vertex
+        max_influences: Bone influences kept per vertex
+
+    Returns:
+        Object name -> number of bone groups written
+    """
+    bones = get_skeleton_bones()
+    if bones is None:
+        print(f"Warning: No '{SKELETON_OBJECTS['ARMATURE']}' armature, cannot transfer weights")
+        return {}
+
+    sources = {}
+    results = {}
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        body_objects = [body for body in weight_source_objects(obj) if body != obj]
+        source_key = tuple(body.name for body in body_objects)
+        if source_key not in sources:
+            entry = get_spatial_entry(body_objects)
+            names, weights = get_body_weights(entry, body_objects, bones)
+            sources[source_key] = (entry, names, weights)
+        entry, names, body_weights = sources[source_key]
+        if not len(entry.basis) or not names:
+            print(f"Warning: No weighted body meshes to transfer to '{obj.name}' from")
+            results[obj.name] = 0
+            continue
+
+        mesh = obj.data
+        shape_keys = mesh.shape_keys
+        count = len(mesh.vertices)
+        basis = read_coordinates(shape_keys.reference_key.data if shape_keys else mesh.vertices, count)
+        indices, distances = nearest_neighbours(entry.kdtree(), to_world(obj.matrix_world, basis),
+                                                min(neighbours, len(entry.basis)))
+        blended = (body_weights[indices] * blend_weights(distances, 0.0)[:, :, None]).sum(axis=1)
+        results[obj.name] = write_weights(obj, names, limit_influences(blended, max_influences), bones)
+
+        if not any(mod.type == 'ARMATURE' for mod in obj.modifiers):
+            assign_skeleton_armature(obj)
+    return results
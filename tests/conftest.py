@@ -0,0 +1,170 @@
+# Test setup for TBSE Body Kit addon
+# The addon modules import bpy and mathutils, which only exist inside Blender. A small in-memory
+# stand-in is installed before they are imported: text blocks, objects and the kit settings, which
+# is all the registry and the NumPy code paths touch. Tests import the modules as "src.<module>".
+import os
+import sys
+import types
+
+import pytest
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ADDON_DIR not in sys.path:
+    sys.path.insert(0, ADDON_DIR)
+
+
+class FakeText:
+    """Text datablock with whole-string access, lines and cursor writes."""
+
+    def __init__(self, name):
+        self.name = name
+        self._source = ""
+        self.writes = 0
+        self.replaced = 0
+        self.current_line_index = 0
+        self.current_character = 0
+        self.select_end_line_index = 0
+        self.select_end_character = 0
+        self.is_dirty = False
+        self.is_modified = False
+
+    @property
+    def lines(self):
+        return [types.SimpleNamespace(body=line) for line in self._source.split("\n")]
+
+    def as_string(self):
+        return self._source
+
+    def from_string(self, source):
+        # Like Blender, leaves the cursor at the end of the new text
+        self._source = source
+        self.writes += 1
+        self.replaced += 1
+        self.is_dirty = True
+        self._move_to_end()
+
+    def _move_to_end(self):
+        lines = self._source.split("\n")
+        self.current_line_index = self.select_end_line_index = len(lines) - 1
+        self.current_character = self.select_end_character = len(lines[-1])
+
+    def write(self, source):
+        # Inserts at the cursor like Blender, which must be a collapsed selection
+        assert (self.current_line_index, self.current_character) == (self.select_end_line_index, self.select_end_character)
+        lines = self._source.split("\n")
+        offset = sum(len(line) + 1 for line in lines[:self.current_line_index]) + self.current_character
+        self._source = self._source[:offset] + source + self._source[offset:]
+        self.writes += 1
+        self.is_dirty = True
+        lines = self._source[:offset + len(source)].split("\n")
+        self.current_line_index = self.select_end_line_index = len(lines) - 1
+        self.current_character = self.select_end_character = len(lines[-1])
+
+    def clear(self):
+        self._source = ""
+        self.writes += 1
+        self.is_dirty = True
+        self._move_to_end()
+
+    def as_pointer(self):
+        return id(self)
+
+
+class FakeCollection(dict):
+    """Name -> datablock collection with the bpy.data get/new/remove interface."""
+
+    def __init__(self, factory=None):
+        super().__init__()
+        self._factory = factory
+
+    def new(self, name, *args):
+        item = self._factory(name, *args)
+        self[name] = item
+        return item
+
+    def remove(self, item):
+        self.pop(item.name, None)
+
+    def __iter__(self):
+        return iter(list(self.values()))
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+def _namespace_module(name, factory, **attrs):
+    # Any attribute of the module is created on first access, e.g. every bpy.types class
+    module = _module(name, **attrs)
+    created = {}
+
+    def __getattr__(attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        if attr not in created:
+            created[attr] = factory(attr)
+        return created[attr]
+
+    module.__getattr__ = __getattr__
+    return module
+
+
+def _property(*args, **kwargs):
+    return None
+
+
+def _install_stubs():
+    handlers = _module('bpy.app.handlers', persistent=lambda func: func, load_pre=[], load_post=[],
+                       save_pre=[], undo_post=[], redo_post=[], depsgraph_update_post=[])
+    timers = _module('bpy.app.timers', register=lambda *args, **kwargs: None,
+                     unregister=lambda *args: None, is_registered=lambda *args: False)
+    app = _module('bpy.app', handlers=handlers, timers=timers)
+    settings = types.SimpleNamespace(use_registry_journal=False)
+    context = types.SimpleNamespace(scene=types.SimpleNamespace(tbse_kit_settings=settings))
+    data = types.SimpleNamespace(texts=FakeCollection(FakeText), objects=FakeCollection(),
+                                 shape_keys=FakeCollection())
+    bpy_types = _namespace_module('bpy.types', lambda attr: type(attr, (), {}), Text=FakeText)
+    props = _namespace_module('bpy.props', lambda attr: _property)
+    bpy_utils = _module('bpy.utils', register_class=lambda cls: None, unregister_class=lambda cls: None)
+    bpy = _module('bpy', app=app, data=data, context=context, types=bpy_types, props=props, utils=bpy_utils,
+                  msgbus=types.SimpleNamespace(subscribe_rna=lambda **kwargs: None, clear_by_owner=lambda owner: None))
+    bpy.__path__ = []
+    _module('bpy_extras')
+    _namespace_module('bpy_extras.io_utils', lambda attr: type(attr, (), {}))
+
+    class _Tree:
+        # Only imported for annotations here; tests that query trees pass their own
+        pass
+
+    _module('mathutils', Vector=tuple)
+    _module('mathutils.kdtree', KDTree=_Tree)
+    _module('mathutils.bvhtree', BVHTree=_Tree)
+
+
+if 'bpy' not in sys.modules:
+    _install_stubs()
+
+
+@pytest.fixture
+def bpy_data():
+    """Empty bpy.data for one test."""
+    import bpy
+    bpy.data.texts.clear()
+    bpy.data.objects.clear()
+    bpy.data.shape_keys.clear()
+    bpy.context.scene.tbse_kit_settings.use_registry_journal = False
+    return bpy.data
+
+
+@pytest.fixture
+def registry(bpy_data):
+    """The registry module with its caches and transaction state reset."""
+    from src import registry as module
+    module._transaction['depth'] = 0
+    module.invalidate()
+    yield module
+    module._transaction['depth'] = 0
+    module.invalidate()
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.clipping import _push_out_vectors
+
+
+def test_push_out_keeps_the_deepest_push_per_vertex():
+    triangles = np.array([[0, 1, 2], [1, 2, 3]], dtype=np.int64)
+    # Face 1 clips deeper, so the shared vertices 1 and 2 follow its normal
+    faces = np.array([0, 1, 0], dtype=np.int64)
+    depths = np.array([0.01, 0.05, 0.02], dtype=np.float32)
+    normals = np.array([[0, 0, 1], [1, 0, 0], [0, 0, 1]], dtype=np.float32)
+    vectors = _push_out_vectors(triangles, 5, faces, depths, normals, 0.0)
+
+    np.testing.assert_allclose(vectors[0], [0, 0, 0.02], atol=1e-7)
+    np.testing.assert_allclose(vectors[1], [0.05, 0, 0], atol=1e-7)
+    np.testing.assert_allclose(vectors[2], [0.05, 0, 0], atol=1e-7)
+    np.testing.assert_allclose(vectors[3], [0.05, 0, 0], atol=1e-7)
+    assert not vectors[4].any()
+
+
+def test_push_out_adds_the_margin():
+    triangles = np.array([[0, 1, 2]], dtype=np.int64)
+    vectors = _push_out_vectors(triangles, 3, np.array([0]), np.array([0.01], dtype=np.float32),
+                                np.array([[0, 1, 0]], dtype=np.float32), 0.002)
+    np.testing.assert_allclose(vectors[:, 1], [0.012] * 3, atol=1e-7)
+
+
+def test_push_out_is_independent_of_clip_order():
+    triangles = np.array([[0, 1, 2]] * 6, dtype=np.int64)
+    faces = np.arange(6)
+    depths = np.array([0.03, 0.01, 0.06, 0.02, 0.05, 0.04], dtype=np.float32)
+    normals = np.eye(3, dtype=np.float32)[faces % 3]
+    expected = _push_out_vectors(triangles, 3, faces, depths, normals, 0.0)
+    for seed in range(5):
+        order = np.random.default_rng(seed).permutation(6)
+        vectors = _push_out_vectors(triangles, 3, faces[order], depths[order], normals[order], 0.0)
+        np.testing.assert_array_equal(vectors, expected)
+    np.testing.assert_allclose(expected[0], [0, 0, 0.06], atol=1e-7)
+
+
+def test_hand_gear_is_tested_against_the_hands(monkeypatch):
+    from src import clipping
+    from src.spatial_cache import SpatialEntry
+
+    requested = []
+    gear = SpatialEntry(np.zeros((3, 3), dtype=np.float32), {}, np.array([[0, 1, 2]], dtype=np.int32))
+    body = SpatialEntry(np.zeros((0, 3), dtype=np.float32), {}, np.zeros((0, 3), dtype=np.int32))
+    obj = SimpleNamespace(name="Gloves", type='MESH')
+    monkeypatch.setattr(clipping, "get_object_tag", lambda o: ("gear_hands", "hand_gear_1"))
+    monkeypatch.setattr(clipping, "get_group_objects", lambda group: requested.append(group) or ())
+    monkeypatch.setattr(clipping, "read_spatial_entry", lambda objects: gear)
+    monkeypatch.setattr(clipping, "get_spatial_entry", lambda objects: body)
+    monkeypatch.setattr(clipping, "master_shapes", lambda master: {"Chest Master": ["TBSE", "Slim"],
+                                                                   "Leg Master": ["TBSE", "Rue"]}[master])
+    monkeypatch.setattr(clipping, "BVHTree", SimpleNamespace(FromPolygons=lambda *args: None))
+
+    results = clipping.check_object(obj)
+    assert requested == ["body_hands"]
+    assert set(results) == {("TBSE", "TBSE"), ("TBSE", "Rue"), ("Slim", "TBSE"), ("Slim", "Rue")}
+    assert not any(results.values())
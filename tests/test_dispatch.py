@@ -0,0 +1,140 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src import dispatch, history
+
+
+class _Scene:
+    def __init__(self, items):
+        self.items = items
+
+    def path_resolve(self, path):
+        index = int(path[len("gear_list["):-1])
+        if index >= len(self.items):
+            raise ValueError(path)
+        return self.items[index]
+
+
+class _Item:
+    def __init__(self, scene, index):
+        self.id_data = scene
+        self.index = index
+
+    def path_from_id(self):
+        return f"gear_list[{self.index}]"
+
+
+@pytest.fixture
+def context(monkeypatch):
+    monkeypatch.setattr(history, "record_state", lambda scene, push=True: None)
+    dispatch.cancel_deferred()
+    settings = SimpleNamespace(use_deferred_updates=True, deferred_update_delay=0.1)
+    yield SimpleNamespace(scene=SimpleNamespace(tbse_kit_settings=settings))
+    dispatch.cancel_deferred()
+
+
+def test_deferred_owner_removed_before_flush_is_skipped(context):
+    calls = []
+    toggle = dispatch.deferrable(lambda owner, ctx: calls.append(owner))
+    scene = _Scene([])
+    scene.items.append(_Item(scene, 0))
+    toggle(scene.items[0], context)
+    scene.items.clear()
+    dispatch.flush_updates(context)
+    assert calls == []
+
+
+def test_deferred_owner_is_looked_up_again(context):
+    calls = []
+    toggle = dispatch.deferrable(lambda owner, ctx: calls.append(owner))
+    scene = _Scene([])
+    scene.items.append(_Item(scene, 0))
+    toggle(scene.items[0], context)
+    dispatch.flush_updates(context)
+    assert calls == [scene.items[0]]
+
+
+@pytest.fixture
+def resolved(monkeypatch):
+    calls = []
+    monkeypatch.setattr(dispatch, "resolve_visibility", lambda ctx: calls.append(ctx) or 0)
+    return calls
+
+
+def test_bulk_update_runs_each_callback_once(context, resolved):
+    context.scene.tbse_kit_settings.use_deferred_updates = False
+    calls = []
+    toggle = dispatch.deferrable(lambda owner, ctx: calls.append(owner))
+    with dispatch.bulk_update(context):
+        for _ in range(5):
+            toggle("props", context)
+        assert calls == []
+    assert calls == ["props"]
+
+
+def test_nested_bulk_updates_flush_once_at_the_outermost(context, resolved):
+    context.scene.tbse_kit_settings.use_deferred_updates = False
+    calls = []
+    toggle = dispatch.deferrable(lambda owner, ctx: calls.append(owner))
+    with dispatch.bulk_update(context):
+        with dispatch.bulk_update(context):
+            toggle("props", context)
+        assert calls == []
+    assert calls == ["props"]
+
+
+def test_callbacks_run_in_stage_order(context, resolved):
+    context.scene.tbse_kit_settings.use_deferred_updates = False
+    order = []
+    visibility = dispatch.deferrable(lambda owner, ctx: order.append("visibility"))
+    shapes = dispatch.deferrable(lambda owner, ctx: order.append("shapes"), stage=dispatch.STAGE_SHAPES)
+    forced = dispatch.deferrable(lambda owner, ctx: order.append("properties"), stage=dispatch.STAGE_PROPERTIES)
+    with dispatch.bulk_update(context):
+        visibility("props", context)
+        shapes("props", context)
+        forced("props", context)
+    assert order == ["properties", "shapes", "visibility"]
+
+
+def test_callbacks_queued_by_callbacks_run_in_the_same_event(context, resolved):
+    context.scene.tbse_kit_settings.use_deferred_updates = False
+    order = []
+    shapes = dispatch.deferrable(lambda owner, ctx: order.append("shapes"), stage=dispatch.STAGE_SHAPES)
+
+    @dispatch.deferrable(stage=dispatch.STAGE_PROPERTIES)
+    def forced(owner, ctx):
+        order.append("properties")
+        shapes(owner, ctx)
+
+    forced("props", context)
+    assert order == ["properties", "shapes"]
+
+
+def test_endless_cascades_stop_after_max_passes(context, resolved, capsys):
+    context.scene.tbse_kit_settings.use_deferred_updates = False
+    runs = []
+
+    @dispatch.deferrable
+    def cascade(owner, ctx):
+        runs.append(owner)
+        cascade(owner, ctx)
+
+    cascade("props", context)
+    assert len(runs) == dispatch.MAX_FLUSH_PASSES
+    assert "still pending" in capsys.readouterr().out
+    assert dispatch._dispatch['pending'] == {}
+
+
+def test_visibility_resolves_once_per_event(context, resolved):
+    context.scene.tbse_kit_settings.use_deferred_updates = False
+    first = dispatch.deferrable(lambda owner, ctx: dispatch.request_visibility(ctx))
+    second = dispatch.deferrable(lambda owner, ctx: dispatch.request_visibility(ctx))
+    with dispatch.bulk_update(context):
+        first("props", context)
+        second("props", context)
+        assert dispatch.request_visibility(context) == 0
+    assert resolved == [context]
+    # Outside an event the request resolves right away
+    dispatch.request_visibility(context)
+    assert len(resolved) == 2
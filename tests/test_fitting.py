@@ -0,0 +1,58 @@
+import numpy as np
+
+from src.fitting import blend_weights, nearest_neighbours
+
+
+class BruteForceTree:
+    """KDTree stand-in answering find_n by scanning every point."""
+
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=np.float32)
+
+    def find_n(self, point, count):
+        distances = np.linalg.norm(self.points - np.asarray(point), axis=1)
+        order = np.argsort(distances, kind='stable')[:count]
+        return [(tuple(self.points[index]), int(index), float(distances[index])) for index in order]
+
+
+def test_blend_weights_rows_sum_to_one_without_falloff():
+    weights = blend_weights(np.array([[1.0, 1.0], [1.0, 3.0]], dtype=np.float32), 0.0)
+    np.testing.assert_allclose(weights.sum(axis=1), [1.0, 1.0], rtol=1e-6)
+    np.testing.assert_allclose(weights[1], [0.75, 0.25], rtol=1e-6)
+
+
+def test_blend_weights_favour_coincident_points():
+    weights = blend_weights(np.array([[0.0, 1.0]], dtype=np.float32), 0.0)
+    assert weights[0, 0] > 0.999
+
+
+def test_blend_weights_fade_with_distance_from_the_body():
+    distances = np.array([[0.0, 0.1], [0.5, 0.6], [2.0, 2.1]], dtype=np.float32)
+    weights = blend_weights(distances, 1.0)
+    np.testing.assert_allclose(weights.sum(axis=1), [1.0, 0.5, 0.0], atol=1e-6)
+
+
+def test_nearest_neighbours_pads_short_results():
+    tree = BruteForceTree([[0, 0, 0], [1, 0, 0], [5, 0, 0]])
+    indices, distances = nearest_neighbours(tree, np.array([[0.9, 0, 0]], dtype=np.float32), 2)
+    assert indices.tolist() == [[1, 0]]
+    np.testing.assert_allclose(distances, [[0.1, 0.9]], rtol=1e-5)
+
+    class ShortTree(BruteForceTree):
+        def find_n(self, point, count):
+            return super().find_n(point, 1)
+
+    indices, _ = nearest_neighbours(ShortTree([[0, 0, 0], [1, 0, 0]]), np.zeros((1, 3), dtype=np.float32), 3)
+    assert indices.tolist() == [[0, 0, 0]]
+
+
+def test_gear_is_fitted_against_the_body_part_it_covers(monkeypatch):
+    from src import fitting
+
+    bodies = {"body_chest": ("Torso",), "body_hands": ("Hands",), "body_feet": ("Feet",)}
+    monkeypatch.setattr(fitting, "get_group_objects", lambda group: bodies.get(group, ()))
+    for group, expected in (("gear_hands", ["Hands"]), ("gear_feet", ["Feet"]), ("gear_chest", ["Torso"])):
+        monkeypatch.setattr(fitting, "get_object_tag", lambda obj, group=group: (group, "key"))
+        assert fitting.fit_source_objects(object()) == expected
+    monkeypatch.setattr(fitting, "get_object_tag", lambda obj: None)
+    assert fitting.fit_source_objects(object()) == []
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src import gear_shapes
+
+
+def _driver(key_name, target_id, var_name='value', data_path=None):
+    target = SimpleNamespace(id=target_id, id_type='KEY', data_path=data_path or f'key_blocks["{key_name}"].value')
+    var = SimpleNamespace(name=var_name, targets=[target])
+    return SimpleNamespace(data_path=f'key_blocks["{key_name}"].value',
+                           driver=SimpleNamespace(is_valid=True, variables=[var]))
+
+
+class _Master:
+    def __init__(self, name, *blocks):
+        self.name = name
+        self.id_type = 'KEY'
+        self.blocks = [SimpleNamespace(name=block) for block in blocks]
+        self.key_blocks = self
+
+    def get(self, name):
+        return next((block for block in self.blocks if block.name == name), None)
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+
+@pytest.fixture
+def gear(monkeypatch, bpy_data):
+    master = _Master("Chest Master", "TBSE", "Slim", "Omega")
+    bpy_data.shape_keys[master.name] = master
+    shape_keys = _Master("Key.001", "TBSE", "Slim", "Omega", "Corrective")
+    shape_keys.animation_data = SimpleNamespace(drivers=[])
+    obj = SimpleNamespace(name="Top", type='MESH', data=SimpleNamespace(shape_keys=shape_keys))
+    monkeypatch.setattr(gear_shapes, "get_group_objects",
+                        lambda group: [obj] if group == "gear_chest" else [])
+    return master, shape_keys
+
+
+def _scene(mode):
+    return SimpleNamespace(tbse_kit_settings=SimpleNamespace(gear_shape_mode=mode))
+
+
+def test_user_drivers_are_not_reported(gear):
+    master, shape_keys = gear
+    helper = _Master("Helper", "Ctrl")
+    shape_keys.animation_data.drivers[:] = [
+        _driver("Slim", master),
+        _driver("Omega", master),
+        _driver("Corrective", helper, var_name='ctrl', data_path='key_blocks["Ctrl"].value'),
+    ]
+    assert gear_shapes.audit_gear_drivers(_scene('DRIVERS')) == []
+    # Push mode only drops the master drivers
+    issues = gear_shapes.audit_gear_drivers(_scene('PUSH'))
+    assert sorted(issues) == [("Top", "Omega", "redundant"), ("Top", "Slim", "redundant")]
+
+
+def test_kit_driver_with_missing_master_is_broken(gear):
+    master, shape_keys = gear
+    shape_keys.animation_data.drivers[:] = [_driver("Slim", None), _driver("Omega", master)]
+    assert gear_shapes.audit_gear_drivers(_scene('DRIVERS')) == [("Top", "Slim", "broken")]
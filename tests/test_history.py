@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src import dispatch, history
+
+
+@pytest.fixture
+def scene(monkeypatch):
+    scene = SimpleNamespace(state={"chest": "tbse"})
+    monkeypatch.setattr(history, "capture_state", lambda s: dict(s.state))
+
+    def apply_state(context, state):
+        context.scene.state = dict(state)
+        return 1
+
+    monkeypatch.setattr(history, "apply_state", apply_state)
+    monkeypatch.setattr(dispatch, "resolve_visibility", lambda ctx: 0)
+    history.clear_history()
+    history.record_state(scene)
+    yield scene
+    history.clear_history()
+    dispatch.cancel_deferred()
+
+
+def test_undo_and_redo_restore_captured_states(scene):
+    context = SimpleNamespace(scene=scene)
+    for shape in ("slim", "omega"):
+        scene.state = {"chest": shape}
+        assert history.record_state(scene)
+    assert history.undo_state(context) == 1
+    assert scene.state == {"chest": "slim"}
+    assert history.undo_state(context) == 1
+    assert scene.state == {"chest": "tbse"}
+    assert history.undo_state(context) is None
+    history.redo_state(context)
+    history.redo_state(context)
+    assert scene.state == {"chest": "omega"}
+    assert not history.has_redo()
+
+
+def test_history_is_trimmed_to_max_history(scene):
+    for index in range(history.MAX_HISTORY + 10):
+        scene.state = {"chest": index}
+        history.record_state(scene)
+    assert len(history._history['undo']) == history.MAX_HISTORY
+    # The oldest steps were dropped, the newest is the state before the last
+    assert history._history['undo'][-1] == {"chest": history.MAX_HISTORY + 8}
+    assert history._history['undo'][0] == {"chest": 9}
+
+
+def test_only_user_edits_push_steps(scene):
+    settings = SimpleNamespace(use_deferred_updates=False)
+    context = SimpleNamespace(scene=scene)
+    scene.tbse_kit_settings = settings
+
+    @dispatch.deferrable
+    def edit(owner, ctx):
+        pass
+
+    # A bulk apply (looks, loadouts) moves the baseline without a step
+    with dispatch.bulk_update(context):
+        scene.state = {"chest": "slim"}
+    assert not history.has_undo()
+
+    # A property edited in the UI is a step back to the applied state
+    scene.state = {"chest": "omega"}
+    edit("props", context)
+    assert history._history['undo'] == [{"chest": "slim"}]
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+from src.loadouts import apply_gear_bits, capture_gear_bits, capture_gear_keys, decode_bits, encode_bits
+
+
+def test_bits_round_trip():
+    flags = [True, False, False, True, True] + [False] * 60 + [True]
+    assert decode_bits(encode_bits(flags)) == flags
+
+
+def test_encoding_is_count_and_hex():
+    assert encode_bits([True, False, True]) == "3:5"
+    assert encode_bits([]) == "0:0"
+
+
+def test_malformed_bits_decode_to_nothing():
+    assert decode_bits("") == []
+    assert decode_bits("x:zz") == []
+
+
+class _Obj:
+    def __init__(self, name, key=None):
+        self.name = name
+        self.tags = {"tbse_group": "gear_chest", "tbse_key": key} if key else {}
+
+    def get(self, prop):
+        return self.tags.get(prop)
+
+
+class _Item(dict):
+    def __init__(self, obj, enabled):
+        super().__init__(isEnabled=enabled)
+        self.obj_pointer = obj
+
+    @property
+    def isEnabled(self):
+        return self['isEnabled']
+
+
+def _scene(items):
+    props = SimpleNamespace(show_chest_gear=True, show_leg_gear=True, show_hand_gear=True, show_feet_gear=True)
+    return SimpleNamespace(tbse_kit_properties=props, chest_gear_list=items, leg_gear_list=[],
+                           hand_gear_list=[], feet_gear_list=[])
+
+
+def test_keyed_bits_follow_items_across_reorder():
+    top, coat, hat = _Obj("Top", "chest_gear_1"), _Obj("Coat", "chest_gear_2"), _Obj("Hat")
+    scene = _scene([_Item(top, True), _Item(coat, False), _Item(hat, True)])
+    bits, keys = capture_gear_bits(scene), capture_gear_keys(scene)
+    assert keys["chest"] == ["chest_gear_1", "chest_gear_2", "Hat"]
+
+    # Reorder, drop the top and flip everything; applying restores each item's own flag
+    scene.chest_gear_list[:] = [_Item(hat, False), _Item(coat, True)]
+    desired = apply_gear_bits(scene, bits, keys)
+    assert [item.isEnabled for item in scene.chest_gear_list] == [True, False]
+    assert desired == {hat: True, coat: False}
+
+
+def test_unknown_keys_keep_their_flag():
+    scene = _scene([_Item(_Obj("New", "chest_gear_9"), True)])
+    apply_gear_bits(scene, {"chest": encode_bits([False])}, {"chest": ["chest_gear_1"]})
+    assert scene.chest_gear_list[0].isEnabled
+
+
+class _Gear(dict):
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+
+def test_new_gear_never_takes_a_removed_key(registry, bpy_data):
+    from src.operators import add_gear_to_json, remove_gear_from_json
+    top, coat = _Gear("Top"), _Gear("Coat")
+    add_gear_to_json(top, "chest_gear_", "gear_chest")
+    add_gear_to_json(coat, "chest_gear_", "gear_chest")
+    scene = _scene([_Item(top, False), _Item(coat, True)])
+    bits, keys = capture_gear_bits(scene), capture_gear_keys(scene)
+
+    # Remove the enabled coat, then add a hat: it must not inherit the coat's key and flag
+    remove_gear_from_json(coat, "gear_chest")
+    hat = _Gear("Hat")
+    add_gear_to_json(hat, "chest_gear_", "gear_chest")
+    assert hat["tbse_key"] not in keys["chest"]
+    scene.chest_gear_list[:] = [_Item(top, False), _Item(hat, False)]
+    apply_gear_bits(scene, bits, keys)
+    assert [item.isEnabled for item in scene.chest_gear_list] == [False, False]
+
+
+def test_key_sequence_survives_a_reload(registry, bpy_data):
+    reg = registry.get_registry()
+    registry.add_model(reg.data, "gear_chest", "chest_gear_1", "Top")
+    registry.add_model(reg.data, "gear_chest", "chest_gear_2", "Coat")
+    registry.remove_model(reg.data, "gear_chest", "chest_gear_2")
+    registry.store_registry(reg.data)
+    registry.invalidate()
+    assert registry.next_model_key(registry.load_registry(), "gear_chest", "chest_gear_") == "chest_gear_3"
@@ -0,0 +1,98 @@
+import json
+from types import SimpleNamespace
+
+import bpy
+import pytest
+
+
+class FakeObject(dict, bpy.types.Object):
+    """Object with ID custom properties."""
+
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+    def as_pointer(self):
+        return id(self)
+
+
+def _setup(bpy_data, registry, names):
+    bpy_data.texts.new(".models").from_string(json.dumps({"gear_chest": {f"chest_gear_{n}": n for n in names}}))
+    for name in names:
+        bpy_data.objects[name] = FakeObject(name)
+
+
+def test_tables_find_registered_objects_and_tag_them(registry, bpy_data):
+    from src import object_tags
+    _setup(bpy_data, registry, ["Top", "Coat"])
+    object_tags.clear_handle_tables()
+    assert [obj.name for obj in object_tags.get_group_objects("gear_chest")] == ["Top", "Coat"]
+    assert object_tags.get_object_tag(bpy_data.objects["Top"]) == ("gear_chest", "chest_gear_Top")
+
+
+def test_delete_and_add_in_one_update_drops_the_tables(registry, bpy_data):
+    from src import object_tags
+    _setup(bpy_data, registry, ["Top", "Coat"])
+    object_tags.clear_handle_tables()
+    object_tags.get_handle_tables()
+
+    del bpy_data.objects["Coat"]
+    bpy_data.objects["Cube"] = FakeObject("Cube")
+    object_tags._tags_depsgraph_handler(None)
+    assert object_tags._tables['handles'] is None
+
+
+def test_missing_name_appearing_drops_the_tables(registry, bpy_data):
+    from src import object_tags
+    _setup(bpy_data, registry, ["Top"])
+    del bpy_data.objects["Top"]
+    object_tags.clear_handle_tables()
+    assert object_tags.get_group_objects("gear_chest") == ()
+
+    # A rename made from Python doesn't change the object set
+    cube = bpy_data.objects.pop("Cube", None) or FakeObject("Cube")
+    bpy_data.objects["Cube"] = cube
+    object_tags.rebuild_handle_tables()
+    del bpy_data.objects["Cube"]
+    cube.name = "Top"
+    bpy_data.objects["Top"] = cube
+    object_tags._tags_depsgraph_handler(None)
+    assert object_tags._tables['handles'] is None
+    assert [obj.name for obj in object_tags.get_group_objects("gear_chest")] == ["Top"]
+
+
+def test_unchanged_objects_keep_the_tables(registry, bpy_data):
+    from src import object_tags
+    _setup(bpy_data, registry, ["Top"])
+    object_tags.clear_handle_tables()
+    handles = object_tags.get_handle_tables()
+    object_tags._tags_depsgraph_handler(None)
+    assert object_tags._tables['handles'] is handles
+
+
+def _depsgraph(*updated, objects=True):
+    return SimpleNamespace(id_type_updated=lambda id_type: objects and id_type == 'OBJECT',
+                           updates=[SimpleNamespace(id=obj) for obj in updated])
+
+
+def test_transforms_keep_the_tables_without_a_full_scan(registry, bpy_data, monkeypatch):
+    from src import object_tags
+    _setup(bpy_data, registry, ["Top", "Coat"])
+    object_tags.clear_handle_tables()
+    handles = object_tags.get_handle_tables()
+    monkeypatch.setattr(object_tags, "_object_ids", lambda: pytest.fail("the handler scanned every object"))
+    object_tags._tags_depsgraph_handler(None, _depsgraph(objects=False))
+    object_tags._tags_depsgraph_handler(None, _depsgraph(bpy_data.objects["Top"]))
+    assert object_tags._tables['handles'] is handles
+
+
+def test_delete_and_add_are_found_among_the_updates(registry, bpy_data, monkeypatch):
+    from src import object_tags
+    _setup(bpy_data, registry, ["Top", "Coat"])
+    object_tags.clear_handle_tables()
+    object_tags.get_handle_tables()
+    monkeypatch.setattr(object_tags, "_object_ids", lambda: pytest.fail("the handler scanned every object"))
+    del bpy_data.objects["Coat"]
+    cube = bpy_data.objects["Cube"] = FakeObject("Cube")
+    object_tags._tags_depsgraph_handler(None, _depsgraph(cube))
+    assert object_tags._tables['handles'] is None
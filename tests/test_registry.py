@@ -0,0 +1,200 @@
+import json
+
+
+def _seed(bpy_data, data):
+    bpy_data.texts.new(".models").from_string(json.dumps(data))
+
+
+def test_registry_indexes_groups_and_skips_meta(registry, bpy_data):
+    _seed(bpy_data, {"body_chest": {"tbse": "Chest TBSE", "slim": "Chest Slim"}, "_visibility_rules": {"parts": {}}})
+    reg = registry.get_registry()
+    assert reg.models("body_chest") == ("Chest TBSE", "Chest Slim")
+    assert reg.find("Chest Slim") == ("body_chest", "slim")
+    assert "_visibility_rules" not in reg.groups
+    assert "_visibility_rules" in reg.meta
+
+
+def test_registry_drops_malformed_entries(registry, bpy_data):
+    _seed(bpy_data, {"body_chest": {"tbse": "Chest TBSE", "bad": 3}, "broken": []})
+    reg = registry.get_registry()
+    assert reg.models("body_chest") == ("Chest TBSE",)
+    assert "broken" not in reg.groups
+
+
+def test_registry_is_reused_until_the_text_changes(registry, bpy_data):
+    _seed(bpy_data, {"body_chest": {"tbse": "Chest TBSE"}})
+    first = registry.get_registry()
+    assert registry.get_registry() is first
+    bpy_data.texts[".models"].from_string(json.dumps({"body_chest": {"tbse": "Renamed"}}))
+    second = registry.get_registry()
+    assert second is not first
+    assert second.get("body_chest", "tbse") == "Renamed"
+
+
+def test_unchanged_text_is_not_read_again(registry, bpy_data, monkeypatch):
+    _seed(bpy_data, {"body_chest": {"tbse": "Chest TBSE"}})
+    text = bpy_data.texts[".models"]
+    first = registry.get_registry()
+    reads = []
+    monkeypatch.setattr(text, "as_string", lambda: reads.append(1) or text._source)
+    for _ in range(5):
+        assert registry.get_registry() is first
+    assert reads == []
+
+
+def test_mutations_keep_index_and_version_in_sync(registry, bpy_data):
+    _seed(bpy_data, {"gear_chest": {"chest_gear_a": "Top"}})
+    reg = registry.get_registry()
+    version = reg.version
+    registry.add_model(reg.data, "gear_chest", "chest_gear_b", "Coat")
+    assert reg.find("Coat") == ("gear_chest", "chest_gear_b")
+    registry.rename_model(reg.data, "Top", "Shirt")
+    assert reg.find("Top") is None
+    assert reg.get("gear_chest", "chest_gear_a") == "Shirt"
+    assert registry.remove_model(reg.data, "gear_chest", "chest_gear_b") == "Coat"
+    assert reg.find("Coat") is None
+    assert reg.version == version + 3
+
+
+def test_reserved_sections_cannot_become_groups(registry, bpy_data):
+    _seed(bpy_data, {})
+    reg = registry.get_registry()
+    try:
+        reg.add("_piercing_map", "key", "name")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("adding to a reserved section should fail")
+
+
+def test_transaction_writes_once(registry, bpy_data):
+    _seed(bpy_data, {"gear_legs": {}})
+    text = bpy_data.texts[".models"]
+    writes = text.writes
+    with registry.registry_transaction():
+        for index in range(5):
+            data = registry.load_registry()
+            registry.add_model(data, "gear_legs", f"leg_gear_{index}", f"Pants {index}")
+            registry.store_registry(data)
+        assert text.writes == writes
+    assert text.writes == writes + 1
+    stored = json.loads(text.as_string())
+    assert list(stored["gear_legs"]) == [f"leg_gear_{index}" for index in range(5)]
+
+
+def test_journal_appends_and_replays(registry, bpy_data):
+    _seed(bpy_data, {"gear_feet": {"feet_gear_a": "Boots"}})
+    import bpy
+    bpy.context.scene.tbse_kit_settings.use_registry_journal = True
+    snapshot = bpy_data.texts[".models"].as_string()
+
+    data = registry.load_registry()
+    registry.add_model(data, "gear_feet", "feet_gear_b", "Sandals")
+    registry.store_registry(data)
+    data = registry.load_registry()
+    registry.rename_model(data, "Boots", "Heels")
+    registry.store_registry(data)
+
+    assert bpy_data.texts[".models"].as_string() == snapshot
+    assert len(bpy_data.texts[".models_journal"].as_string().splitlines()) == 2
+
+    # A fresh parse (e.g. after reloading the file) replays the journal on the snapshot
+    registry.invalidate()
+    reg = registry.get_registry()
+    assert reg.get("gear_feet", "feet_gear_a") == "Heels"
+    assert reg.get("gear_feet", "feet_gear_b") == "Sandals"
+
+    assert registry.compact_registry()
+    assert bpy_data.texts[".models_journal"].as_string() == ""
+    assert json.loads(bpy_data.texts[".models"].as_string())["gear_feet"] == {
+        "feet_gear_a": "Heels", "feet_gear_b": "Sandals"}
+
+
+def test_transaction_without_models_block_keeps_every_addition(registry, bpy_data):
+    with registry.registry_transaction():
+        for index in range(3):
+            data = registry.load_registry()
+            registry.add_model(data, "gear_chest", f"chest_gear_{index}", f"Top {index}")
+            registry.store_registry(data)
+    stored = json.loads(bpy_data.texts[".models"].as_string())
+    assert stored["gear_chest"] == {f"chest_gear_{index}": f"Top {index}" for index in range(3)}
+
+
+def _journal_mode():
+    import bpy
+    bpy.context.scene.tbse_kit_settings.use_registry_journal = True
+
+
+def test_journal_appends_without_rewriting(registry, bpy_data):
+    _seed(bpy_data, {"gear_hands": {}})
+    _journal_mode()
+    for index in range(3):
+        data = registry.load_registry()
+        registry.add_model(data, "gear_hands", f"hand_gear_{index}", f"Gloves {index}")
+        registry.store_registry(data)
+    journal = bpy_data.texts[".models_journal"]
+    assert journal.replaced == 0
+    assert journal.as_string().count("\n") == 3
+    # Reads with an unchanged journal reuse the cached registry
+    assert registry.get_registry() is registry.get_registry()
+
+
+def test_direct_edits_fall_back_to_a_snapshot(registry, bpy_data):
+    _seed(bpy_data, {"gear_hands": {"hand_gear_a": "Gloves"}})
+    _journal_mode()
+    data = registry.load_registry()
+    data["gear_hands"]["hand_gear_b"] = "Mittens"
+    registry.add_model(data, "gear_hands", "hand_gear_c", "Gauntlets")
+    registry.store_registry(data)
+
+    stored = json.loads(bpy_data.texts[".models"].as_string())
+    assert stored["gear_hands"] == {"hand_gear_a": "Gloves", "hand_gear_b": "Mittens", "hand_gear_c": "Gauntlets"}
+    reg = registry.get_registry()
+    assert reg.find("Mittens") == ("gear_hands", "hand_gear_b")
+
+
+def test_failed_rename_replay_warns(registry, bpy_data, capsys):
+    _seed(bpy_data, {"gear_hands": {"hand_gear_a": "Gloves"}})
+    bpy_data.texts.new(".models_journal").from_string('{"op":"rename","o":"Missing","n":"Other"}\n')
+    reg = registry.get_registry()
+    assert reg.find("Other") is None
+    assert "Missing" in capsys.readouterr().out
+
+
+def test_edit_inside_the_journal_is_caught_before_the_next_write(registry, bpy_data):
+    _seed(bpy_data, {"gear_feet": {}})
+    _journal_mode()
+    for key, name in (("feet_gear_a", "Boots"), ("feet_gear_b", "Sandals")):
+        data = registry.load_registry()
+        registry.add_model(data, "gear_feet", key, name)
+        registry.store_registry(data)
+    # Same line count, last line and cursor, only an earlier record differs
+    journal = bpy_data.texts[".models_journal"]
+    journal._source = journal._source.replace("Boots", "Clogs")
+
+    # A snapshot write must not overwrite the edit with the stale cached registry
+    import bpy
+    bpy.context.scene.tbse_kit_settings.use_registry_journal = False
+    data = registry.load_registry()
+    registry.add_model(data, "gear_feet", "feet_gear_c", "Heels")
+    registry.store_registry(data)
+
+    registry.invalidate()
+    reg = registry.get_registry()
+    assert reg.models("gear_feet") == ("Clogs", "Sandals", "Heels")
+
+
+def test_append_falls_back_without_the_cursor_index_api(registry):
+    class OldText:
+        def __init__(self):
+            self.source = "a\n"
+
+        def as_string(self):
+            return self.source
+
+        def from_string(self, source):
+            self.source = source
+
+    text = OldText()
+    registry._append_text(text, "b\n")
+    assert text.source == "a\nb\n"
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src import spatial_cache
+
+
+class _Points(list):
+    def foreach_get(self, attr, buffer):
+        buffer[:] = np.asarray([getattr(item, attr) for item in self]).ravel()
+
+
+class _Mesh:
+    def __init__(self, coords, triangles):
+        self.vertices = _Points(SimpleNamespace(co=co) for co in coords)
+        self.loops = _Points(SimpleNamespace(vertex_index=index) for tri in triangles for index in tri)
+        self.polygons = list(triangles)
+        self.shape_keys = None
+        self.loop_triangles = _Points()
+        self._triangles = triangles
+        self.triangulated = 0
+
+    def calc_loop_triangles(self):
+        self.triangulated += 1
+        self.loop_triangles[:] = [SimpleNamespace(vertices=tri) for tri in self._triangles]
+
+
+@pytest.fixture
+def body():
+    spatial_cache.clear_cache()
+    mesh = _Mesh([(0, 0, 0), (1, 0, 0), (0, 1, 0)], [(0, 1, 2)])
+    yield SimpleNamespace(name="Body", type='MESH', data=mesh, matrix_world=np.eye(4).tolist())
+    spatial_cache.clear_cache()
+
+
+def test_cache_hit_builds_nothing(body):
+    first = spatial_cache.get_spatial_entry([body])
+    assert spatial_cache.get_spatial_entry([body]) is first
+    assert body.data.triangulated == 1
+    assert first.triangles.tolist() == [[0, 1, 2]]
+
+
+def test_moved_vertex_misses(body):
+    first = spatial_cache.get_spatial_entry([body])
+    body.data.vertices[2].co = (0, 2, 0)
+    second = spatial_cache.get_spatial_entry([body])
+    assert second is not first
+    assert second.basis[2].tolist() == [0, 2, 0]
+
+
+def test_uncached_read_leaves_the_cache_alone(body):
+    entry = spatial_cache.read_spatial_entry([body])
+    assert entry.basis.tolist() == [[0, 0, 0], [1, 0, 0], [0, 1, 0]]
+    assert spatial_cache.cache_size() == (0, 0)
+    assert spatial_cache.get_spatial_entry([body]) is not entry
@@ -0,0 +1,60 @@
+from src import utils
+
+
+class _Block:
+    def __init__(self, name):
+        self.name = name
+        self.value = 0.0
+
+
+class _Blocks(list):
+    def foreach_get(self, attr, values):
+        values[:] = [getattr(block, attr) for block in self]
+
+    def foreach_set(self, attr, values):
+        for block, value in zip(self, values):
+            setattr(block, attr, value)
+
+
+class _Key:
+    def __init__(self, name, count):
+        self.name = name
+        self.key_blocks = _Blocks(_Block(f"shape {index}") for index in range(count))
+        self.tagged = 0
+
+    def update_tag(self):
+        self.tagged += 1
+
+
+def _values(key):
+    return [block.value for block in key.key_blocks]
+
+
+def test_switch_writes_exclusive_values_and_tags_full_writes(bpy_data):
+    key = _Key("Chest Master", 4)
+    bpy_data.shape_keys[key.name] = key
+    utils._active_shape_keys.clear()
+    assert utils.switch_shape_key(key.name, 2)
+    assert _values(key) == [0.0, 0.0, 1.0, 0.0]
+    assert key.tagged == 1
+    assert utils.switch_shape_key(key.name, 3)
+    assert _values(key) == [0.0, 0.0, 0.0, 1.0]
+
+
+def test_switch_repairs_stale_tracking(bpy_data):
+    key = _Key("Legs Master", 4)
+    bpy_data.shape_keys[key.name] = key
+    utils._active_shape_keys[key.name] = 0
+    # e.g. undo or a loaded file left another key at 1 behind the tracked state
+    key.key_blocks[1].value = 1.0
+    assert utils.switch_shape_key(key.name, 2)
+    assert _values(key) == [0.0, 0.0, 1.0, 0.0]
+
+
+def test_reset_tags_the_key(bpy_data):
+    key = _Key("Legs Master", 3)
+    key.key_blocks[2].value = 1.0
+    bpy_data.shape_keys[key.name] = key
+    assert utils.reset_shape_keys(key.name)
+    assert _values(key) == [0.0, 0.0, 0.0]
+    assert key.tagged == 1
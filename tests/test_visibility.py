@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src import visibility
+
+
+class _Obj:
+    def __init__(self, name, hidden):
+        self.name = name
+        self.hidden = hidden
+        self.writes = 0
+
+    def hide_get(self):
+        return self.hidden
+
+    def hide_set(self, hidden):
+        self.hidden = hidden
+        self.writes += 1
+
+
+@pytest.fixture
+def scene(monkeypatch):
+    objects = {name: _Obj(name, hidden) for name, hidden in (
+        ("Chest TBSE", True), ("Chest Slim", False), ("Legs", False), ("Top", True), ("Coat", False))}
+    monkeypatch.setattr(visibility, "get_handle_tables", lambda: {
+        "body_chest": {"tbse": objects["Chest TBSE"], "slim": objects["Chest Slim"]},
+        "body_legs": {"tbse": objects["Legs"]},
+        "gear_chest": {"chest_gear_1": objects["Top"], "chest_gear_2": objects["Coat"]},
+    })
+    props = SimpleNamespace(show_chest_gear=True, show_leg_gear=True, show_hand_gear=True, show_feet_gear=True)
+    items = [SimpleNamespace(obj_pointer=objects["Top"], isEnabled=True),
+             SimpleNamespace(obj_pointer=objects["Coat"], isEnabled=False)]
+    settings = SimpleNamespace(use_collection_visibility=False)
+    context = SimpleNamespace(scene=SimpleNamespace(
+        tbse_kit_properties=props, tbse_kit_settings=settings, chest_gear_list=items,
+        leg_gear_list=[], hand_gear_list=[], feet_gear_list=[]))
+    entries = {("body_chest", "tbse"), ("body_legs", "tbse")}
+    monkeypatch.setattr(visibility, "compute_visible_entries", lambda registry, props, scene: entries)
+    monkeypatch.setattr(visibility, "get_registry", lambda: None)
+    return context, objects
+
+
+def test_desired_visibility_follows_entries_and_gear_lists(scene):
+    context, objects = scene
+    desired = visibility.compute_desired_visibility(context)
+    assert {obj.name: visible for obj, visible in desired.items()} == {
+        "Chest TBSE": True, "Chest Slim": False, "Legs": True, "Top": True, "Coat": False}
+
+
+def test_only_changed_objects_are_written(scene):
+    context, objects = scene
+    assert visibility.resolve_visibility(context) == 4
+    assert {name: obj.writes for name, obj in objects.items()} == {
+        "Chest TBSE": 1, "Chest Slim": 1, "Legs": 0, "Top": 1, "Coat": 1}
+    # Nothing changed since, so nothing is written again
+    assert visibility.resolve_visibility(context) == 0
+    assert sum(obj.writes for obj in objects.values()) == 4
+
+
+def test_gear_list_show_flag_hides_every_item(scene):
+    context, objects = scene
+    context.scene.tbse_kit_properties.show_chest_gear = False
+    desired = visibility.compute_desired_visibility(context)
+    assert desired[objects["Top"]] is False
+    assert desired[objects["Coat"]] is False
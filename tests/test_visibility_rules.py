@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+from src.registry import ModelRegistry
+from src.visibility_rules import compile_piercing_map, compile_rules
+
+
+def _bool():
+    return SimpleNamespace(type='BOOLEAN')
+
+
+def _enum(*items):
+    return SimpleNamespace(type='ENUM', enum_items=[SimpleNamespace(identifier=item) for item in items])
+
+
+REGISTRY = ModelRegistry({
+    "body_legs": {"tbse": "Legs", "chonk": "Legs Chonk"},
+    "genitals_amab": {"a": "Penis"},
+    "piercings_chest": {"ring": "Nipple Ring", "navel": "Navel Bar"},
+})
+
+RNA = {"legToggle": _bool(), "legShape": _enum("tbse", "chonk"), "genitalType": _enum("afab", "amab")}
+
+RULES = {
+    "overrides": [{"when": {"legShape": "chonk"}, "set": {"genitalType": "amab"}}],
+    "parts": {
+        "legs": {
+            "keys": ["legToggle", "legShape"],
+            "match": "first",
+            "rules": [
+                {"when": {"legToggle": False}, "show": []},
+                {"when": {"legShape": "chonk"}, "show": ["body_legs.chonk"]},
+                {"show": ["body_legs.tbse"]},
+            ],
+        },
+        "genitals": {
+            "keys": ["legShape", "genitalType"],
+            "rules": [{"when": {"genitalType": "amab"}, "show": ["genitals_amab"]}],
+        },
+    },
+}
+
+
+def test_parts_compile_to_first_match_tables():
+    compiled = compile_rules(RULES, REGISTRY, RNA)
+    legs = compiled.parts[0]
+    assert legs.table[(False, "chonk")][0] == frozenset()
+    assert legs.table[(True, "chonk")][0] == {("body_legs", "chonk")}
+    assert legs.table[(True, "tbse")][0] == {("body_legs", "tbse")}
+
+
+def test_overrides_apply_inside_parts_that_see_their_keys():
+    compiled = compile_rules(RULES, REGISTRY, RNA)
+    props = SimpleNamespace(legToggle=True, legShape="chonk", genitalType="afab")
+    entries, _ = compiled.lookup(props)
+    assert ("genitals_amab", "a") in entries
+    assert compiled.forced_values(props) == {"genitalType": "amab"}
+
+
+def test_piercing_entries_are_the_union_of_enabled_toggles():
+    piercings = compile_piercing_map({"tbse_chest_toggles": {
+        "nipples": ["piercings_chest.ring"], "navel": ["piercings_chest.navel"]}}, REGISTRY)
+    compiled = compile_rules({"parts": {}}, REGISTRY, RNA)
+    compiled.piercings = piercings
+    toggles = SimpleNamespace(nipples=True, navel=False)
+    assert compiled.piercing_entries("tbse_chest_toggles", toggles) == {("piercings_chest", "ring")}
+    toggles.navel = True
+    assert compiled.piercing_entries("tbse_chest_toggles", toggles) == {
+        ("piercings_chest", "ring"), ("piercings_chest", "navel")}
+    assert compiled.piercing_entries("tbse_amab_toggles", toggles) == frozenset()
+
+
+def test_except_leaves_members_out_of_a_group():
+    rules = {"parts": {"legs": {"keys": ["legShape"], "rules": [
+        {"when": {"legShape": "chonk"}, "show": ["body_legs"], "except": ["body_legs.chonk"]}]}}}
+    compiled = compile_rules(rules, REGISTRY, RNA)
+    assert compiled.parts[0].table[("chonk",)][0] == {("body_legs", "tbse")}
+
+
+def test_compiled_rules_follow_registry_mutations():
+    from src.visibility_rules import get_compiled_rules
+    registry = ModelRegistry({"body_legs": {"tbse": "Legs"}})
+    rules = {"parts": {"legs": {"keys": ["legToggle"], "rules": [{"when": {"legToggle": True}, "show": ["body_legs"]}]}}}
+    registry.data["_visibility_rules"] = rules
+    registry.resync()
+    props = SimpleNamespace(legToggle=True)
+    assert get_compiled_rules(registry, RNA).lookup(props)[0] == {("body_legs", "tbse")}
+    registry.add("body_legs", "extra", "Legs Extra")
+    assert get_compiled_rules(registry, RNA).lookup(props)[0] == {("body_legs", "tbse"), ("body_legs", "extra")}
+
+
+def test_piercing_tables_grow_linearly_with_toggles():
+    toggle_map = {f"toggle_{index}": ["piercings_chest.ring"] for index in range(40)}
+    piercings = compile_piercing_map({"tbse_chest_toggles": toggle_map}, REGISTRY)
+    assert len(piercings["tbse_chest_toggles"].table) == 40
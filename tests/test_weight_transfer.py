@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from src import spatial_cache
+from src.weight_transfer import WEIGHT_STEPS, get_body_weights, limit_influences, write_weights
+
+
+def test_limit_influences_keeps_the_strongest_bones():
+    weights = np.array([[0.1, 0.4, 0.05, 0.3, 0.15, 0.0]], dtype=np.float32)
+    limited = limit_influences(weights, 4)
+    assert np.count_nonzero(limited) == 4
+    assert limited[0, 2] == 0.0
+    assert limited[0, 1] == limited.max()
+
+
+def test_limit_influences_normalizes_to_byte_steps():
+    rng = np.random.default_rng(7)
+    weights = rng.random((64, 10)).astype(np.float32)
+    limited = limit_influences(weights, 4)
+    np.testing.assert_allclose(limited.sum(axis=1), 1.0, atol=1e-6)
+    steps = limited * WEIGHT_STEPS
+    np.testing.assert_allclose(steps, np.rint(steps), atol=1e-4)
+    assert (np.count_nonzero(limited, axis=1) <= 4).all()
+
+
+def test_limit_influences_leaves_unweighted_vertices_empty():
+    weights = np.array([[0.0, 0.0, 0.0], [0.2, 0.2, 0.0]], dtype=np.float32)
+    limited = limit_influences(weights, 4)
+    assert not limited[0].any()
+    np.testing.assert_allclose(limited[1].sum(), 1.0, atol=1e-6)
+
+
+class _Group:
+    def __init__(self, name):
+        self.name = name
+        self.added = []
+
+    def add(self, indices, weight, mode):
+        self.added.append((indices, weight))
+
+
+class _Groups(list):
+    def new(self, name):
+        self.append(_Group(name))
+        return self[-1]
+
+
+def test_write_weights_replaces_every_bone_group_and_keeps_masks():
+    gear = SimpleNamespace(vertex_groups=_Groups([_Group("j_kosi"), _Group("j_sebo_a"), _Group("mask")]))
+    weights = np.array([[1.0], [0.0]], dtype=np.float32)
+    assert write_weights(gear, ["j_sebo_a"], weights, {"j_kosi", "j_sebo_a"}) == 1
+    assert [group.name for group in gear.vertex_groups] == ["mask", "j_sebo_a"]
+    assert gear.vertex_groups[1].added == [([0], 1.0)]
+
+
+def test_body_weights_are_read_once_until_the_body_updates():
+    spatial_cache.clear_cache()
+    entry = spatial_cache.SpatialEntry(np.zeros((2, 3), dtype=np.float32), {}, np.zeros((0, 3), dtype=np.int32))
+    entry.sources = frozenset({"Body"})
+    spatial_cache._cache[b"body"] = entry
+    vertices = [SimpleNamespace(index=0, groups=[SimpleNamespace(group=0, weight=0.5)]), SimpleNamespace(index=1, groups=[])]
+    body = SimpleNamespace(name="Body", type='MESH', data=SimpleNamespace(vertices=vertices),
+                           vertex_groups=[SimpleNamespace(name="j_kosi", index=0)])
+    reads = []
+
+    def read():
+        reads.append(1)
+        return ["j_kosi"], np.ones((2, 1), dtype=np.float32)
+
+    entry.bone_weights(("bones",), read)
+    assert entry.bone_weights(("bones",), read)[0] == ["j_kosi"]
+    assert len(reads) == 1
+    assert spatial_cache.cache_size()[1] >= 8
+
+    def update(name, geometry):
+        return SimpleNamespace(id=SimpleNamespace(name=name), is_updated_geometry=geometry)
+
+    spatial_cache._spatial_cache_depsgraph_handler(None, SimpleNamespace(updates=[update("Gear", True), update("Body", False)]))
+    entry.bone_weights(("bones",), read)
+    assert len(reads) == 1
+    spatial_cache._spatial_cache_depsgraph_handler(None, SimpleNamespace(updates=[update("Body", True)]))
+    entry.bone_weights(("bones",), read)
+    assert len(reads) == 2
+
+    # A renamed body vertex group is a different key
+    names, weights = get_body_weights(entry, [body], {"j_kosi"})
+    assert names == ["j_kosi"] and weights[:, 0].tolist() == [0.5, 0.0]
+    body.vertex_groups[0].name = "j_kosi_renamed"
+    assert get_body_weights(entry, [body], {"j_kosi", "j_kosi_renamed"})[0] == ["j_kosi_renamed"]
+    spatial_cache.clear_cache()